@@ -0,0 +1,9 @@
+from .agent import Agent, AgentError
+from .server import AgentServer, run_agent
+
+__all__ = [
+    'Agent',
+    'AgentError',
+    'AgentServer',
+    'run_agent',
+]
@@ -0,0 +1,238 @@
+"""
+无界面代理
+
+所有 WMI 调用都在同一个初始化了 COM 的工作线程中执行，整个进程只保持一个 WMI 连接。
+读请求按 (名称, 参数) 合并：同一时刻的相同读请求只查询一次，结果在 cache_ttl 秒内直接复用，任何写操作完成后缓存失效。
+写操作以批量方式提交，一个批次在工作线程中一次执行完毕；atomic 批次通过 Transaction 执行，失败时回滚。
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from ..core.com import COMThreadPool
+
+DEFAULT_CACHE_TTL = 1.0  # 秒
+READ_TIMEOUT = 60.0  # 秒
+
+
+class AgentError(Exception):
+    """请求无效（对应 HTTP 400）"""
+
+
+def _status() -> dict:
+    from ..core.services import is_uwf_installed
+    from ..core.services.filter import current_enabled, next_enabled
+
+    if not is_uwf_installed(): return {'installed': False}
+    return {
+        'installed': True,
+        'filter': {'current': current_enabled(), 'next': next_enabled()},
+        'overlay': _overlay(),
+    }
+
+
+def _overlay() -> dict:
+    from ..core.services.overlay import overlay_status
+    from ..core.services.overlay_config import get_type, maximum_size
+
+    _require_installed()
+    return {'type': get_type(), 'maximum_size': maximum_size(), **overlay_status()}
+
+
+def _volumes() -> list[dict]:
+    from ..core.object import WMIObject
+    from ..core.services.query import Query
+    from ..core.services.utils import stream_query
+
+    _require_installed()
+    return [
+        {
+            'drive': volume['DriveLetter'],
+            'session': 'current' if volume['CurrentSession'] else 'next',
+            'protected': bool(volume.get('Protected')),
+        }
+        for volume in stream_query(Query('UWF_Volume').select('Protected'), convert=WMIObject.as_dict)
+        if volume.get('DriveLetter')
+    ]
+
+
+def _exclusions(drive: str) -> list[str]:
+    from ..core.services.volume import UWFVolume
+
+    _require_installed()
+    success, exclusions = UWFVolume.get_exclusions(drive=drive)
+    if not success: raise RuntimeError(f'获取卷 {drive} 的排除项失败')
+    return [exclusion.FileName for exclusion in exclusions]
+
+
+def _overlay_analysis() -> dict:
+    from ..core.overlay_analysis import analyze_overlay
+
+    _require_installed()
+    return analyze_overlay().to_dict()
+
+
+def _require_installed():
+    from ..core.services import is_uwf_installed
+
+    if not is_uwf_installed(): raise RuntimeError('UWF 服务未安装')
+
+
+# 读请求：名称 -> (函数, 必需参数)
+READS: dict[str, tuple[Callable, tuple[str, ...]]] = {
+    'status': (_status, ()),
+    'overlay': (_overlay, ()),
+    'volumes': (_volumes, ()),
+    'exclusions': (_exclusions, ('drive',)),
+    'overlay_analysis': (_overlay_analysis, ()),
+}
+
+
+def _write_operations() -> dict[str, tuple[Callable, tuple[str, ...]]]:
+    """写操作：名称 -> (函数, 必需参数)，参数名即请求中的字段名"""
+    from ..core.services.filter import UWFFilter
+    from ..core.services.overlay import UWFOverlay
+    from ..core.services.overlay_config import UWFOverlayConfig
+    from ..core.services.volume import UWFVolume
+
+    return {
+        'enable': (UWFFilter.enable, ()),
+        'disable': (UWFFilter.disable, ()),
+        'protect': (UWFVolume.protect, ('drive',)),
+        'unprotect': (UWFVolume.unprotect, ('drive',)),
+        'add_exclusion': (lambda drive, path: UWFVolume.add_exclusion(drive=drive, file_name=path), ('drive', 'path')),
+        'remove_exclusion': (lambda drive, path: UWFVolume.remove_exclusion(drive=drive, file_name=path), ('drive', 'path')),
+        'set_overlay_type': (lambda type: UWFOverlayConfig.set_type(type), ('type',)),
+        'set_maximum_size': (lambda size: UWFOverlayConfig.set_maximum_size(size), ('size',)),
+        'set_thresholds': (UWFOverlay.set_thresholds, ('warning', 'critical')),
+    }
+
+
+TRANSACTION_WRITES = ('protect', 'add_exclusion', 'set_overlay_type', 'set_maximum_size', 'enable')
+
+
+def _params(name: str, required: tuple[str, ...], request: dict) -> dict:
+    missing = [key for key in required if request.get(key) in (None, '')]
+    if missing: raise AgentError(f'{name} 缺少参数: {", ".join(missing)}')
+    return {key: request[key] for key in required}
+
+
+class Agent:
+    """
+    代理核心，不依赖传输方式
+    :param cache_ttl: 读结果的缓存时间（秒），0 表示只合并同时发生的请求
+    """
+    def __init__(self, cache_ttl: float = DEFAULT_CACHE_TTL):
+        self.cache_ttl = cache_ttl
+        self._pool = COMThreadPool(max_workers=1, name='AgentCOM')  # 唯一的 WMI 连接
+        self._lock = threading.RLock()  # 已完成的 future 会在 add_done_callback 中立即回调
+        self._inflight: dict[tuple, Future] = {}
+        self._cache: dict[tuple, tuple[float, Any]] = {}
+        self._generation = 0  # 每次写操作后加一，写之前发起的读不再写入缓存
+        self.stats = {'reads': 0, 'coalesced': 0, 'cached': 0, 'queries': 0, 'batches': 0, 'writes': 0}
+        self._pool.submit(self._warm).result()
+
+    @staticmethod
+    def _warm():
+        from ..core.services import get_wmi_client
+
+        get_wmi_client()
+
+    def read(self, name: str, **params) -> Any:
+        """
+        执行读请求
+        :param name: READS 中的名称
+        :return: 可 JSON 序列化的结果
+        """
+        if name not in READS: raise AgentError(f'未知的读请求: {name}')
+        fn, required = READS[name]
+        kwargs = _params(name, required, params)
+        key = (name, tuple(sorted(kwargs.items())))
+        with self._lock:
+            self.stats['reads'] += 1
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self.stats['cached'] += 1
+                return cached[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+            else:
+                self.stats['queries'] += 1
+                future = self._inflight[key] = self._pool.submit(fn, **kwargs)
+                future.add_done_callback(lambda f, generation=self._generation: self._done(key, f, generation))
+        return future.result(timeout=READ_TIMEOUT)
+
+    def _done(self, key: tuple, future: Future, generation: int):
+        with self._lock:
+            if self._inflight.get(key) is future: del self._inflight[key]
+            if generation == self._generation and self.cache_ttl > 0 and future.exception() is None:
+                self._cache[key] = (time.monotonic(), future.result())
+
+    def batch(self, operations: list[dict], atomic: bool = False) -> dict:
+        """
+        在工作线程中一次执行一批写操作
+        :param operations: [{"op": "protect", "drive": "D:"}, {"op": "add_exclusion", "drive": "D:", "path": "\\Data"}, ...]
+        :param atomic: 作为事务执行，某一步失败时回滚已完成的步骤（只支持 TRANSACTION_WRITES）
+        :return: {"success": bool, "results": [{"op": ..., "success": bool}, ...]}，atomic 时另含 "summary"
+        """
+        if not isinstance(operations, list) or not operations: raise AgentError('operations 必须是非空列表')
+        writes = _write_operations()
+        planned = []
+        for operation in operations:
+            if not isinstance(operation, dict): raise AgentError('每个操作必须是对象')
+            name = operation.get('op')
+            if name not in writes: raise AgentError(f'未知的写操作: {name}')
+            if atomic and name not in TRANSACTION_WRITES: raise AgentError(f'{name} 不支持在事务中执行')
+            fn, required = writes[name]
+            planned.append((name, fn, _params(name, required, operation)))
+        try:
+            return self._pool.submit(self._apply_transaction if atomic else self._apply_batch, planned).result()
+        finally:
+            with self._lock:
+                self.stats['batches'] += 1
+                self.stats['writes'] += len(planned)
+                self._generation += 1
+                self._cache.clear()
+
+    @staticmethod
+    def _apply_batch(planned: list[tuple[str, Callable, dict]]) -> dict:
+        _require_installed()
+        results = []
+        for name, fn, kwargs in planned:
+            try:
+                success = bool(fn(**kwargs))
+            except Exception as e:
+                print(f'[!] 代理执行 {name} 失败: {e}')
+                success = False
+            results.append({'op': name, **kwargs, 'success': success})
+        return {'success': all(result['success'] for result in results), 'results': results}
+
+    @staticmethod
+    def _apply_transaction(planned: list[tuple[str, Callable, dict]]) -> dict:
+        from ..core.services.transaction import Transaction
+
+        _require_installed()
+        transaction = Transaction('代理批量请求')
+        steps = []
+        try:
+            for name, _, kwargs in planned:
+                if name == 'protect': steps.append(transaction.protect_volume(kwargs['drive']))
+                elif name == 'add_exclusion': steps.append(transaction.add_exclusion(kwargs['drive'], kwargs['path']))
+                elif name == 'set_overlay_type': steps.append(transaction.set_overlay_type(kwargs['type']))
+                elif name == 'set_maximum_size': steps.append(transaction.set_maximum_size(kwargs['size']))
+                elif name == 'enable': steps.append(transaction.enable_filter())
+        except ValueError as e:  # 例如同一批次中重复的操作产生了重名的步骤
+            raise AgentError(f'无法组成事务: {e}')
+        result = transaction.apply()
+        return {
+            'success': result.success,
+            'rolled_back': result.rolled_back,
+            'results': [{'op': name, **kwargs, 'status': step.status} for (name, _, kwargs), step in zip(planned, steps)],
+            'summary': result.summary(),
+        }
+
+    def close(self):
+        """关闭工作线程并释放 WMI 连接"""
+        self._pool.shutdown(wait=True)
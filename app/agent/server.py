@@ -0,0 +1,193 @@
+"""
+代理的本地 JSON API（只监听回环地址）
+
+    GET  /status                     过滤器、覆盖层状态
+    GET  /overlay                    覆盖层类型、大小、用量与阈值
+    GET  /volumes                    各卷在两个会话中的保护状态
+    GET  /exclusions?drive=C:        卷的排除项
+    GET  /overlay_analysis           覆盖层中占用最多的目录与文件类型
+    GET  /stats                      请求合并与缓存统计
+    POST /batch                      {"atomic": false, "operations": [{"op": "protect", "drive": "D:"}, ...]}
+
+所有请求需携带 "Authorization: Bearer <token>"，令牌取自环境变量 FREEZELOCK_AGENT_TOKEN，未设置时启动时生成并写入
+数据目录的 agent_token.json（仅管理员可读）。Host 必须是回环地址，带有 Origin 时也必须是回环地址（阻止浏览器跨站请求与 DNS 重绑定），
+POST 的 Content-Type 必须是 application/json。
+"""
+import argparse
+import hmac
+import http.server
+import json
+import os
+import secrets
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from .agent import Agent, AgentError, DEFAULT_CACHE_TTL
+from ..core.metrics import LOOPBACK_HOSTS
+
+AGENT_TOKEN_ENV = 'FREEZELOCK_AGENT_TOKEN'
+AGENT_TOKEN_FILE = 'agent_token.json'
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9478
+MAX_BODY = 1024 * 1024
+
+
+class AgentServer(http.server.ThreadingHTTPServer):
+    """
+    代理 HTTP 服务
+    :param agent: 代理核心
+    :param address: 监听地址 (host, port)，只允许回环地址
+    :param token: 访问令牌，为 None 时不校验（run_agent 总是提供令牌）
+    """
+    daemon_threads = True
+
+    def __init__(self, agent: Agent, address: tuple[str, int] = (DEFAULT_HOST, DEFAULT_PORT), token: Optional[str] = None):
+        if address[0] not in LOOPBACK_HOSTS: raise ValueError(f'代理只允许监听回环地址: {address[0]}')
+        self.agent = agent
+        self.token = token
+        super().__init__(address, _Handler)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server: AgentServer
+
+    def do_GET(self):
+        if not self._local() or not self._authorized(): return
+        url = urlsplit(self.path)
+        name = url.path.strip('/')
+        if name == 'stats':
+            self._reply(200, dict(self.server.agent.stats))
+            return
+        self._handle(lambda: self.server.agent.read(name, **dict(parse_qsl(url.query))))
+
+    def do_POST(self):
+        if not self._local() or not self._authorized(): return
+        if urlsplit(self.path).path.strip('/') != 'batch':
+            self._reply(404, {'error': f'未知的路径: {self.path}'})
+            return
+        if self.headers.get('Content-Type', '').split(';')[0].strip().lower() != 'application/json':
+            self._reply(415, {'error': 'Content-Type 必须是 application/json'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self._reply(400, {'error': '无效的 Content-Length'})
+            return
+        if length < 0:
+            self._reply(400, {'error': '无效的 Content-Length'})
+            return
+        if length > MAX_BODY:
+            self._reply(413, {'error': '请求过大'})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._reply(400, {'error': f'无效的 JSON: {e}'})
+            return
+        if not isinstance(request, dict):
+            self._reply(400, {'error': '请求必须是对象'})
+            return
+        self._handle(lambda: self.server.agent.batch(request.get('operations'), atomic=bool(request.get('atomic'))))
+
+    def _handle(self, call):
+        try:
+            self._reply(200, call())
+        except AgentError as e:
+            self._reply(400, {'error': str(e)})
+        except Exception as e:
+            print(f'[!] 代理处理请求 {self.command} {self.path} 失败: {e}')
+            self._reply(500, {'error': str(e)})
+
+    def _local(self) -> bool:
+        """Host 与 Origin（如有）都必须是回环地址"""
+        for name, value in (('Host', self.headers.get('Host')), ('Origin', self.headers.get('Origin'))):
+            if value is None: continue
+            try:
+                host = urlsplit(value if name == 'Origin' else f'//{value}').hostname
+            except ValueError:
+                host = None
+            if host not in LOOPBACK_HOSTS:
+                self._reply(403, {'error': f'拒绝非本机的 {name}: {value}'})
+                return False
+        return True
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token: return True
+        header = self.headers.get('Authorization', '')
+        if hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()): return True
+        self._reply(401, {'error': '未授权'})
+        return False
+
+    def _reply(self, status: int, body):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # 不输出每个请求的访问日志
+
+
+def load_token() -> str:
+    """
+    读取访问令牌（FREEZELOCK_AGENT_TOKEN），未设置时生成新令牌并写入数据目录的 agent_token.json，
+    该文件只允许 SYSTEM 和 Administrators 读取；无法限制权限时删除文件，只在控制台输出令牌
+    :return: 访问令牌
+    """
+    from ..core.storage import data_path, restrict_to_admins, write_json
+
+    token = os.environ.get(AGENT_TOKEN_ENV)
+    if token: return token
+    token = secrets.token_urlsafe(32)
+    path = data_path(AGENT_TOKEN_FILE)
+    if write_json(AGENT_TOKEN_FILE, {'token': token}):
+        if restrict_to_admins(path):
+            print(f'[*] 未设置 {AGENT_TOKEN_ENV}，已生成访问令牌（仅管理员可读）: {path}')
+            return token
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f'[!] 删除 {path} 失败: {e}')
+    print(f'[*] 未设置 {AGENT_TOKEN_ENV}，本次的访问令牌: {token}')
+    return token
+
+
+def run_agent(argv: Optional[list[str]] = None) -> int:
+    """
+    以无界面代理模式运行，直到收到 Ctrl+C
+    :param argv: 命令行参数（不含程序名）
+    :return: 退出码
+    """
+    from ..core.metrics import MetricsExporter
+    from ..core.storage import data_dir_persistent
+
+    parser = argparse.ArgumentParser(prog='FreezeLock --agent', description='FreezeLock 无界面代理')
+    parser.add_argument('--agent', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--host', default=DEFAULT_HOST, help='监听地址（只允许回环地址）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL, help='读结果的缓存时间（秒）')
+    args = parser.parse_args(argv)
+
+    agent = Agent(cache_ttl=args.cache_ttl)
+    try:
+        server = AgentServer(agent, address=(args.host, args.port), token=load_token())
+    except (ValueError, OSError) as e:
+        print(f'[!] 启动代理失败: {e}')
+        agent.close()
+        return 1
+    exporter = MetricsExporter.from_env()
+    if exporter is not None: exporter.start()
+    print(f'[+] FreezeLock 代理: http://{args.host}:{server.server_address[1]}')
+    data_dir_persistent()  # 数据目录的写入无法在重启后保留时提示审计日志会丢失
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('[*] 停止代理')
+    finally:
+        server.server_close()
+        if exporter is not None: exporter.stop()
+        agent.close()
+    return 0
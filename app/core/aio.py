@@ -0,0 +1,125 @@
+"""
+UWF 服务的 asyncio 接口
+
+每个调用都提交到初始化了 COM 的共享线程池（COMThreadPool）中执行，事件循环线程不会调用 COM。
+支持 timeout、任务取消以及 asyncio.gather 并发：
+
+    results = await asyncio.gather(*(aio.UWFVolume.protect(drive) for drive in drives))
+    enabled = await aio.current_enabled(timeout=5)
+
+取消或超时时，尚未开始的调用不会执行；已经开始的 COM 调用无法中断，会在工作线程中执行完毕，结果被丢弃。
+返回值不包含 COM 对象（COM 对象不能在线程之间传递），例如 get_exclusions 返回排除路径字符串列表。
+"""
+import asyncio
+import functools
+import threading
+from typing import Any, Callable, Optional
+
+from .com import COMThreadPool
+from .services import filter as _filter
+from .services import overlay as _overlay
+from .services import overlay_config as _overlay_config
+from .services import volume as _volume
+
+DEFAULT_MAX_WORKERS = 4
+
+_lock = threading.Lock()
+_executor: Optional[COMThreadPool] = None
+_max_workers = DEFAULT_MAX_WORKERS
+
+
+def configure(max_workers: int = DEFAULT_MAX_WORKERS):
+    """
+    设置线程池大小，已创建的线程池会被关闭并在下次调用时按新大小重建
+    :param max_workers: 工作线程数量
+    """
+    global _max_workers
+    if max_workers < 1: raise ValueError('max_workers 必须大于 0')
+    _max_workers = max_workers
+    shutdown(wait=False)
+
+
+def get_executor() -> COMThreadPool:
+    """获取共享的 COM 线程池（首次调用时创建）"""
+    global _executor
+    with _lock:
+        if _executor is None: _executor = COMThreadPool(max_workers=_max_workers, name='AsyncCOMWorker')
+        return _executor
+
+
+def shutdown(wait: bool = True):
+    """关闭共享线程池"""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None: executor.shutdown(wait=wait)
+
+
+async def run(fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    在 COM 线程池中执行 fn(*args, **kwargs)
+    :param fn: 同步函数
+    :param timeout: 超时秒数，超时抛出 asyncio.TimeoutError
+    :return: fn 的返回值
+    """
+    future = asyncio.wrap_future(get_executor().submit(fn, *args, **kwargs))
+    if timeout is None: return await future
+    return await asyncio.wait_for(future, timeout=timeout)
+
+
+def _awaitable(fn: Callable) -> Callable:
+    """把同步服务方法包装为协程函数，额外接受 timeout 关键字参数"""
+    @functools.wraps(fn)
+    async def wrapper(*args, timeout: Optional[float] = None, **kwargs):
+        return await run(fn, *args, timeout=timeout, **kwargs)
+    return wrapper
+
+
+def _exclusion_paths(drive: str) -> tuple[bool, list[str]]:
+    success, exclusions = _volume.UWFVolume.get_exclusions(drive=drive)
+    return success, [exclusion.FileName for exclusion in exclusions]
+
+
+class UWFFilter:
+    """UWFFilter 的 asyncio 版本"""
+    enable = staticmethod(_awaitable(_filter.UWFFilter.enable))
+    disable = staticmethod(_awaitable(_filter.UWFFilter.disable))
+    reset_settings = staticmethod(_awaitable(_filter.UWFFilter.reset_settings))
+    shutdown_system = staticmethod(_awaitable(_filter.UWFFilter.shutdown_system))
+    restart_system = staticmethod(_awaitable(_filter.UWFFilter.restart_system))
+
+
+class UWFVolume:
+    """UWFVolume 的 asyncio 版本，多个卷的并发操作直接使用 asyncio.gather"""
+    add_exclusion = staticmethod(_awaitable(_volume.UWFVolume.add_exclusion))
+    remove_exclusion = staticmethod(_awaitable(_volume.UWFVolume.remove_exclusion))
+    remove_all_exclusions = staticmethod(_awaitable(_volume.UWFVolume.remove_all_exclusions))
+    find_exclusion = staticmethod(_awaitable(_volume.UWFVolume.find_exclusion))
+    get_exclusions = staticmethod(_awaitable(_exclusion_paths))
+    commit_file = staticmethod(_awaitable(_volume.UWFVolume.commit_file))
+    commit_file_deletion = staticmethod(_awaitable(_volume.UWFVolume.commit_file_deletion))
+    commit_tree = staticmethod(_awaitable(_volume.UWFVolume.commit_tree))
+    protect = staticmethod(_awaitable(_volume.UWFVolume.protect))
+    unprotect = staticmethod(_awaitable(_volume.UWFVolume.unprotect))
+    set_bind_by_drive_letter = staticmethod(_awaitable(_volume.UWFVolume.set_bind_by_drive_letter))
+
+
+class UWFOverlayConfig:
+    """UWFOverlayConfig 的 asyncio 版本"""
+    set_type = staticmethod(_awaitable(_overlay_config.UWFOverlayConfig.set_type))
+    set_maximum_size = staticmethod(_awaitable(_overlay_config.UWFOverlayConfig.set_maximum_size))
+
+
+class UWFOverlay:
+    """UWFOverlay 的 asyncio 版本"""
+    set_warning_threshold = staticmethod(_awaitable(_overlay.UWFOverlay.set_warning_threshold))
+    set_critical_threshold = staticmethod(_awaitable(_overlay.UWFOverlay.set_critical_threshold))
+    set_thresholds = staticmethod(_awaitable(_overlay.UWFOverlay.set_thresholds))
+
+
+current_enabled = _awaitable(_filter.current_enabled)
+next_enabled = _awaitable(_filter.next_enabled)
+get_type = _awaitable(_overlay_config.get_type)
+maximum_size = _awaitable(_overlay_config.maximum_size)
+overlay_status = _awaitable(_overlay.overlay_status)
+overlay_usage = _awaitable(_overlay.overlay_usage)
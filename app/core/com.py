@@ -0,0 +1,79 @@
+"""
+COM 工作线程池
+
+COM 对象不能跨线程使用，每个工作线程在启动时调用 CoInitializeEx，通过 get_wmi_client() 获取自己的 WMI 连接，
+退出前释放连接并调用 CoUninitialize。
+"""
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable
+
+import pythoncom
+
+from .services import release_thread_client
+
+
+@contextmanager
+def com_thread():
+    """
+    在当前线程（非主线程）中初始化 COM，退出时释放该线程的 WMI 连接
+    """
+    pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+    try:
+        yield
+    finally:
+        release_thread_client()
+        pythoncom.CoUninitialize()
+
+
+class COMThreadPool:
+    """
+    初始化了 COM 的固定大小线程池
+    :param max_workers: 工作线程数量
+    :param name: 线程名前缀
+    """
+    def __init__(self, max_workers: int = 4, name: str = 'COMWorker'):
+        if max_workers < 1: raise ValueError('max_workers 必须大于 0')
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'{name}-{i}', daemon=True)
+            for i in range(max_workers)
+        ]
+        self._shutdown = False
+        for thread in self._threads:
+            thread.start()
+
+    def _worker(self):
+        with com_thread():
+            while True:
+                item = self._queue.get()
+                if item is None: break
+                future, fn, args, kwargs = item
+                if not future.set_running_or_notify_cancel(): continue
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        if self._shutdown: raise RuntimeError('线程池已关闭')
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True):
+        if self._shutdown: return
+        self._shutdown = True
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> 'COMThreadPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
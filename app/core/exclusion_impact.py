@@ -0,0 +1,190 @@
+"""
+排除项效果预估
+
+把各卷的覆盖文件与现有排除项分别编入按路径组件划分、大小写不敏感的前缀树，覆盖文件树的每个节点记录其子树中
+文件的总字节数与数量。预估一个候选排除项只需沿树走到对应节点，耗时与路径深度相关、与文件数量无关：
+    simulator = ExclusionSimulator.from_volumes(['C:'])
+    impact = simulator.simulate(['C:\\Users\\Kiosk\\AppData\\Local\\Temp'])[0]
+    impact.bytes, impact.files, impact.covered_by
+已被现有排除项覆盖的覆盖文件不计入（排除项在下次启动后生效，这些文件之后不会再写入覆盖层）。
+"""
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+import pywintypes
+
+from .path_rules import split_path
+
+
+class _Node:
+    __slots__ = ('children', 'bytes', 'files', 'exclusion')
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.bytes = 0
+        self.files = 0
+        self.exclusion: Optional[str] = None  # 以该节点为路径的排除项（原始写法）
+
+
+@dataclass
+class ExclusionImpact:
+    """单个候选排除项的预估结果"""
+    path: str  # 规范化后的完整路径，例如 "C:\\Data\\Logs"
+    bytes: int = 0  # 当前覆盖层中该路径下的字节数，即添加后不再写入覆盖层的量
+    files: int = 0  # 受影响的覆盖文件数量
+    covered_by: Optional[str] = None  # 已覆盖该路径的现有排除项
+    duplicate_of: Optional[str] = None  # 已覆盖该路径的另一个候选项
+    covers: list[str] = field(default_factory=list)  # 该路径下已有的排除项，添加后变为多余
+
+    @property
+    def redundant(self) -> bool:
+        return self.covered_by is not None or self.duplicate_of is not None
+
+
+class ExclusionSimulator:
+    """
+    覆盖文件与排除项的前缀索引
+    """
+    def __init__(self):
+        self._files: dict[str, _Node] = {}  # 盘符 -> 覆盖文件树
+        self._exclusions: dict[str, _Node] = {}  # 盘符 -> 排除项树
+        self.excluded_bytes = 0  # 已被现有排除项覆盖的覆盖文件字节数
+
+    def add_exclusion(self, drive: str, file_name: str):
+        """加入一个现有排除项（需在 add_file 之前加入）"""
+        _, parts = split_path(file_name)
+        node = self._exclusions.setdefault(drive.upper(), _Node())
+        for part in parts:
+            node = node.children.setdefault(part.casefold(), _Node())
+        node.exclusion = drive.upper() + '\\' + '\\'.join(parts)
+
+    def add_file(self, drive: str, file_name: str, size: int):
+        """加入一个覆盖文件，已被排除的文件只计入 excluded_bytes"""
+        drive = drive.upper()
+        keys = [part.casefold() for part in file_name.split('\\') if part]  # 覆盖文件路径已是规范形式
+        excluded = self._exclusions.get(drive)
+        if excluded is not None:
+            for key in [None] + keys:
+                if key is not None:
+                    excluded = excluded.children.get(key)
+                    if excluded is None: break
+                if excluded.exclusion is not None:
+                    self.excluded_bytes += size
+                    return
+        node = self._files.setdefault(drive, _Node())
+        node.bytes += size
+        node.files += 1
+        for key in keys:
+            child = node.children.get(key)
+            if child is None: child = node.children[key] = _Node()
+            child.bytes += size
+            child.files += 1
+            node = child
+
+    def load_exclusions(self, drive: str) -> bool:
+        """读取卷的排除项（下次启动）加入索引"""
+        from .services.volume import UWFVolume
+
+        success, exclusions = UWFVolume.get_exclusions(drive=drive)
+        for exclusion in exclusions if success else ():
+            self.add_exclusion(drive, exclusion.FileName)
+        return success
+
+    def load_overlay_files(self, drive: str) -> bool:
+        """读取卷的覆盖文件加入索引（应在加入排除项之后调用）"""
+        from .services.utils import format_com_error, get_overlay_instance
+
+        overlay = get_overlay_instance()
+        if overlay is None: return False
+        try:
+            files = overlay.execute_method('GetOverlayFiles', Volume=drive).OverlayFiles or ()
+        except pywintypes.com_error as e:
+            print(f'[!] 获取 {drive} 的覆盖文件失败: {format_com_error(e=e)}')
+            return False
+        for overlay_file in files:
+            self.add_file(drive, overlay_file.FileName, int(overlay_file.FileSize or 0))
+        return True
+
+    @classmethod
+    def from_volumes(cls, drives: Iterable[str]) -> 'ExclusionSimulator':
+        """
+        读取各卷的排除项与覆盖文件建立索引
+        :param drives: 盘符列表，例如 ["C:", "D:"]
+        """
+        simulator = cls()
+        drives = [drive.upper() for drive in drives]
+        for drive in drives:
+            simulator.load_exclusions(drive)
+        for drive in drives:
+            simulator.load_overlay_files(drive)
+        return simulator
+
+    @classmethod
+    def from_exclusions(cls, exclusions: Iterable[str], drives: Iterable[str]) -> 'ExclusionSimulator':
+        """
+        使用已加载的排除项建立索引，只读取指定卷的覆盖文件
+        :param exclusions: 排除项完整路径，例如 ["C:\\Data"]
+        :param drives: 需要读取覆盖文件的卷（当前会话受保护的卷）
+        """
+        from .paths import canonicalize
+
+        simulator = cls()
+        for exclusion in exclusions:
+            path = canonicalize(exclusion)
+            simulator.add_exclusion(path.drive, path.file_name)
+        for drive in drives:
+            simulator.load_overlay_files(drive.upper())
+        return simulator
+
+    def _covered_by(self, drive: str, keys: list[str]) -> Optional[str]:
+        node = self._exclusions.get(drive)
+        if node is None: return None
+        if node.exclusion is not None: return node.exclusion
+        for key in keys:
+            node = node.children.get(key)
+            if node is None: return None
+            if node.exclusion is not None: return node.exclusion
+        return None
+
+    def _covers(self, drive: str, keys: list[str]) -> list[str]:
+        node = self._exclusions.get(drive)
+        for key in keys:
+            if node is None: return []
+            node = node.children.get(key)
+        if node is None: return []
+        found, stack = [], list(node.children.values())
+        while stack:
+            child = stack.pop()
+            if child.exclusion is not None: found.append(child.exclusion)
+            stack.extend(child.children.values())
+        return sorted(found)
+
+    def simulate(self, paths: Iterable[str]) -> list[ExclusionImpact]:
+        """
+        预估候选排除项的效果
+        :param paths: 完整路径列表，例如 ["C:\\Data", "D:/Logs"]
+        :return: 与输入顺序一致的结果
+        """
+        candidates = []
+        for path in paths:
+            drive, parts = split_path(path)
+            candidates.append((drive, parts, [part.casefold() for part in parts]))
+
+        results = []
+        for index, (drive, parts, keys) in enumerate(candidates):
+            impact = ExclusionImpact(path=drive + '\\' + '\\'.join(parts))
+            impact.covered_by = self._covered_by(drive, keys)
+            for other_index, (other_drive, other_parts, other_keys) in enumerate(candidates):
+                # 另一个候选项是该路径或其上级目录，相同路径时只标记后出现的一个
+                if other_index == index or other_drive != drive or keys[:len(other_keys)] != other_keys: continue
+                if len(other_keys) < len(keys) or other_index < index:
+                    impact.duplicate_of = other_drive + '\\' + '\\'.join(other_parts)
+                    break
+            if not impact.covered_by: impact.covers = self._covers(drive, keys)
+            node = self._files.get(drive)
+            for key in keys:
+                if node is None: break
+                node = node.children.get(key)
+            if node is not None: impact.bytes, impact.files = node.bytes, node.files
+            results.append(impact)
+        return results
@@ -0,0 +1,233 @@
+"""
+UWF 变更审计日志
+
+每个修改 UWF 状态的服务调用（启用/停用、卷保护、排除项、提交、覆盖层配置）都会记录一条 JSON Lines 日志：
+    {"ts":"2025-01-01T08:00:00.123+08:00","op":"UWFVolume.protect","params":{"drive":"D:"},"result":true,"hresult":null,"ms":12.3}
+调用方只把记录放入队列，由后台线程批量写入数据目录下的 journal/journal.jsonl，文件超过 max_bytes 时轮转为
+journal.1.jsonl ... journal.N.jsonl。设置环境变量 FREEZELOCK_JOURNAL=0 可以关闭记录。
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
+
+from .storage import get_data_dir
+
+JOURNAL_ENV = 'FREEZELOCK_JOURNAL'
+JOURNAL_DIR = 'journal'
+JOURNAL_NAME = 'journal'
+MAX_BYTES = 1024 * 1024
+BACKUPS = 5
+FLUSH_INTERVAL = 1.0  # 秒
+
+_lock = threading.Lock()
+_journal: Optional['Journal'] = None
+
+
+class Journal:
+    """
+    按大小轮转的追加写日志，record() 不阻塞调用方
+    :param directory: 日志目录
+    :param max_bytes: 单个文件的最大字节数
+    :param backups: 保留的轮转文件数量
+    :param flush_interval: 后台线程等待新记录的最长秒数
+    """
+    def __init__(self, directory: str, max_bytes: int = MAX_BYTES, backups: int = BACKUPS, flush_interval: float = FLUSH_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer, name='JournalWriter', daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return journal_path(self.directory, 0)
+
+    def record(self, entry: dict):
+        """添加一条记录"""
+        if self._closed: return
+        with self._flushed:
+            self._pending += 1
+        self._queue.put(entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已添加的记录全部写入
+        :return: 是否在超时前写入完成
+        """
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self):
+        """写入剩余记录并停止后台线程"""
+        if self._closed: return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _writer(self):
+        file, size = None, 0
+        failing = False  # 连续失败时只提示一次
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [entry for entry in batch if entry is not None]
+            try:
+                for entry in batch:
+                    line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=repr) + '\n'
+                    if file is None:  # 首次写入或上次打开失败时重新打开
+                        os.makedirs(self.directory, exist_ok=True)
+                        file = open(self.path, 'a', encoding='utf-8')
+                        size = file.tell()
+                    if size and size + len(line.encode('utf-8')) > self.max_bytes:
+                        file.close()
+                        file = None
+                        self._rotate()
+                        file = open(self.path, 'a', encoding='utf-8')
+                        size = 0
+                    file.write(line)
+                    size += len(line.encode('utf-8'))
+                if file is not None: file.flush()
+                failing = False
+            except (OSError, ValueError) as e:
+                if not failing: print(f'[!] 写入审计日志失败，部分记录未写入: {e}')
+                failing = True
+            finally:
+                # 写入失败的记录同样出队，flush() 不会因此一直等待
+                with self._flushed:
+                    self._pending -= len(batch)
+                    self._flushed.notify_all()
+        if file is not None: file.close()
+
+    def _rotate(self):
+        for index in range(self.backups, 0, -1):
+            source = journal_path(self.directory, index - 1)
+            if os.path.exists(source): os.replace(source, journal_path(self.directory, index))
+
+
+def journal_path(directory: str, index: int) -> str:
+    """第 index 个日志文件的路径，0 为当前文件"""
+    return os.path.join(directory, f'{JOURNAL_NAME}.jsonl' if index == 0 else f'{JOURNAL_NAME}.{index}.jsonl')
+
+
+def get_journal() -> Optional[Journal]:
+    """获取全局审计日志（首次调用时创建），已关闭记录时返回 None"""
+    global _journal
+    if os.environ.get(JOURNAL_ENV) == '0': return None
+    if _journal is None:
+        with _lock:
+            if _journal is None:
+                _journal = Journal(directory=os.path.join(get_data_dir(), JOURNAL_DIR))
+                atexit.register(_journal.close)
+    return _journal
+
+
+def _plain(value: Any) -> Any:
+    """转换为可 JSON 序列化的值"""
+    if value is None or isinstance(value, (bool, int, float, str)): return value
+    if isinstance(value, (list, tuple)): return [_plain(item) for item in value]
+    if isinstance(value, dict): return {str(k): _plain(v) for k, v in value.items()}
+    return repr(value)
+
+
+def audited(func: Callable) -> Callable:
+    """
+    记录被装饰的服务调用：参数、结果、耗时以及调用期间 format_com_error 捕获的 HRESULT
+    结果不是 bool 时记录其 success 属性（例如 CommitTreeResult）
+    """
+    from .services.utils import pop_last_hresult
+
+    op = func.__qualname__
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        journal = get_journal()
+        if journal is None: return func(*args, **kwargs)
+        pop_last_hresult()
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            try:
+                bound = signature.bind_partial(*args, **kwargs).arguments
+            except TypeError:
+                bound = {'args': args, 'kwargs': kwargs}
+            entry = {
+                'ts': datetime.now().astimezone().isoformat(timespec='milliseconds'),
+                'op': op,
+                'params': {k: _plain(v) for k, v in bound.items() if not callable(v) and not isinstance(v, threading.Event)},
+                'result': _plain(result if isinstance(result, bool) or result is None else getattr(result, 'success', result)),
+                'hresult': pop_last_hresult(),
+                'ms': round(elapsed, 3),
+            }
+            if error: entry['error'] = error
+            journal.record(entry)
+    return wrapper
+
+
+def read_journal(
+    directory: Optional[str] = None, op: Optional[str] = None, since: Optional[datetime] = None,
+    until: Optional[datetime] = None, failed_only: bool = False,
+) -> Iterator[dict]:
+    """
+    按时间顺序逐条读取审计日志（包括轮转文件）
+    :param directory: 日志目录，默认为数据目录下的 journal
+    :param op: 只返回操作名包含该字符串的记录，例如 "UWFVolume" 或 "protect"
+    :param since: 只返回该时间（含）之后的记录，需带时区
+    :param until: 只返回该时间之前的记录，需带时区
+    :param failed_only: 只返回失败的记录
+    """
+    directory = directory or os.path.join(get_data_dir(), JOURNAL_DIR)
+    if not os.path.isdir(directory): return
+    indexes = []
+    for name in os.listdir(directory):
+        parts = name.split('.')
+        if parts[0] != JOURNAL_NAME or parts[-1] != 'jsonl': continue
+        if len(parts) == 2: indexes.append(0)
+        elif len(parts) == 3 and parts[1].isdigit(): indexes.append(int(parts[1]))
+    for index in sorted(indexes, reverse=True):
+        try:
+            with open(journal_path(directory, index), encoding='utf-8') as f:
+                for line in f:
+                    if op is not None and op not in line: continue  # 解析前按文本快速过滤
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 写入中断留下的不完整行
+                    if op is not None and op not in entry.get('op', ''): continue
+                    if failed_only and entry.get('result') is True: continue
+                    if since is not None or until is not None:
+                        ts = datetime.fromisoformat(entry['ts'])
+                        if since is not None and ts < since: continue
+                        if until is not None and ts >= until: continue
+                    yield entry
+        except FileNotFoundError:
+            continue  # 读取期间发生了轮转
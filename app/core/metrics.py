@@ -0,0 +1,229 @@
+"""
+指标导出
+
+后台线程按固定间隔采集一次 UWF 状态快照并生成 Prometheus 文本格式，通过仅监听回环地址的 HTTP 端点（/metrics）
+提供，或写入 node_exporter textfile collector 目录下的文件。抓取只返回缓存的快照，不会触发 WMI 调用。
+
+通过环境变量开启：
+    FREEZELOCK_METRICS=127.0.0.1:9477          HTTP 端点（只允许回环地址）
+    FREEZELOCK_METRICS_FILE=C:\\metrics\\freezelock.prom   textfile 文件
+    FREEZELOCK_METRICS_INTERVAL=30             采集间隔（秒）
+
+WMI 调用的耗时与错误数由 wmi_stats.record_call() 在服务层调用处累计，随快照一起导出。
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+from .wmi_stats import call_stats
+
+METRICS_ENV = 'FREEZELOCK_METRICS'
+METRICS_FILE_ENV = 'FREEZELOCK_METRICS_FILE'
+METRICS_INTERVAL_ENV = 'FREEZELOCK_METRICS_INTERVAL'
+DEFAULT_INTERVAL = 30.0
+LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _format_value(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Builder:
+    """按指标分组输出 Prometheus 文本格式"""
+    def __init__(self):
+        self._lines: list[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples: list[tuple[dict, float]]):
+        if not samples: return
+        self._lines.append(f'# HELP {name} {help_text}')
+        self._lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            self._lines.append(f'{name}{{{label_text}}} {_format_value(value)}' if label_text else f'{name} {_format_value(value)}')
+
+    def text(self) -> str:
+        return '\n'.join(self._lines) + '\n'
+
+
+def collect_snapshot() -> dict:
+    """
+    查询一次 UWF 状态（在已初始化 COM 的线程中调用）
+    :return: 快照字典，未安装 UWF 时只包含 installed
+    """
+    from .object import WMIObject
+    from .services import is_uwf_installed
+    from .services.overlay import overlay_status
+    from .services.overlay_config import get_type
+    from .services.query import Query
+    from .services.utils import get_filter_instance, get_overlay_config_instance, stream_query
+
+    if not is_uwf_installed(): return {'installed': False}
+    snapshot = {'installed': True}
+    uwf_filter = get_filter_instance()
+    if uwf_filter is not None:
+        snapshot['filter'] = {'current': bool(uwf_filter['CurrentEnabled']), 'next': bool(uwf_filter['NextEnabled'])}
+    snapshot['volumes'] = [
+        volume for volume in stream_query(Query('UWF_Volume').select('Protected'), convert=WMIObject.as_dict)
+        if volume.get('DriveLetter')
+    ]
+    snapshot['overlay'] = overlay_status()
+    snapshot['type'] = get_type()
+    snapshot['maximum_size'] = {}
+    for session, current_session in (('current', True), ('next', False)):
+        instance = get_overlay_config_instance(current_session=current_session, columns=('MaximumSize',))
+        if instance is not None: snapshot['maximum_size'][session] = instance['MaximumSize'] or 0
+    return snapshot
+
+
+def render(snapshot: dict, duration: float, timestamp: float) -> str:
+    """把快照和 WMI 调用统计转换为 Prometheus 文本格式"""
+    builder = _Builder()
+    builder.metric('freezelock_uwf_installed', 'gauge', 'Whether the UWF feature is installed.', [({}, snapshot.get('installed', False))])
+    uwf_filter = snapshot.get('filter')
+    if uwf_filter:
+        builder.metric('freezelock_filter_enabled', 'gauge', 'Whether the UWF filter is enabled in the session.', [
+            ({'session': 'current'}, uwf_filter['current']), ({'session': 'next'}, uwf_filter['next']),
+        ])
+    builder.metric('freezelock_volume_protected', 'gauge', 'Whether the volume is protected in the session.', [
+        ({'drive': volume['DriveLetter'], 'session': 'current' if volume['CurrentSession'] else 'next'}, bool(volume.get('Protected')))
+        for volume in snapshot.get('volumes', [])
+    ])
+    overlay = snapshot.get('overlay') or {}
+    for key, name, help_text in (
+        ('OverlayConsumption', 'freezelock_overlay_consumption_megabytes', 'Overlay space in use.'),
+        ('AvailableSpace', 'freezelock_overlay_available_megabytes', 'Overlay space still available.'),
+        ('WarningOverlayThreshold', 'freezelock_overlay_warning_threshold_megabytes', 'Overlay warning threshold.'),
+        ('CriticalOverlayThreshold', 'freezelock_overlay_critical_threshold_megabytes', 'Overlay critical threshold.'),
+    ):
+        if key in overlay: builder.metric(name, 'gauge', help_text, [({}, overlay[key])])
+    if snapshot.get('type'):
+        builder.metric('freezelock_overlay_type', 'gauge', 'Overlay type for the next session.', [({'type': snapshot['type']}, 1)])
+    builder.metric('freezelock_overlay_maximum_size_megabytes', 'gauge', 'Overlay maximum size in the session.', [
+        ({'session': session}, size) for session, size in snapshot.get('maximum_size', {}).items()
+    ])
+
+    calls = sorted(call_stats().items())
+    builder.metric('freezelock_wmi_calls_total', 'counter', 'WMI calls made by FreezeLock.', [({'call': name}, stats[0]) for name, stats in calls])
+    builder.metric('freezelock_wmi_call_seconds_total', 'counter', 'Total time spent in WMI calls.', [({'call': name}, stats[1]) for name, stats in calls])
+    builder.metric('freezelock_wmi_call_errors_total', 'counter', 'WMI calls that failed.', [({'call': name}, stats[2]) for name, stats in calls])
+
+    builder.metric('freezelock_snapshot_timestamp_seconds', 'gauge', 'Unix time of the last snapshot.', [({}, timestamp)])
+    builder.metric('freezelock_snapshot_duration_seconds', 'gauge', 'Time taken by the last snapshot.', [({}, duration)])
+    return builder.text()
+
+
+class MetricsExporter:
+    """
+    指标导出器
+    :param address: HTTP 监听地址 (host, port)，只允许回环地址；为 None 时不启动 HTTP 端点
+    :param file_path: textfile 文件路径，为 None 时不写文件
+    :param interval: 采集间隔（秒）
+    """
+    def __init__(self, address: Optional[tuple[str, int]] = None, file_path: Optional[str] = None, interval: float = DEFAULT_INTERVAL):
+        if address is not None and address[0] not in LOOPBACK_HOSTS:
+            raise ValueError(f'指标端点只允许监听回环地址: {address[0]}')
+        self.address = address
+        self.file_path = file_path
+        self.interval = interval
+        self.text = render({}, duration=0.0, timestamp=time.time())
+        self._stop_event = threading.Event()
+        self._server = None  # http.server.ThreadingHTTPServer
+        self._threads: list[threading.Thread] = []
+
+    @classmethod
+    def from_env(cls) -> Optional['MetricsExporter']:
+        """根据环境变量创建导出器，未配置时返回 None"""
+        endpoint = os.environ.get(METRICS_ENV)
+        file_path = os.environ.get(METRICS_FILE_ENV)
+        if not endpoint and not file_path: return None
+        address = None
+        if endpoint:
+            endpoint = endpoint.removeprefix('http://').rstrip('/')
+            host, _, port = endpoint.rpartition(':')
+            address = (host.strip('[]') or '127.0.0.1', int(port))
+        interval = float(os.environ.get(METRICS_INTERVAL_ENV) or DEFAULT_INTERVAL)
+        return cls(address=address, file_path=file_path, interval=interval)
+
+    def refresh(self):
+        """采集快照并更新导出内容（在已初始化 COM 的线程中调用）"""
+        start = time.perf_counter()
+        try:
+            snapshot = collect_snapshot()
+        except Exception as e:
+            print(f'[!] 采集指标失败: {e}')
+            snapshot = {}
+        self.text = render(snapshot, duration=time.perf_counter() - start, timestamp=time.time())
+        if self.file_path: self._write_file()
+
+    def _write_file(self):
+        temp_path = f'{self.file_path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(self.text)
+            os.replace(temp_path, self.file_path)  # collector 不会读到写了一半的文件
+        except OSError as e:
+            print(f'[!] 写入指标文件失败: {e}')
+
+    def _collect_loop(self):
+        from .com import com_thread
+
+        with com_thread():
+            while not self._stop_event.is_set():
+                self.refresh()
+                self._stop_event.wait(self.interval)
+
+    def start(self):
+        """启动采集线程和 HTTP 端点"""
+        if self.address is not None:
+            import http.server  # 只在开启 HTTP 端点时导入，避免增加启动时间
+
+            exporter = self
+
+            class Handler(http.server.BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    body = exporter.text.encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', CONTENT_TYPE)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass  # 不输出每次抓取的访问日志
+
+            server_class = http.server.ThreadingHTTPServer
+            if ':' in self.address[0]:
+                import socket
+
+                server_class = type('ThreadingHTTPServerV6', (http.server.ThreadingHTTPServer,), {'address_family': socket.AF_INET6})
+            self._server = server_class(self.address, Handler)
+            self._server.daemon_threads = True
+            print(f'[+] 指标端点: http://{self.address[0]}:{self._server.server_address[1]}/metrics')
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name='MetricsServer', daemon=True))
+        self._threads.append(threading.Thread(target=self._collect_loop, name='MetricsCollector', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def port(self) -> Optional[int]:
+        """HTTP 端点实际监听的端口（address 端口为 0 时由系统分配）"""
+        return self._server.server_address[1] if self._server is not None else None
+
+    def stop(self):
+        """停止采集和 HTTP 端点"""
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
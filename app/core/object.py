@@ -1,14 +1,22 @@
+import time
 from functools import cached_property
-from typing import Any
+from typing import Any, Callable, Iterator, Optional
 
 from win32com.client import CDispatch
 
+from .wmi_stats import record_call
+from .recording import RecordingDispatch
+
+WBEM_FLAG_RETURN_IMMEDIATELY = 0x10  # 半同步：立即返回，枚举时逐个获取
+WBEM_FLAG_FORWARD_ONLY = 0x20  # 只能向前枚举一次，已枚举的对象不在 WMI 端缓存
+STREAM_FLAGS = WBEM_FLAG_RETURN_IMMEDIATELY | WBEM_FLAG_FORWARD_ONLY
+
 
 class WMIObject:
     """
     Base class for WMI objects.
     """
-    def __init__(self, wmi_object: CDispatch):
+    def __init__(self, wmi_object: CDispatch or RecordingDispatch):
         self._wmi_object = wmi_object
 
     def __getattr__(self, name: str):
@@ -34,7 +42,28 @@ class WMIObject:
         """支持迭代 WMI 对象的属性"""
         for obj in self._wmi_object:
             # 如果是 WMI 对象，则包装为 WMIObject, 否则直接返回原对象
-            yield WMIObject(obj) if isinstance(obj, CDispatch) else obj
+            yield WMIObject(obj) if isinstance(obj, (CDispatch, RecordingDispatch)) else obj
+
+    def stream(self, convert: Optional[Callable[['WMIObject'], Any]] = None, batch_size: Optional[int] = None) -> Iterator:
+        """
+        逐个转换并产出对象集合中的对象，不保留已产出对象的引用。
+        对象集合应以 STREAM_FLAGS 查询得到，此时只能枚举一次。
+        :param convert: 转换函数，例如 WMIObject.as_dict，默认产出 WMIObject
+        :param batch_size: 按批产出，每批为最多 batch_size 个记录的列表
+        """
+        if batch_size is not None and batch_size < 1: raise ValueError('batch_size 必须大于 0')
+        batch = []
+        for obj in self._wmi_object:
+            record = WMIObject(obj) if isinstance(obj, (CDispatch, RecordingDispatch)) else obj
+            if convert is not None: record = convert(record)
+            if batch_size is None:
+                yield record
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch: yield batch
 
     def __contains__(self, key: str):
         """支持 'property' in obj 语法检查属性是否存在"""
@@ -71,4 +100,10 @@ class WMIObject:
                     in_obj.Properties_.Item(k).Value = v  # 在参数对象上赋值
                 except Exception as e:
                     raise ValueError(f"Invalid parameter '{k}' for method '{method_name}'") from e
-        return self._wmi_object.ExecMethod_(method_name, in_obj)
+        start, ok = time.perf_counter(), False
+        try:
+            result = self._wmi_object.ExecMethod_(method_name, in_obj)
+            ok = not getattr(result, 'ReturnValue', 0)  # UWF 方法以非零返回值报告失败
+            return result
+        finally:
+            record_call(f'ExecMethod:{method_name}', time.perf_counter() - start, ok)
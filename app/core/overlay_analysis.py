@@ -0,0 +1,158 @@
+"""
+覆盖层占用分析
+
+单次遍历各受保护卷的覆盖文件（UWF_Overlay.GetOverlayFiles），按目录（截取到 depth 层）与扩展名累计大小，
+用堆取出占用最多的 top 项，用于判断应该排除或提交哪些目录。累计表的键数量不超过 max_keys，超过时把最小的一半
+合并为 "<其他>"，内存占用与覆盖文件数量无关。结果可以写入数据目录下的 overlay_report.json。
+"""
+import heapq
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+import pywintypes
+
+from .storage import data_dir_persistent, write_json
+
+REPORT_FILE = 'overlay_report.json'
+DEFAULT_TOP = 10
+DEFAULT_DEPTH = 3
+MAX_KEYS = 20000
+OTHER_KEY = '<其他>'
+NO_EXTENSION = '<无扩展名>'
+
+
+class _Tally:
+    """键数量有上限的 {键: [字节数, 文件数]} 累计表"""
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.values: dict[str, list[int]] = {}
+        self.folded = False
+
+    def add(self, key: str, size: int):
+        entry = self.values.get(key)
+        if entry is None:
+            if len(self.values) >= self.max_keys: self._fold()
+            entry = self.values[key] = [0, 0]
+        entry[0] += size
+        entry[1] += 1
+
+    def _fold(self):
+        """把占用最小的一半合并到 OTHER_KEY"""
+        other = self.values.pop(OTHER_KEY, [0, 0])
+        for key, (size, files) in heapq.nsmallest(len(self.values) // 2, self.values.items(), key=lambda item: item[1][0]):
+            del self.values[key]
+            other[0] += size
+            other[1] += files
+        self.values[OTHER_KEY] = other
+        self.folded = True
+
+    def top(self, count: int) -> list[dict]:
+        return [
+            {'name': key, 'bytes': size, 'files': files}
+            for key, (size, files) in heapq.nlargest(count, self.values.items(), key=lambda item: item[1][0])
+        ]
+
+
+@dataclass
+class OverlayBreakdown:
+    """覆盖层占用分析结果"""
+    volumes: list[str] = field(default_factory=list)
+    total_bytes: int = 0
+    file_count: int = 0
+    top_directories: list[dict] = field(default_factory=list)  # [{"name": "C:\\Users\\Kiosk\\AppData", "bytes": ..., "files": ...}]
+    top_extensions: list[dict] = field(default_factory=list)
+    truncated: bool = False  # 累计表达到 max_keys，较小的项已合并为 "<其他>"
+    failures: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    generated: str = ''
+
+    def to_dict(self) -> dict:
+        return {
+            'generated': self.generated, 'elapsed': round(self.elapsed, 3), 'volumes': self.volumes,
+            'total_bytes': self.total_bytes, 'file_count': self.file_count, 'truncated': self.truncated,
+            'top_directories': self.top_directories, 'top_extensions': self.top_extensions, 'failures': self.failures,
+        }
+
+
+def directory_key(drive: str, file_name: str, depth: int) -> str:
+    """
+    文件所在目录截取到 depth 层，例如 ("C:", "\\Users\\Kiosk\\AppData\\Local\\a.dat", 2) -> "C:\\Users\\Kiosk"
+    """
+    parts = file_name[:file_name.rfind('\\')].split('\\', depth + 1)
+    return drive + '\\' + '\\'.join(part for part in parts[1:depth + 1] if part)
+
+
+def extension_key(file_name: str) -> str:
+    dot = file_name.rfind('.')
+    if dot <= file_name.rfind('\\') + 1: return NO_EXTENSION  # 没有扩展名或以 . 开头的文件名
+    return file_name[dot:].lower()
+
+
+def _protected_drives() -> list[str]:
+    from .services.query import Query
+    from .services.utils import stream_query
+
+    return [
+        volume.DriveLetter
+        for volume in stream_query(Query('UWF_Volume').select('Protected').where(CurrentSession=True))
+        if volume.DriveLetter and volume.Protected
+    ]
+
+
+def analyze_overlay(
+    drives: Optional[Iterable[str]] = None, top: int = DEFAULT_TOP, depth: int = DEFAULT_DEPTH, max_keys: int = MAX_KEYS,
+) -> OverlayBreakdown:
+    """
+    分析覆盖层中的文件
+    :param drives: 要分析的卷，默认为当前会话中所有受保护的卷
+    :param top: 返回占用最多的目录与扩展名的数量
+    :param depth: 目录截取的层数
+    :param max_keys: 每个累计表的最大键数量
+    :return: 分析结果
+    """
+    from .services.utils import format_com_error, get_overlay_instance
+
+    start = time.perf_counter()
+    breakdown = OverlayBreakdown()
+    directories, extensions = _Tally(max_keys), _Tally(max_keys)
+    overlay = get_overlay_instance()
+    if overlay is not None:
+        for drive in (list(drives) if drives is not None else _protected_drives()):
+            try:
+                files = overlay.execute_method('GetOverlayFiles', Volume=drive).OverlayFiles or ()
+            except pywintypes.com_error as e:
+                breakdown.failures.append(f'{drive} {format_com_error(e=e)}')
+                continue
+            breakdown.volumes.append(drive)
+            last_parent, last_key = None, None
+            for overlay_file in files:
+                file_name, size = overlay_file.FileName, int(overlay_file.FileSize or 0)
+                breakdown.total_bytes += size
+                breakdown.file_count += 1
+                parent = file_name[:file_name.rfind('\\') + 1]
+                if parent != last_parent:  # 同一目录下的文件通常连续出现
+                    last_parent, last_key = parent, directory_key(drive, file_name, depth)
+                directories.add(last_key, size)
+                extensions.add(extension_key(file_name), size)
+    breakdown.top_directories = directories.top(top)
+    breakdown.top_extensions = extensions.top(top)
+    breakdown.truncated = directories.folded or extensions.folded
+    breakdown.elapsed = time.perf_counter() - start
+    breakdown.generated = datetime.now().astimezone().isoformat(timespec='seconds')
+    return breakdown
+
+
+def write_report(breakdown: OverlayBreakdown) -> bool:
+    """
+    把分析结果写入数据目录下的 overlay_report.json
+    :param breakdown: 分析结果
+    :return: 是否写入成功（数据目录的写入无法在重启后保留时不写入并返回 False）
+    """
+    try:
+        if not data_dir_persistent(): return False  # 不为了报告而修改 UWF 排除项
+    except Exception as e:
+        print(f'[!] 检查数据目录排除项失败: {e}')
+        return False
+    return write_json(REPORT_FILE, breakdown.to_dict())
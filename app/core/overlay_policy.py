@@ -0,0 +1,181 @@
+"""
+覆盖层压力策略
+
+周期性读取覆盖层使用量，与 UWF 的警告/临界阈值比较得出压力等级。等级上升时立即切换并执行对应动作，
+下降时需要低于阈值 hysteresis MB 才会切换，避免在阈值附近反复触发。
+
+策略保存在数据目录的 overlay_policy.json 中：
+    {"hysteresis": 64, "interval": 30,
+     "warning": [{"type": "commit", "paths": ["C:\\\\ProgramData\\\\Kiosk"], "pattern": "*"}],
+     "critical": [{"type": "restart", "window": "02:00-05:00", "idle_minutes": 10},
+                  {"type": "hook", "command": ["C:\\\\Tools\\\\notify.exe"], "timeout": 60}]}
+
+动作类型：
+    commit  提交指定路径下的覆盖文件
+    restart 在下一个空闲时间窗内重启（window 为时间窗，idle_minutes 为用户无操作的分钟数）；压力解除后取消
+    hook    执行外部命令（参数列表，不经过 shell），环境变量 FREEZELOCK_OVERLAY_LEVEL / FREEZELOCK_OVERLAY_CONSUMPTION 传递当前状态
+"""
+import os
+import subprocess
+import threading
+from typing import Callable, Optional
+
+from .scheduler import Clock, TimeWindow, run_commit
+from .storage import read_config
+
+POLICY_FILE = 'overlay_policy.json'
+
+LEVEL_NORMAL = 'normal'
+LEVEL_WARNING = 'warning'
+LEVEL_CRITICAL = 'critical'
+LEVELS = [LEVEL_NORMAL, LEVEL_WARNING, LEVEL_CRITICAL]
+
+
+def user_idle_seconds() -> float:
+    """当前会话中用户无键盘鼠标输入的秒数"""
+    import win32api
+
+    return max(0, win32api.GetTickCount() - win32api.GetLastInputInfo()) / 1000
+
+
+def run_hook(params: dict, level: str, status: dict) -> bool:
+    """执行外部命令，command 必须是参数列表"""
+    command = params.get('command')
+    if not isinstance(command, list) or not command or not all(isinstance(arg, str) for arg in command):
+        print(f'[!] 钩子命令必须是非空的参数列表: {command!r}')
+        return False
+    env = dict(
+        os.environ,
+        FREEZELOCK_OVERLAY_LEVEL=level,
+        FREEZELOCK_OVERLAY_CONSUMPTION=str(status.get('OverlayConsumption', 0)),
+    )
+    try:
+        result = subprocess.run(
+            command, env=env, capture_output=True, text=True,
+            timeout=params.get('timeout', 60),
+        )
+        return result.returncode == 0
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f'[!] 执行钩子命令失败: {e}')
+        return False
+
+
+class OverlayPolicy:
+    """
+    覆盖层压力策略
+    :param config: 策略配置，格式见模块说明
+    :param clock: 时间来源
+    :param idle_seconds: 返回用户空闲秒数的函数
+    :param restart: 执行重启的函数，默认 UWFFilter.restart_system
+    """
+    def __init__(
+        self, config: dict, clock: Optional[Clock] = None,
+        idle_seconds: Callable[[], float] = user_idle_seconds,
+        restart: Optional[Callable[[], bool]] = None,
+    ):
+        self.config = config
+        self.hysteresis = config.get('hysteresis', 64)
+        self.interval = config.get('interval', 30)
+        self.clock = clock or Clock()
+        self.idle_seconds = idle_seconds
+        self._restart = restart
+        self.level = LEVEL_NORMAL
+        self.pending_restart: Optional[dict] = None
+
+    @classmethod
+    def load(cls, **kwargs) -> Optional['OverlayPolicy']:
+        """
+        从数据目录加载策略
+        :return: 没有配置任何动作时返回 None
+        """
+        config = read_config(POLICY_FILE, default=None)
+        if not config or not any(config.get(level) for level in LEVELS[1:]): return None
+        return cls(config=config, **kwargs)
+
+    def classify(self, status: dict) -> str:
+        """根据使用量和阈值计算压力等级（带滞回）"""
+        consumption = status.get('OverlayConsumption', 0)
+        warning = status.get('WarningOverlayThreshold', 0)
+        critical = status.get('CriticalOverlayThreshold', 0)
+        if critical and consumption >= critical: raw = LEVEL_CRITICAL
+        elif warning and consumption >= warning: raw = LEVEL_WARNING
+        else: raw = LEVEL_NORMAL
+
+        level = self.level
+        if level == LEVEL_CRITICAL and consumption < critical - self.hysteresis: level = LEVEL_WARNING
+        if level == LEVEL_WARNING and consumption < warning - self.hysteresis: level = LEVEL_NORMAL
+        return max(raw, level, key=LEVELS.index)
+
+    def evaluate(self, status: dict) -> list[tuple[str, bool]]:
+        """
+        根据覆盖层状态更新压力等级并执行动作
+        :param status: overlay_status() 的返回值
+        :return: 本次执行的动作 [(动作类型, 是否成功)]
+        """
+        executed = []
+        previous, level = self.level, self.classify(status)
+        self.level = level
+        if level != previous:
+            print(f'[*] 覆盖层压力等级: {previous} -> {level} ({status.get("OverlayConsumption", 0)} MB)')
+        if level == LEVEL_NORMAL and self.pending_restart is not None:
+            print('[*] 覆盖层压力已解除，取消待执行的重启')
+            self.pending_restart = None
+
+        # 逐级触发越过的每个等级的动作
+        for crossed in LEVELS[LEVELS.index(previous) + 1:LEVELS.index(level) + 1]:
+            for action in self.config.get(crossed, []):
+                executed.append((action.get('type'), self._run_action(action, crossed, status)))
+
+        if self.pending_restart is not None and self._restart_allowed(self.pending_restart):
+            self.pending_restart = None
+            executed.append(('restart', self._do_restart()))
+        return executed
+
+    def _run_action(self, action: dict, level: str, status: dict) -> bool:
+        kind = action.get('type')
+        print(f'[+] 覆盖层压力 {level}: 执行 {kind}')
+        try:
+            if kind == 'commit': return run_commit(action)
+            if kind == 'hook': return run_hook(action, level=level, status=status)
+            if kind == 'restart':
+                self.pending_restart = action  # 等待空闲时间窗
+                return True
+        except Exception as e:
+            print(f'[!] 执行覆盖层压力动作 {kind} 失败: {e}')
+            return False
+        print(f'[!] 未知的覆盖层压力动作: {kind}')
+        return False
+
+    def _restart_allowed(self, action: dict) -> bool:
+        window = action.get('window')
+        if window and not TimeWindow(window).contains(self.clock.now()): return False
+        idle_minutes = action.get('idle_minutes')
+        if idle_minutes:
+            try:
+                if self.idle_seconds() < idle_minutes * 60: return False
+            except Exception as e:
+                print(f'[!] 获取用户空闲时间失败: {e}')
+                return False
+        return True
+
+    def _do_restart(self) -> bool:
+        if self._restart is not None: return self._restart()
+        from .services.filter import UWFFilter
+        print('[+] 覆盖层压力过高，重启系统...')
+        return UWFFilter.restart_system()
+
+    def run(self, stop_event: threading.Event, on_level_changed: Optional[Callable[[str], None]] = None):
+        """
+        按 interval 轮询覆盖层状态，直到 stop_event 被设置
+        """
+        from .services.overlay import overlay_status
+        from .sizing import record_consumption
+
+        while not stop_event.is_set():
+            status = overlay_status()
+            if status:
+                record_consumption(status.get('OverlayConsumption', 0))
+                previous = self.level
+                self.evaluate(status)
+                if on_level_changed and self.level != previous: on_level_changed(self.level)
+            if self.clock.wait(self.interval, stop_event): break
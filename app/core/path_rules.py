@@ -0,0 +1,149 @@
+"""
+受保护路径规则
+
+把拒绝/允许规则编译为按路径组件划分、大小写不敏感的前缀树，同一路径命中多条规则时以最长匹配为准。
+规则中的环境变量（系统盘符、当前用户名）只在编译时解析一次。
+"""
+import ntpath
+from dataclasses import dataclass
+from getpass import getuser
+from typing import Iterable, Optional
+
+from .paths import CanonicalPath, canonicalize, canonicalize_many
+
+ANY_VOLUME = '*'
+SYSTEM_VOLUME = '{system}'
+
+
+@dataclass(frozen=True)
+class PathRule:
+    """
+    路径规则
+    :param path: 卷内路径，例如 "\\Windows"，可包含 {user} 占位符
+    :param allow: True 为允许规则，False 为拒绝规则
+    :param reason: 拒绝原因
+    :param volume: 生效的卷，ANY_VOLUME 为所有卷，SYSTEM_VOLUME 为系统盘
+    :param recursive: 是否同时作用于子路径
+    """
+    path: str
+    allow: bool = False
+    reason: str = ''
+    volume: str = ANY_VOLUME
+    recursive: bool = True
+
+
+@dataclass(frozen=True)
+class PathCheck:
+    """单个路径的校验结果"""
+    path: str  # 原始路径
+    drive: str  # 盘符，例如 "C:"
+    file_name: str  # 规范化后的卷内路径，例如 "\\Data\\App"
+    allowed: bool
+    reason: str = ''
+    rule: Optional[PathRule] = None
+
+
+DEFAULT_RULES = (
+    PathRule(path='\\', reason='无法添加卷根目录作为排除项', recursive=False),
+    PathRule(path=r'\Windows', reason='无法排除 Windows 系统目录', volume=SYSTEM_VOLUME),
+    PathRule(path=r'\EFI\Microsoft\Boot\BOOTSTAT.DAT', reason='无法排除启动状态文件', volume=SYSTEM_VOLUME),
+    PathRule(path=r'\Boot\BOOTSTAT.DAT', reason='无法排除启动状态文件', volume=SYSTEM_VOLUME),
+    PathRule(path=r'\Users\{user}\NTUSER.DAT', reason='无法排除当前用户的注册表文件', volume=SYSTEM_VOLUME),
+)
+
+
+def split_path(path: str) -> tuple[str, list[str]]:
+    """
+    把路径拆分为盘符和规范化后的路径组件
+    :param path: 例如 "C:/Users/Public/" 或 "\\Data\\..\\App"
+    :return: ("C:", ["Users", "Public"])
+    """
+    drive, tail = ntpath.splitdrive(path.replace('/', '\\'))
+    parts = []
+    for part in tail.split('\\'):
+        if part in ('', '.'): continue
+        if part == '..':
+            if parts: parts.pop()
+            continue
+        parts.append(part)
+    return drive.upper(), parts
+
+
+class _Node:
+    __slots__ = ('children', 'rule')
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.rule: Optional[PathRule] = None
+
+
+class PathRuleEngine:
+    """
+    编译后的路径规则
+    :param rules: 规则列表，同一路径上的重复规则以后定义的为准
+    :param system_volume: 系统盘符，默认通过 get_system_volume() 获取
+    :param user: 当前用户名，默认通过 getuser() 获取
+    """
+    def __init__(self, rules: Iterable[PathRule] = DEFAULT_RULES, system_volume: Optional[str] = None, user: Optional[str] = None):
+        if system_volume is None:
+            from .services.utils import get_system_volume
+            system_volume = get_system_volume()
+        self.system_volume = system_volume.upper()
+        self.user = user if user is not None else getuser()
+        self._roots: dict[str, _Node] = {}
+        for rule in rules:
+            self._insert(rule)
+
+    def _insert(self, rule: PathRule):
+        volume = self.system_volume if rule.volume == SYSTEM_VOLUME else rule.volume.upper()
+        _, parts = split_path(rule.path.replace('{user}', self.user))
+        node = self._roots.setdefault(volume, _Node())
+        for part in parts:
+            node = node.children.setdefault(part.casefold(), _Node())
+        node.rule = rule
+
+    def _match(self, volume: str, keys: list[str]) -> tuple[int, Optional[PathRule]]:
+        """返回 (匹配深度, 规则)，未命中时深度为 -1"""
+        node = self._roots.get(volume)
+        if node is None: return -1, None
+        best = (0, node.rule) if node.rule and (node.rule.recursive or not keys) else (-1, None)
+        for depth, key in enumerate(keys, start=1):
+            node = node.children.get(key)
+            if node is None: break
+            if node.rule and (node.rule.recursive or depth == len(keys)):
+                best = (depth, node.rule)
+        return best
+
+    def check(self, path: str) -> PathCheck:
+        return self._check(path, canonicalize(path))
+
+    def _check(self, path: str, canonical: CanonicalPath) -> PathCheck:
+        drive, parts = split_path(canonical.path)
+        keys = [part.casefold() for part in parts]
+        # 最长匹配优先；深度相同时指定卷的规则优先于所有卷的规则
+        specific, generic = self._match(drive, keys), self._match(ANY_VOLUME, keys)
+        _, rule = specific if specific[0] >= generic[0] else generic
+        file_name = '\\' + '\\'.join(parts)
+        if rule is None or rule.allow:
+            return PathCheck(path=path, drive=drive, file_name=file_name, allowed=True, rule=rule)
+        return PathCheck(path=path, drive=drive, file_name=file_name, allowed=False, reason=rule.reason or '路径受保护', rule=rule)
+
+    def validate(self, paths: Iterable[str]) -> list[PathCheck]:
+        """
+        批量校验候选排除项
+        :param paths: 完整路径列表，例如 ["C:\\Data", "D:/Logs"]
+        :return: 与输入顺序一致的校验结果，被拒绝的项包含原因
+        """
+        paths = list(paths)
+        return [self._check(path, canonical) for path, canonical in zip(paths, canonicalize_many(paths))]
+
+
+_default_engine: Optional[PathRuleEngine] = None
+
+
+def get_path_rules() -> PathRuleEngine:
+    """获取使用默认规则编译的规则引擎（首次调用时编译）"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = PathRuleEngine()
+    return _default_engine
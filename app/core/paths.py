@@ -0,0 +1,150 @@
+"""
+路径规范化
+
+把同一路径的不同写法（大小写、正反斜杠、末尾分隔符、\\\\?\\ 长路径前缀、8.3 短文件名）统一为相同的
+盘符 + 卷内路径。在 Windows 上已存在的路径组件替换为文件系统中的实际写法（同时展开 8.3 短文件名），因此同一
+路径的不同写法得到相同的 file_name；不存在的组件保留调用方的写法，只有 key 大小写无关。目录联接与符号链接
+不会被跟随，结果始终指向调用方给出的路径本身。
+
+结果按原始写法缓存在有界 LRU 中。只缓存所有组件都已存在的结果（不存在的路径之后可能以其他写法创建）；
+已缓存的路径在进程运行期间被重命名时缓存不会失效，可以调用 clear_cache() 清空。
+"""
+import ntpath
+import sys
+import threading
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
+
+LONG_PATH_PREFIX = '\\\\?\\'
+LONG_UNC_PREFIX = '\\\\?\\UNC\\'
+
+
+class CanonicalPath(NamedTuple):
+    drive: str  # 盘符，例如 "C:"
+    file_name: str  # 卷内路径，例如 "\\Program Files\\App"，卷根目录为 "\\"
+    key: str  # 大小写无关的比较键
+
+    @property
+    def path(self) -> str:
+        return self.drive + self.file_name
+
+
+def _strip_prefix(path: str) -> str:
+    if path.upper().startswith(LONG_UNC_PREFIX):
+        return '\\\\' + path[len(LONG_UNC_PREFIX):]
+    if path.startswith(LONG_PATH_PREFIX):
+        return path[len(LONG_PATH_PREFIX):]
+    return path
+
+
+def _resolve(path: str) -> tuple[str, bool]:
+    """
+    在 Windows 上逐级把已存在的路径组件替换为目录项中的实际写法（FindFirstFile 返回的长文件名）。
+    只读取目录项本身，不跟随目录联接和符号链接。
+    :return: (路径, 是否所有组件都存在)
+    """
+    if sys.platform != 'win32': return path, True
+    drive, tail = ntpath.splitdrive(path)
+    if not drive: return path, False
+    import win32api
+
+    parts = [part for part in tail.split('\\') if part]
+    resolved = drive
+    for index, part in enumerate(parts):
+        found = []
+        if not any(char in part for char in '*?'):  # 通配符会被 FindFirstFile 当作模式匹配
+            try:
+                found = win32api.FindFiles(resolved + '\\' + part)
+            except Exception:
+                found = []
+        if len(found) != 1: return '\\'.join([resolved] + parts[index:]), False
+        resolved += '\\' + found[0][8]  # WIN32_FIND_DATA.cFileName
+    return resolved, True
+
+
+def _canonicalize(path: str, resolve: bool) -> tuple[CanonicalPath, bool]:
+    """:return: (规范化结果, 是否可以缓存)"""
+    path = ntpath.normpath(_strip_prefix(path.strip().replace('/', '\\')))
+    complete = True
+    if resolve: path, complete = _resolve(path)
+    drive, tail = ntpath.splitdrive(path)
+    drive = drive.upper()
+    file_name = '\\' + tail.strip('\\')
+    return CanonicalPath(drive=drive, file_name=file_name, key=(drive + file_name).casefold()), complete
+
+
+class PathCanonicalizer:
+    """
+    带缓存的路径规范化
+    :param maxsize: 缓存的最大条目数
+    :param resolve: 是否访问文件系统获取已存在组件的实际写法（展开 8.3 短文件名）
+    """
+    def __init__(self, maxsize: int = 4096, resolve: bool = True):
+        self.maxsize = maxsize
+        self.resolve = resolve
+        self._cache: OrderedDict[str, CanonicalPath] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def canonicalize_many(self, paths: Iterable[str]) -> list[CanonicalPath]:
+        """
+        批量规范化路径，同一批中的重复写法只处理一次
+        :param paths: 完整路径列表，例如 ["C:/Data/", "c:\\DATA"]
+        :return: 与输入顺序一致的结果
+        """
+        paths = list(paths)
+        results: dict[str, CanonicalPath] = {}
+        with self._lock:
+            for path in paths:
+                if path in results: continue
+                cached = self._cache.get(path)
+                if cached is not None:
+                    self._cache.move_to_end(path)
+                    results[path] = cached
+        # 文件系统访问在锁外进行
+        missing = {path: _canonicalize(path, self.resolve) for path in paths if path not in results}
+        if missing:
+            results.update({path: canonical for path, (canonical, _) in missing.items()})
+            with self._lock:
+                self._cache.update({path: canonical for path, (canonical, complete) in missing.items() if complete})
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return [results[path] for path in paths]
+
+    def canonicalize(self, path: str) -> CanonicalPath:
+        return self.canonicalize_many([path])[0]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_canonicalizer = PathCanonicalizer()
+
+
+def canonicalize(path: str) -> CanonicalPath:
+    """
+    规范化单个路径
+    :param path: 完整路径，例如 "c:/program files/app/"
+    :return: CanonicalPath(drive="C:", file_name="\\program files\\app", ...)
+    """
+    return _canonicalizer.canonicalize(path)
+
+
+def canonicalize_many(paths: Iterable[str]) -> list[CanonicalPath]:
+    """批量规范化路径"""
+    return _canonicalizer.canonicalize_many(paths)
+
+
+def canonicalize_volume_path(drive: str, file_name: str) -> tuple[str, str]:
+    """
+    规范化卷内路径
+    :param drive: 盘符字符串，例如 "C:"
+    :param file_name: 卷内路径，例如 "/Data/"
+    :return: (盘符, 卷内路径)
+    """
+    result = _canonicalizer.canonicalize(drive + '\\' + file_name.lstrip('\\/'))
+    return result.drive, result.file_name
+
+
+def clear_cache():
+    _canonicalizer.clear()
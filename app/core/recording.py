@@ -0,0 +1,245 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+import pywintypes
+from win32com import client
+from win32com.client import CDispatch
+
+__all__ = [
+    'RecordingDispatch',
+    'WMIRecorder',
+    'get_object',
+    'start_recording',
+    'stop_recording',
+    'is_recording',
+]
+
+RECORD_ENV = 'FREEZELOCK_WMI_RECORD'  # 设置为文件路径即在启动时开启录制
+
+_recorder: Optional['WMIRecorder'] = None
+_lock = threading.Lock()
+
+
+class WMIRecorder:
+    """
+    WMI 调用录制器
+
+    以 JSON Lines 格式记录每一次 COM 调用（路径以 .gz 结尾时使用 gzip 压缩），每行一个事件：
+    {"s": 相对录制开始的秒数, "t": 耗时秒数, "r": 对象编号, "op": 操作, "n": 名称, "a": 参数, "k": 关键字参数, "v": 结果, "e": 错误}
+    结果中的 COM 对象记为 {"$ref": 对象编号}，迭代的每个元素记为一个 next 事件（结束时带 "stop": true），
+    可由 benchmarks.backend.replay 在 Linux 上回放。
+    """
+    def __init__(self, path: str):
+        self.path = path
+        opener = gzip.open if path.endswith('.gz') else open
+        self._file = opener(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._next_ref = 0
+        self._started = time.perf_counter()
+        self._closed = False
+
+    def new_ref(self) -> int:
+        with self._lock:
+            ref = self._next_ref
+            self._next_ref += 1
+            return ref
+
+    def wrap(self, target: Any) -> Any:
+        """将 COM 对象包装为录制代理，其他值原样返回"""
+        if isinstance(target, CDispatch):
+            return RecordingDispatch(target, self, self.new_ref())
+        if isinstance(target, (list, tuple)):
+            return type(target)(self.wrap(item) for item in target)
+        return target
+
+    def encode(self, value: Any) -> Any:
+        """将值转换为可序列化的形式"""
+        if isinstance(value, RecordingDispatch):
+            return {'$ref': value._ref}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [self.encode(item) for item in value]
+        return {'$repr': str(value)}
+
+    @staticmethod
+    def encode_error(e: Exception) -> dict:
+        if isinstance(e, pywintypes.com_error):
+            return {'type': 'com_error', 'args': [_plain(arg) for arg in e.args]}
+        return {'type': type(e).__name__, 'args': [str(arg) for arg in e.args]}
+
+    def write(self, start: float, ref: int, op: str, name: Optional[str] = None, args: Optional[list] = None, **fields):
+        event = {'s': round(start - self._started, 6), 't': round(time.perf_counter() - start, 6), 'r': ref, 'op': op}
+        if name is not None: event['n'] = name
+        if args: event['a'] = args
+        event.update(fields)
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            if not self._closed:
+                self._file.write(line + '\n')
+
+    def connect(self, pathname: str) -> 'RecordingDispatch':
+        """录制 GetObject 调用"""
+        start = time.perf_counter()
+        try:
+            wmi = client.GetObject(Pathname=pathname)
+        except Exception as e:
+            self.write(start, -1, 'connect', pathname, e=self.encode_error(e))
+            raise
+        proxy = self.wrap(wmi)
+        self.write(start, -1, 'connect', pathname, v=self.encode(proxy))
+        return proxy
+
+    def close(self):
+        with self._lock:
+            if self._closed: return
+            self._closed = True
+            self._file.close()
+
+
+def _plain(value: Any) -> Any:
+    """将 com_error 参数转换为 JSON 兼容的值"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return str(value)
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, RecordingDispatch):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+class RecordingDispatch:
+    """
+    COM 对象的录制代理
+    所有属性读写、方法调用、迭代和索引都会转发给原对象并写入录制文件。
+    """
+    __slots__ = ('_target', '_recorder', '_ref')
+
+    def __init__(self, target: CDispatch, recorder: WMIRecorder, ref: int):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_recorder', recorder)
+        object.__setattr__(self, '_ref', ref)
+
+    def _invoke(self, op: str, name: Optional[str], args: tuple, func, kwargs: Optional[dict] = None):
+        recorder = self._recorder
+        fields = {'k': {k: recorder.encode(v) for k, v in kwargs.items()}} if kwargs else {}
+        start = time.perf_counter()
+        try:
+            result = recorder.wrap(func())
+        except Exception as e:
+            recorder.write(start, self._ref, op, name, recorder.encode(list(args)), e=recorder.encode_error(e), **fields)
+            raise
+        recorder.write(start, self._ref, op, name, recorder.encode(list(args)), v=recorder.encode(result), **fields)
+        return result
+
+    def __getattr__(self, name: str):
+        if name.startswith('__'): raise AttributeError(name)
+        target = self._target
+        start = time.perf_counter()
+        try:
+            value = getattr(target, name)
+        except Exception as e:
+            self._recorder.write(start, self._ref, 'get', name, e=self._recorder.encode_error(e))
+            raise
+        if callable(value) and not isinstance(value, CDispatch):
+            # 方法在调用时才记录
+            def method(*args, **kwargs):
+                return self._invoke(
+                    'call', name, args, lambda: value(*_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()}), kwargs
+                )
+            return method
+        result = self._recorder.wrap(value)
+        self._recorder.write(start, self._ref, 'get', name, v=self._recorder.encode(result))
+        return result
+
+    def __setattr__(self, name: str, value: Any):
+        self._invoke('set', name, (value,), lambda: setattr(self._target, name, _unwrap(value)))
+
+    def __getitem__(self, key):
+        return self._invoke('index', None, (key,), lambda: self._target[key])
+
+    def __len__(self):
+        return self._invoke('len', None, (), lambda: len(self._target))
+
+    def __bool__(self):
+        return self._invoke('bool', None, (), lambda: bool(self._target))
+
+    def __iter__(self):
+        # 每个元素记录为一个 next 事件，保证元素的后续调用出现在它的来源之后
+        recorder = self._recorder
+        iterator = iter(self._target)
+        index = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                item = recorder.wrap(next(iterator))
+            except StopIteration:
+                recorder.write(start, self._ref, 'next', None, [index], stop=True)
+                return
+            except Exception as e:
+                recorder.write(start, self._ref, 'next', None, [index], e=recorder.encode_error(e))
+                raise
+            recorder.write(start, self._ref, 'next', None, [index], v=recorder.encode(item))
+            index += 1
+            yield item
+
+    def __repr__(self):
+        return f'<RecordingDispatch #{self._ref} {self._target!r}>'
+
+
+def start_recording(path: str) -> WMIRecorder:
+    """
+    开启录制，之后通过 get_object() 获取的 WMI 连接都会被录制
+    需要调用 refresh_wmi_client() 使已缓存的客户端重新连接
+    :param path: 录制文件路径，以 .gz 结尾时压缩
+    :return: 录制器
+    """
+    global _recorder
+    with _lock:
+        if _recorder is not None: _recorder.close()
+        _recorder = WMIRecorder(path)
+        print(f'[+] WMI 调用录制已开启: {path}')
+        return _recorder
+
+
+def stop_recording():
+    """结束录制并关闭文件"""
+    global _recorder
+    with _lock:
+        if _recorder is not None:
+            _recorder.close()
+            print(f'[+] WMI 调用录制已保存: {_recorder.path}')
+        _recorder = None
+
+
+def is_recording() -> bool:
+    return _recorder is not None
+
+
+def get_object(pathname: str) -> Any:
+    """
+    获取 WMI 命名空间对象，录制开启时返回录制代理
+    :param pathname: moniker 路径，例如 winmgmts:\\\\.\\root\\cimv2
+    :return: SWbemServices 对象
+    """
+    recorder = _recorder
+    if recorder is None:
+        return client.GetObject(Pathname=pathname)
+    return recorder.connect(pathname)
+
+
+if os.environ.get(RECORD_ENV):
+    start_recording(os.environ[RECORD_ENV])
+
+atexit.register(stop_recording)
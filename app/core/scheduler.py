@@ -0,0 +1,303 @@
+"""
+维护计划任务
+
+按固定间隔执行提交（commit）和重启（restart）任务，任务保存在数据目录的 scheduler.json 中。
+每个任务可以限定执行时间窗（例如 "22:00-05:00"）、随机抖动以及错过执行时的处理策略。
+执行记录在执行前保存；数据目录的排除项在当前会话中生效前记录会在重启后丢失，因此跳过重启任务，避免重启后重复执行。
+时间来源通过 Clock 注入，测试时可以使用 ManualClock 快速推进时间。
+
+scheduler.json 示例：
+    {"jobs": [
+        {"id": "commit-appdata", "action": "commit", "interval": 3600, "jitter": 120,
+         "params": {"paths": ["C:\\\\ProgramData\\\\Kiosk"], "pattern": "*"}},
+        {"id": "night-restart", "action": "restart", "interval": 86400, "window": "02:00-05:00",
+         "missed": "skip", "params": {"min_usage": 0.7}}
+    ]}
+"""
+import math
+import random
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+from typing import Callable, Optional
+
+from .storage import data_dir_persistent, read_config, write_json
+
+SCHEDULER_FILE = 'scheduler.json'
+
+ACTION_COMMIT = 'commit'
+ACTION_RESTART = 'restart'
+
+MISSED_SKIP = 'skip'  # 错过的执行直接跳过，按原有节奏等待下一个执行点
+MISSED_RUN_ONCE = 'run_once'  # 无论错过多少次，只补执行一次
+
+MISSED_GRACE = 300  # 超过计划时间多少秒视为错过
+
+
+class Clock:
+    """系统时钟"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def wait(self, seconds: float, stop_event: threading.Event) -> bool:
+        """
+        等待指定秒数
+        :return: 等待期间是否收到停止信号
+        """
+        return stop_event.wait(seconds)
+
+
+class ManualClock(Clock):
+    """手动推进的时钟，wait() 会立即把时间推进到等待结束的时刻"""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self._now = start or datetime(2000, 1, 1)
+
+    def now(self) -> datetime:
+        return self._now
+
+    def advance(self, seconds: float):
+        self._now += timedelta(seconds=seconds)
+
+    def wait(self, seconds: float, stop_event: threading.Event) -> bool:
+        if not stop_event.is_set(): self.advance(seconds)
+        return stop_event.is_set()
+
+
+class TimeWindow:
+    """
+    每日时间窗，结束时间早于开始时间表示跨越午夜
+    :param spec: "HH:MM-HH:MM"
+    """
+    def __init__(self, spec: str):
+        start, end = spec.split('-')
+        self.start = dt_time.fromisoformat(start.strip())
+        self.end = dt_time.fromisoformat(end.strip())
+
+    def contains(self, moment: datetime) -> bool:
+        t = moment.time()
+        if self.start <= self.end: return self.start <= t < self.end
+        return t >= self.start or t < self.end
+
+    def next_start(self, moment: datetime) -> datetime:
+        """moment 之后（含）最近一次时间窗开始的时刻"""
+        start = datetime.combine(moment.date(), self.start)
+        return start if start >= moment else start + timedelta(days=1)
+
+    def remaining(self, moment: datetime) -> float:
+        """moment 位于时间窗内时，距离时间窗结束的秒数"""
+        end = datetime.combine(moment.date(), self.end)
+        if end <= moment: end += timedelta(days=1)
+        return (end - moment).total_seconds()
+
+
+@dataclass
+class Job:
+    """
+    计划任务
+    :param action: ACTION_COMMIT 或 ACTION_RESTART
+    :param interval: 执行间隔（秒）
+    :param window: 允许执行的时间窗，例如 "22:00-05:00"
+    :param jitter: 在计划时间上追加的随机延迟上限（秒），避免多台设备同时执行
+    :param missed: 错过执行时的策略，MISSED_SKIP 或 MISSED_RUN_ONCE
+    :param params: 任务参数，commit: {"paths": [...], "pattern": "*"}，restart: {"min_usage": 0.7}
+    """
+    action: str
+    interval: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    window: Optional[str] = None
+    jitter: int = 0
+    missed: str = MISSED_RUN_ONCE
+    params: dict = field(default_factory=dict)
+    enabled: bool = True
+    last_run: Optional[str] = None  # ISO 格式的上次执行时间
+    next_run: Optional[str] = None  # ISO 格式的下次执行时间
+    last_result: Optional[bool] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Job':
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+def run_commit(params: dict, stop_event: Optional[threading.Event] = None) -> bool:
+    """提交 params['paths'] 下的覆盖文件"""
+    from .paths import canonicalize
+    from .services.volume import UWFVolume
+
+    success = True
+    for path in params.get('paths', []):
+        path = canonicalize(path)
+        result = UWFVolume.commit_tree(
+            drive=path.drive, path=path.file_name, pattern=params.get('pattern', '*'),
+            max_workers=params.get('max_workers', 4), cancel_event=stop_event,
+        )
+        success = success and result.success
+    return success
+
+
+def run_restart(params: dict, stop_event: Optional[threading.Event] = None) -> bool:
+    """重启系统，设置了 min_usage 时只在覆盖层使用率达到该比例时重启"""
+    from .services.filter import UWFFilter
+    from .services.overlay import overlay_usage
+
+    min_usage = params.get('min_usage')
+    if min_usage:
+        usage = overlay_usage()
+        if usage is None or usage < min_usage:
+            print(f'[*] 覆盖层使用率 {usage if usage is None else f"{usage:.0%}"} 未达到 {min_usage:.0%}，跳过重启')
+            return True
+    print('[+] 计划任务重启系统...')
+    return UWFFilter.restart_system()
+
+
+class Scheduler:
+    """
+    计划任务调度器
+    :param clock: 时间来源
+    :param file_name: 数据目录下保存任务的文件名
+    :param actions: 额外的或替换的动作，签名为 action(params, stop_event) -> bool
+    :param rng: 用于抖动的随机数生成器
+    :param records_persist: 返回执行记录能否在重启后保留，默认为 data_dir_persistent
+    """
+    def __init__(
+        self, clock: Optional[Clock] = None, file_name: str = SCHEDULER_FILE,
+        actions: Optional[dict[str, Callable[[dict, Optional[threading.Event]], bool]]] = None,
+        rng: Optional[random.Random] = None, records_persist: Optional[Callable[[], bool]] = None,
+    ):
+        self.clock = clock or Clock()
+        self.file_name = file_name
+        self.actions = {ACTION_COMMIT: run_commit, ACTION_RESTART: run_restart, **(actions or {})}
+        self.rng = rng or random.Random()
+        self.records_persist = records_persist or data_dir_persistent
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        data = read_config(self.file_name, default={}) or {}
+        with self._lock:
+            self._jobs.clear()
+            for item in data.get('jobs', []):
+                try:
+                    job = Job.from_dict(item)
+                except TypeError as e:
+                    print(f'[!] 忽略无效的计划任务 {item}: {e}')
+                    continue
+                if job.action not in self.actions or job.interval <= 0:
+                    print(f'[!] 忽略无效的计划任务 {job.id}: action={job.action}, interval={job.interval}')
+                    continue
+                if job.next_run is None: self._schedule(job, self.clock.now())  # 新任务尽快执行第一次
+                self._jobs[job.id] = job
+
+    def save(self) -> bool:
+        with self._lock:
+            return write_json(self.file_name, {'jobs': [asdict(job) for job in self._jobs.values()]})
+
+    def jobs(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def add_job(self, job: Job) -> Job:
+        if job.action not in self.actions: raise ValueError(f'未知的任务动作: {job.action}')
+        if job.interval <= 0: raise ValueError('interval 必须大于 0')
+        if job.window: TimeWindow(job.window)  # 提前校验格式
+        with self._lock:
+            self._schedule(job, self.clock.now())
+            self._jobs[job.id] = job
+            self.save()
+        return job
+
+    def remove_job(self, job_id: str) -> bool:
+        with self._lock:
+            if self._jobs.pop(job_id, None) is None: return False
+            self.save()
+            return True
+
+    def _schedule(self, job: Job, moment: datetime):
+        """以 moment 为基准，根据时间窗和抖动计算下次执行时间"""
+        jitter = self.rng.uniform(0, job.jitter) if job.jitter > 0 else 0.0
+        if job.window:
+            window = TimeWindow(job.window)
+            if not window.contains(moment): moment = window.next_start(moment)
+            jitter = min(jitter, max(0.0, window.remaining(moment) - 1))  # 抖动不超出时间窗
+        job.next_run = (moment + timedelta(seconds=jitter)).isoformat(timespec='seconds')
+
+    def _records_persist(self) -> bool:
+        try:
+            return bool(self.records_persist())
+        except Exception as e:
+            print(f'[!] 检查数据目录排除项失败: {e}')
+            return False
+
+    def next_wakeup(self) -> Optional[datetime]:
+        with self._lock:
+            times = [datetime.fromisoformat(job.next_run) for job in self._jobs.values() if job.enabled and job.next_run]
+        return min(times, default=None)
+
+    def run_pending(
+        self, stop_event: Optional[threading.Event] = None,
+        on_finished: Optional[Callable[[Job, bool], None]] = None,
+    ) -> list[tuple[Job, bool]]:
+        """
+        执行所有到期的任务
+        :return: [(任务, 是否成功)]
+        """
+        finished = []
+        now = self.clock.now()
+        with self._lock:
+            due = [job for job in self._jobs.values() if job.enabled and job.next_run and datetime.fromisoformat(job.next_run) <= now]
+        for job in due:
+            if stop_event is not None and stop_event.is_set(): break
+            scheduled = datetime.fromisoformat(job.next_run)
+            with self._lock:
+                if (now - scheduled).total_seconds() > MISSED_GRACE and job.missed == MISSED_SKIP:
+                    print(f'[*] 计划任务 {job.id} 错过了 {job.next_run} 的执行，跳过')
+                    # 保持原有节奏，跳到当前时间之后的第一个执行点
+                    periods = math.ceil((now - scheduled).total_seconds() / job.interval)
+                    self._schedule(job, scheduled + timedelta(seconds=periods * job.interval))
+                    self.save()
+                    continue
+                if job.window and not TimeWindow(job.window).contains(now):
+                    # 补执行时已不在时间窗内，推迟到下一个时间窗
+                    job.next_run = TimeWindow(job.window).next_start(now).isoformat(timespec='seconds')
+                    self.save()
+                    continue
+                if job.action == ACTION_RESTART and not self._records_persist():
+                    print(f'[*] 数据目录的排除项尚未在当前会话中生效，跳过重启任务 {job.id}')
+                    self._schedule(job, now + timedelta(seconds=job.interval))
+                    self.save()
+                    continue
+                # 先保存执行记录再执行，避免重启类任务在重启后重复执行
+                job.last_run = now.isoformat(timespec='seconds')
+                self._schedule(job, now + timedelta(seconds=job.interval))
+                self.save()
+            print(f'[+] 执行计划任务 {job.id} ({job.action})')
+            try:
+                result = bool(self.actions[job.action](job.params, stop_event))
+            except Exception as e:
+                print(f'[!] 计划任务 {job.id} 执行失败: {e}')
+                result = False
+            with self._lock:
+                job.last_result = result
+                self.save()
+            finished.append((job, result))
+            if on_finished: on_finished(job, result)
+        return finished
+
+    def run(
+        self, stop_event: threading.Event, max_sleep: float = 60.0,
+        on_finished: Optional[Callable[[Job, bool], None]] = None,
+    ):
+        """
+        持续执行到期任务，直到 stop_event 被设置
+        :param max_sleep: 最长休眠秒数，用于应对系统时间变化和任务文件更新
+        """
+        while not stop_event.is_set():
+            self.run_pending(stop_event=stop_event, on_finished=on_finished)
+            wakeup = self.next_wakeup()
+            seconds = max_sleep if wakeup is None else (wakeup - self.clock.now()).total_seconds()
+            if self.clock.wait(min(max(seconds, 1.0), max_sleep), stop_event): break
@@ -2,15 +2,21 @@ import threading
 
 from win32com import client
 
+from ..recording import get_object
+
 # 全局私有 WMI 对象引用
 _wmi_client = None
 _uwf_service_installed: bool = False  # UWF 服务安装状态
 _uwf_classes: list[str] = []  # ['UWF_Filter', 'UWF_ExcludedRegistryKey', 'UWF_Overlay', 'UWF_Volume', 'UWF_OverlayConfig', 'UWF_RegistryFilter', 'UWF_OverlayFile', 'UWF_Servicing', 'UWF_ExcludedFile']
 _lock = threading.Lock()
+_owner_thread: int = 0  # 创建全局 WMI 客户端的线程
+_thread_local = threading.local()  # 其他线程各自持有的 WMI 客户端（COM 对象不能跨线程使用）
+WMI_NAMESPACE = r'winmgmts:\\.\root\standardcimv2\embedded'
 
 __all__ = [
     'get_wmi_client',
     'refresh_wmi_client',
+    'release_thread_client',
     'uwf_classes',
     'is_uwf_installed',
 ]
@@ -25,7 +31,19 @@ def get_wmi_client() -> client.CDispatch:
         with _lock:
             if _wmi_client is None:  # 双重检查锁定
                 _init_wmi_client()
-    return _wmi_client
+    if threading.get_ident() == _owner_thread: return _wmi_client
+    # 工作线程使用自己的连接，类列表与安装状态沿用全局结果
+    client = getattr(_thread_local, 'client', None)
+    if client is None:
+        client = _thread_local.client = get_object(pathname=WMI_NAMESPACE)
+    return client
+
+
+def release_thread_client():
+    """
+    释放当前线程的 WMI 客户端，工作线程应在 CoUninitialize 之前调用
+    """
+    _thread_local.client = None
 
 
 def _init_wmi_client() -> bool:
@@ -33,15 +51,16 @@ def _init_wmi_client() -> bool:
     初始化 WMI 客户端对象
     :return:
     """
-    global _wmi_client, _uwf_classes, _uwf_service_installed
+    global _wmi_client, _uwf_classes, _uwf_service_installed, _owner_thread
 
     _wmi_client = None  # 重置 WMI 客户端对象
     _uwf_service_installed = False  # 重置 UWF 服务安装状态
     _uwf_classes.clear()  # 清空全局 UWF 类列表
 
     try:
-        # 使用 win32com.client 获取 WMI 客户端
-        _wmi_client = client.GetObject(Pathname=r'winmgmts:\\.\root\standardcimv2\embedded')
+        # 使用 win32com.client 获取 WMI 客户端（开启录制时返回录制代理）
+        _wmi_client = get_object(pathname=WMI_NAMESPACE)
+        _owner_thread = threading.get_ident()
         # 获取所有类定义防止超范围
         all_classes = _wmi_client.SubclassesOf()
         print(f'[+] WMI 客户端初始化成功，找到 {len(all_classes)} 个类')
@@ -2,6 +2,7 @@ import pywintypes
 
 from .base import BaseUWFService
 from .utils import format_com_error, get_filter_instance
+from ..journal import audited
 
 
 class UWFFilter(BaseUWFService):
@@ -12,6 +13,7 @@ class UWFFilter(BaseUWFService):
     """
 
     @staticmethod
+    @audited
     def enable() -> bool:
         """
         Enable the UWF filter.
@@ -32,6 +34,7 @@ class UWFFilter(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def disable() -> bool:
         """
         Disable the UWF filter.
@@ -51,6 +54,7 @@ class UWFFilter(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def reset_settings() -> bool:
         """
         Reset the UWF filter settings.
@@ -65,6 +69,7 @@ class UWFFilter(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def shutdown_system() -> bool:
         """
         Shutdown the system.
@@ -79,6 +84,7 @@ class UWFFilter(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def restart_system() -> bool:
         """
         Restart the system.
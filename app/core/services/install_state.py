@@ -0,0 +1,148 @@
+"""
+UWF 功能安装状态检测
+
+按开销从低到高依次检查：已加载的 UWF_ WMI 类、uwfvol 驱动服务注册表项、System32 下的 uwfmgr.exe，
+最后才查询 Win32_OptionalFeature（需要枚举整个功能存储，非常慢）。结果按本次启动缓存在数据目录的
+install_state.json 中，重启或安装后失效。
+"""
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import win32api
+
+from . import uwf_classes
+from .query import Query
+from ..recording import get_object
+from ..storage import read_json, write_json
+
+STATE_FILE = 'install_state.json'
+
+INSTALLED = 'installed'  # 已安装且 UWF WMI 类可用
+PENDING_REBOOT = 'pending_reboot'  # 已安装，重启后生效
+AVAILABLE = 'available'  # 未安装，可以通过 DISM 安装
+UNAVAILABLE = 'unavailable'  # 当前系统版本不提供 UWF 功能
+UNKNOWN = 'unknown'
+
+UWF_FEATURE_NAME = 'Client-UnifiedWriteFilter'
+UWFVOL_SERVICE_KEY = r'SYSTEM\CurrentControlSet\Services\uwfvol'
+BOOT_TOLERANCE = 120  # 秒，估算的启动时间允许的误差
+
+_lock = threading.Lock()
+_cached: Optional[dict] = None
+
+
+def boot_id() -> int:
+    """本次启动的时间（time.time() 时间戳，按分钟取整）"""
+    return int(round((time.time() - win32api.GetTickCount64() / 1000) / 60) * 60)
+
+
+def _same_boot(value) -> bool:
+    return isinstance(value, (int, float)) and abs(value - boot_id()) <= BOOT_TOLERANCE
+
+
+def _probe_classes() -> Optional[bool]:
+    """UWF_ 类已加载时说明功能已安装并生效；类列表为空时无法区分未安装和等待重启"""
+    return True if uwf_classes() else None
+
+
+def _probe_registry() -> Optional[bool]:
+    """uwfvol 驱动服务是否已注册"""
+    try:
+        import winreg
+    except ImportError:
+        return None
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, UWFVOL_SERVICE_KEY):
+            return True
+    except FileNotFoundError:
+        return None  # 功能可能处于等待安装状态，交给后续检查
+    except OSError as e:
+        print(f'[!] 读取 uwfvol 服务注册表项失败: {e}')
+        return None
+
+
+def _probe_uwfmgr() -> Optional[bool]:
+    """System32 下是否存在 uwfmgr.exe"""
+    try:
+        return True if os.path.isfile(os.path.join(win32api.GetSystemDirectory(), 'uwfmgr.exe')) else None
+    except Exception as e:
+        print(f'[!] 检查 uwfmgr.exe 失败: {e}')
+        return None
+
+
+def _probe_feature() -> str:
+    """查询 Win32_OptionalFeature（最慢）"""
+    try:
+        wmi = get_object(pathname=r'winmgmts:\\.\root\cimv2')
+        features = wmi.ExecQuery(Query('Win32_OptionalFeature').select('InstallState').where(Name=UWF_FEATURE_NAME).text)
+        if not features: return UNAVAILABLE
+        return {1: INSTALLED, 2: AVAILABLE, 3: UNAVAILABLE}.get(features[0].InstallState, UNKNOWN)
+    except Exception as e:
+        print(f'[!] 查询 UWF 功能安装状态失败: {e}')
+        return UNKNOWN
+
+
+PROBES: list[tuple[str, Callable[[], Optional[bool]]]] = [
+    ('classes', _probe_classes),
+    ('registry', _probe_registry),
+    ('uwfmgr', _probe_uwfmgr),
+]
+
+
+def probe_install_state() -> tuple[str, str]:
+    """
+    不使用缓存检测安装状态
+    :return: (状态, 得出结论的检查项)
+    """
+    for name, probe in PROBES:
+        if probe():
+            # 功能文件已存在但 UWF 类尚未加载，说明需要重启
+            return (INSTALLED if name == 'classes' else PENDING_REBOOT), name
+    state = _probe_feature()
+    if state == INSTALLED and not uwf_classes(): state = PENDING_REBOOT
+    return state, 'feature'
+
+
+def get_install_state(refresh: bool = False) -> str:
+    """
+    获取 UWF 功能安装状态，同一次启动内使用缓存
+    :param refresh: 忽略缓存重新检测
+    :return: INSTALLED / PENDING_REBOOT / AVAILABLE / UNAVAILABLE / UNKNOWN
+    """
+    global _cached
+    with _lock:
+        if _cached is None: _cached = read_json(STATE_FILE, default=None) or {}
+        cached = dict(_cached)
+    if uwf_classes():
+        state, source = INSTALLED, 'classes'  # 类已加载时直接确认，不使用缓存中等待重启等旧状态
+    elif not refresh and cached.get('state') not in (None, INSTALLED) and _same_boot(cached.get('boot_id')):
+        return cached['state']  # 缓存为已安装但类不存在时重新检测
+    else:
+        state, source = probe_install_state()
+        print(f'[+] UWF 功能安装状态: {state}（{source}）')
+    if state != UNKNOWN: _save(state)
+    return state
+
+
+def mark_installed():
+    """DISM 安装成功后调用，本次启动内状态为等待重启"""
+    _save(PENDING_REBOOT)
+
+
+def invalidate():
+    """清除缓存，下次调用 get_install_state() 时重新检测"""
+    global _cached
+    with _lock:
+        _cached = {}
+    write_json(STATE_FILE, {})
+
+
+def _save(state: str):
+    global _cached
+    with _lock:
+        if _cached and _cached.get('state') == state and _same_boot(_cached.get('boot_id')): return
+        _cached = {'state': state, 'boot_id': boot_id()}
+        snapshot = dict(_cached)
+    write_json(STATE_FILE, snapshot)
@@ -0,0 +1,110 @@
+from typing import Optional
+
+import pywintypes
+
+from .base import BaseUWFService
+from .utils import format_com_error, get_overlay_config_instance, get_overlay_instance
+from ..journal import audited
+
+
+class UWFOverlay(BaseUWFService):
+    """
+    UWF Overlay Class.
+
+    https://learn.microsoft.com/en-us/windows/configuration/unified-write-filter/uwf-overlay
+    """
+
+    @staticmethod
+    @audited
+    def set_warning_threshold(size: int) -> bool:
+        """
+        Set the warning threshold of the overlay, takes effect immediately.
+        :param size: The threshold in MB, must be below the critical threshold.
+        :return: True if the operation was successful, False otherwise.
+        """
+        try:
+            instance = get_overlay_instance()
+            if instance is not None:
+                result = instance.execute_method("SetWarningThreshold", size=size)
+                return result.ReturnValue == 0
+        except pywintypes.com_error as e:
+            print(f'[!] Setting UWF overlay warning threshold failed: {format_com_error(e=e)}')
+        return False
+
+    @staticmethod
+    @audited
+    def set_critical_threshold(size: int) -> bool:
+        """
+        Set the critical threshold of the overlay, takes effect immediately.
+        :param size: The threshold in MB, must be above the warning threshold.
+        :return: True if the operation was successful, False otherwise.
+        """
+        try:
+            instance = get_overlay_instance()
+            if instance is not None:
+                result = instance.execute_method("SetCriticalThreshold", size=size)
+                return result.ReturnValue == 0
+        except pywintypes.com_error as e:
+            print(f'[!] Setting UWF overlay critical threshold failed: {format_com_error(e=e)}')
+        return False
+
+    @staticmethod
+    def set_thresholds(warning: int, critical: int) -> bool:
+        """
+        Set both thresholds in an order that keeps warning below critical at every step.
+        :param warning: The warning threshold in MB.
+        :param critical: The critical threshold in MB.
+        :return: True if the operation was successful, False otherwise.
+        """
+        if warning >= critical:
+            print('[!] The warning threshold must be below the critical threshold')
+            return False
+        current_critical = overlay_status().get('CriticalOverlayThreshold', 0)
+        if warning >= current_critical:
+            # 先提高临界阈值，再提高警告阈值
+            return UWFOverlay.set_critical_threshold(size=critical) and UWFOverlay.set_warning_threshold(size=warning)
+        return UWFOverlay.set_warning_threshold(size=warning) and UWFOverlay.set_critical_threshold(size=critical)
+
+
+def overlay_status() -> dict:
+    """
+    Get the current overlay status in one query.
+    :return: {'OverlayConsumption', 'AvailableSpace', 'WarningOverlayThreshold', 'CriticalOverlayThreshold'} in MB, or {} on failure.
+    """
+    try:
+        instance = get_overlay_instance()
+        if instance is None: return {}
+        return {
+            'OverlayConsumption': instance['OverlayConsumption'] or 0,
+            'AvailableSpace': instance['AvailableSpace'] or 0,
+            'WarningOverlayThreshold': instance['WarningOverlayThreshold'] or 0,
+            'CriticalOverlayThreshold': instance['CriticalOverlayThreshold'] or 0,
+        }
+    except pywintypes.com_error as e:
+        print(f'[!] Getting UWF overlay status failed: {format_com_error(e=e)}')
+    return {}
+
+
+def overlay_consumption() -> int:
+    """
+    Get the current overlay consumption.
+    :return: The consumption in MB.
+    """
+    return overlay_status().get('OverlayConsumption', 0)
+
+
+def overlay_usage() -> Optional[float]:
+    """
+    Get the overlay usage relative to the maximum size of the current session.
+    :return: A ratio between 0 and 1, or None if it cannot be determined.
+    """
+    status = overlay_status()
+    if not status: return None
+    try:
+        instance = get_overlay_config_instance(current_session=True, columns=('MaximumSize',))
+        maximum = instance['MaximumSize'] if instance is not None else 0
+    except pywintypes.com_error as e:
+        print(f'[!] Getting UWF overlay maximum size failed: {format_com_error(e=e)}')
+        return None
+    if not maximum: return None
+    return status['OverlayConsumption'] / maximum
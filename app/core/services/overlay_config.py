@@ -2,6 +2,7 @@ import pywintypes
 
 from .base import BaseUWFService
 from .utils import format_com_error, get_overlay_config_instance
+from ..journal import audited
 
 
 class UWFOverlayConfig(BaseUWFService):
@@ -12,6 +13,7 @@ class UWFOverlayConfig(BaseUWFService):
     """
 
     @staticmethod
+    @audited
     def set_type(type_str: str) -> bool:
         """
         Set the overlay type.
@@ -30,6 +32,7 @@ class UWFOverlayConfig(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def set_maximum_size(size: int) -> bool:
         """
         Set the maximum size of the overlay.
@@ -54,7 +57,7 @@ def get_type() -> str:
         1: "Disk",
     }
     try:
-        instance = get_overlay_config_instance(current_session=False)
+        instance = get_overlay_config_instance(current_session=False, columns=('Type',))
         type_value = instance['Type']
         return type_map.get(type_value, "Unknown")
     except pywintypes.com_error as e:
@@ -68,7 +71,7 @@ def maximum_size() -> int:
     :return: The maximum size in bytes.
     """
     try:
-        instance = get_overlay_config_instance(current_session=False)
+        instance = get_overlay_config_instance(current_session=False, columns=('MaximumSize',))
         return instance['MaximumSize']
     except pywintypes.com_error as e:
         print(f'[!] Getting UWF overlay maximum size failed: {format_com_error(e=e)}')
@@ -0,0 +1,85 @@
+"""
+WQL 查询构造
+
+    Query('UWF_Volume').select('Protected').where(DriveLetter='C:', CurrentSession=False).text
+    -> 'SELECT CurrentSession,DriveLetter,VolumeName,Protected FROM UWF_Volume WHERE DriveLetter="C:" AND CurrentSession=FALSE'
+
+值会按类型转义（字符串中的 \\ 与 " 加反斜杠），只选择需要的列可以减少跨进程传输的属性数量。
+选择列时总是包含类的键属性，保证返回的实例带有对象路径，可以继续调用实例方法。
+生成的查询文本按 (类名, 列, 条件) 缓存。
+"""
+from functools import lru_cache
+from typing import Any
+
+# 键属性（用于构造对象路径），来自 UWF WMI 提供程序的类定义
+KEY_PROPERTIES: dict[str, tuple[str, ...]] = {
+    'UWF_Filter': ('Id',),
+    'UWF_Overlay': ('Id',),
+    'UWF_OverlayConfig': ('CurrentSession',),
+    'UWF_Volume': ('CurrentSession', 'DriveLetter', 'VolumeName'),
+    'UWF_RegistryFilter': ('CurrentSession',),
+    'UWF_Servicing': ('CurrentSession',),
+    'Win32_OptionalFeature': ('Name',),
+}
+
+
+def quote(value: Any) -> str:
+    """
+    把 Python 值转换为 WQL 字面量
+    :param value: str / bool / int / float / None
+    :return: WQL 字面量
+    """
+    if value is None: return 'NULL'
+    if isinstance(value, bool): return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)): return repr(value)
+    if isinstance(value, str): return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    raise TypeError(f'不支持的 WQL 值类型: {type(value).__name__}')
+
+
+@lru_cache(maxsize=256)
+def _compile(class_name: str, columns: tuple[str, ...], conditions: tuple[tuple[str, Any], ...]) -> str:
+    if columns:
+        columns = tuple(dict.fromkeys(KEY_PROPERTIES.get(class_name, ()) + columns))
+    text = f'SELECT {",".join(columns) if columns else "*"} FROM {class_name}'
+    if conditions:
+        text += ' WHERE ' + ' AND '.join(
+            f'{name} IS NULL' if value is None else f'{name}={quote(value)}' for name, value in conditions
+        )
+    return text
+
+
+class Query:
+    """
+    不可变的 WQL 查询，select() / where() 返回新的查询
+    :param class_name: WMI 类名
+    """
+    __slots__ = ('class_name', 'columns', 'conditions')
+
+    def __init__(self, class_name: str, columns: tuple[str, ...] = (), conditions: tuple[tuple[str, Any], ...] = ()):
+        if not class_name.isidentifier(): raise ValueError(f'无效的 WMI 类名: {class_name}')
+        self.class_name = class_name
+        self.columns = columns
+        self.conditions = conditions
+
+    def select(self, *columns: str) -> 'Query':
+        """只选择指定的列（键属性总是包含在内），不调用时选择全部列"""
+        for column in columns:
+            if not column.isidentifier(): raise ValueError(f'无效的属性名: {column}')
+        return Query(self.class_name, self.columns + columns, self.conditions)
+
+    def where(self, **conditions: Any) -> 'Query':
+        """添加相等条件，多个条件之间为 AND"""
+        for value in conditions.values():
+            quote(value)  # 提前校验类型
+        return Query(self.class_name, self.columns, self.conditions + tuple(conditions.items()))
+
+    @property
+    def text(self) -> str:
+        """WQL 查询文本"""
+        return _compile(self.class_name, self.columns, self.conditions)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f'Query({self.text!r})'
@@ -0,0 +1,235 @@
+"""
+多步骤 UWF 配置事务
+
+每个步骤记录执行操作和对应的撤销操作，按依赖顺序执行；某一步失败时按相反顺序撤销已完成的步骤，
+最终返回一个汇总结果。执行前已处于目标状态的步骤会被跳过，回滚时也不会撤销它们。
+
+    transaction = Transaction('启用保护')
+    transaction.set_overlay_type('Disk')
+    transaction.protect_volume('D:')
+    transaction.add_exclusion('D:', r'\\Kiosk\\Data')
+    transaction.enable_filter()
+    result = transaction.apply()
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import pywintypes
+
+from .filter import UWFFilter, next_enabled
+from .overlay_config import UWFOverlayConfig, get_type, maximum_size
+from .utils import format_com_error, get_volume_instance
+from .volume import UWFVolume
+from ..paths import canonicalize_volume_path
+
+STEP_PENDING = 'pending'
+STEP_APPLIED = 'applied'
+STEP_SKIPPED = 'skipped'
+STEP_FAILED = 'failed'
+STEP_ROLLED_BACK = 'rolled_back'
+STEP_ROLLBACK_FAILED = 'rollback_failed'
+
+
+@dataclass
+class Step:
+    """
+    事务步骤
+    :param name: 步骤名，在事务内唯一
+    :param apply: 执行操作，返回是否成功
+    :param rollback: 撤销操作，返回是否成功；为 None 表示无需撤销
+    :param depends_on: 必须先执行的步骤名
+    :param is_done: 返回 True 时表示已处于目标状态，跳过该步骤
+    """
+    name: str
+    apply: Callable[[], bool]
+    rollback: Optional[Callable[[], bool]] = None
+    depends_on: tuple[str, ...] = ()
+    is_done: Optional[Callable[[], bool]] = None
+    status: str = STEP_PENDING
+
+
+@dataclass
+class TransactionResult:
+    """事务执行结果"""
+    name: str
+    steps: list[Step] = field(default_factory=list)
+    failed_step: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.failed_step is None
+
+    @property
+    def rolled_back(self) -> bool:
+        return any(step.status in (STEP_ROLLED_BACK, STEP_ROLLBACK_FAILED) for step in self.steps)
+
+    @property
+    def rollback_failures(self) -> list[str]:
+        return [step.name for step in self.steps if step.status == STEP_ROLLBACK_FAILED]
+
+    def summary(self) -> str:
+        """每个步骤一行的执行摘要"""
+        marks = {
+            STEP_APPLIED: '✓', STEP_SKIPPED: '-', STEP_FAILED: '✗', STEP_ROLLED_BACK: '↺',
+            STEP_ROLLBACK_FAILED: '!', STEP_PENDING: ' ',
+        }
+        labels = {
+            STEP_APPLIED: '已完成', STEP_SKIPPED: '无需更改', STEP_FAILED: '失败', STEP_ROLLED_BACK: '已回滚',
+            STEP_ROLLBACK_FAILED: '回滚失败', STEP_PENDING: '未执行',
+        }
+        return '\n'.join(f'{marks[step.status]} {step.name}: {labels[step.status]}' for step in self.steps)
+
+
+class Transaction:
+    """
+    多步骤配置事务
+    :param name: 事务名，用于日志
+    """
+    def __init__(self, name: str = 'UWF'):
+        self.name = name
+        self._steps: dict[str, Step] = {}
+
+    def add(
+        self, name: str, apply: Callable[[], bool], rollback: Optional[Callable[[], bool]] = None,
+        depends_on: tuple[str, ...] = (), is_done: Optional[Callable[[], bool]] = None,
+    ) -> Step:
+        """添加一个步骤"""
+        if name in self._steps: raise ValueError(f'步骤名重复: {name}')
+        step = Step(name=name, apply=apply, rollback=rollback, depends_on=tuple(depends_on), is_done=is_done)
+        self._steps[name] = step
+        return step
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def set_overlay_type(self, type_str: str) -> Step:
+        """设置覆盖层类型，回滚时恢复原类型"""
+        previous = {}
+
+        def is_done() -> bool:
+            previous['type'] = get_type()
+            return previous['type'] == type_str
+
+        return self.add(
+            name=f'覆盖层类型 {type_str}',
+            apply=lambda: UWFOverlayConfig.set_type(type_str),
+            rollback=lambda: previous['type'] in ('RAM', 'Disk') and UWFOverlayConfig.set_type(previous['type']),
+            is_done=is_done,
+        )
+
+    def set_maximum_size(self, size: int) -> Step:
+        """设置覆盖层最大大小，回滚时恢复原大小"""
+        previous = {}
+
+        def is_done() -> bool:
+            previous['size'] = maximum_size()
+            return previous['size'] == size
+
+        return self.add(
+            name=f'覆盖层大小 {size} MB',
+            apply=lambda: UWFOverlayConfig.set_maximum_size(size),
+            rollback=lambda: previous['size'] > 0 and UWFOverlayConfig.set_maximum_size(previous['size']),
+            is_done=is_done,
+        )
+
+    def protect_volume(self, drive: str) -> Step:
+        """保护卷，回滚时取消保护"""
+        return self.add(
+            name=f'保护卷 {drive}',
+            apply=lambda: UWFVolume.protect(drive=drive),
+            rollback=lambda: UWFVolume.unprotect(drive=drive),
+            is_done=lambda: _volume_protected(drive),
+        )
+
+    def add_exclusion(self, drive: str, file_name: str) -> Step:
+        """添加排除项，回滚时删除；事务中存在该卷的保护步骤时在其之后执行"""
+        drive, file_name = canonicalize_volume_path(drive, file_name)
+        protect_step = f'保护卷 {drive}'
+        return self.add(
+            name=f'排除 {drive}{file_name}',
+            apply=lambda: UWFVolume.add_exclusion(drive=drive, file_name=file_name),
+            rollback=lambda: UWFVolume.remove_exclusion(drive=drive, file_name=file_name),
+            depends_on=(protect_step,) if protect_step in self._steps else (),
+            is_done=lambda: UWFVolume.find_exclusion(drive=drive, file_name=file_name) == (True, True),
+        )
+
+    def enable_filter(self) -> Step:
+        """启用 UWF，在此前添加的所有步骤之后执行，回滚时停用"""
+        return self.add(
+            name='启用 UWF',
+            apply=UWFFilter.enable,
+            rollback=UWFFilter.disable,
+            depends_on=tuple(self._steps),
+            is_done=next_enabled,
+        )
+
+    def plan(self) -> list[Step]:
+        """
+        按依赖顺序排列步骤，无依赖关系的步骤保持添加顺序
+        :return: 执行顺序
+        """
+        for step in self._steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self._steps: raise ValueError(f'步骤 {step.name} 依赖不存在的步骤 {dependency}')
+
+        ordered, placed = [], set()
+        while len(ordered) < len(self._steps):
+            ready = [
+                step for step in self._steps.values()
+                if step.name not in placed and all(dependency in placed for dependency in step.depends_on)
+            ]
+            if not ready: raise ValueError('步骤之间存在循环依赖')
+            ordered.append(ready[0])
+            placed.add(ready[0].name)
+        return ordered
+
+    def apply(self) -> TransactionResult:
+        """
+        执行事务，失败时回滚已完成的步骤
+        :return: 汇总结果
+        """
+        steps = self.plan()
+        result = TransactionResult(name=self.name, steps=steps)
+        completed = []
+        print(f'[+] 执行事务 {self.name}（{len(steps)} 个步骤）')
+        for step in steps:
+            try:
+                if step.is_done is not None and step.is_done():
+                    step.status = STEP_SKIPPED
+                    continue
+                ok = bool(step.apply())
+            except pywintypes.com_error as e:
+                print(f'[!] 事务步骤 {step.name} 失败: {format_com_error(e=e)}')
+                ok = False
+            except Exception as e:  # 任何异常都按失败处理，保证已完成的步骤被回滚
+                print(f'[!] 事务步骤 {step.name} 失败: {type(e).__name__}: {e}')
+                ok = False
+            if not ok:
+                step.status = STEP_FAILED
+                result.failed_step = step.name
+                break
+            step.status = STEP_APPLIED
+            completed.append(step)
+
+        if result.failed_step is not None:
+            print(f'[!] 事务 {self.name} 在步骤 {result.failed_step} 失败，回滚 {len(completed)} 个步骤')
+            for step in reversed(completed):
+                if step.rollback is None: continue
+                try:
+                    ok = bool(step.rollback())
+                except pywintypes.com_error as e:
+                    print(f'[!] 回滚步骤 {step.name} 失败: {format_com_error(e=e)}')
+                    ok = False
+                except Exception as e:
+                    print(f'[!] 回滚步骤 {step.name} 失败: {type(e).__name__}: {e}')
+                    ok = False
+                step.status = STEP_ROLLED_BACK if ok else STEP_ROLLBACK_FAILED
+        else:
+            print(f'[✓] 事务 {self.name} 完成')
+        return result
+
+
+def _volume_protected(drive: str) -> bool:
+    """卷在下次启动时是否受保护"""
+    volume = get_volume_instance(drive=drive, current_session=False, columns=('Protected',))
+    return bool(volume is not None and volume['Protected'])
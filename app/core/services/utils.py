@@ -1,12 +1,23 @@
 import os
-from typing import Optional
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
 
 import pywintypes
 import win32api
 
 from . import uwf_classes, get_wmi_client
 from ..errors.hresult import HRESULT
-from ..object import WMIObject
+from ..wmi_stats import record_call
+from ..object import STREAM_FLAGS, WMIObject
+from ..recording import get_object
+from .query import KEY_PROPERTIES, Query
+
+DISM_ENV = 'FREEZELOCK_DISM'
+DISM_TIMEOUT = 30 * 60  # 秒
+ERROR_SUCCESS_REBOOT_REQUIRED = 3010
+
+_last_error = threading.local()  # 当前线程最近一次 COM 错误
 
 
 def get_service_class(class_name: str) -> WMIObject:
@@ -29,60 +40,114 @@ def get_service_instance(instance_name: str) -> WMIObject:
     :return: WMI 实例的客户端对象
     """
     if instance_name not in uwf_classes(): raise ValueError(f'[!] 无效的 WMI 实例名: {instance_name}')
+    start = time.perf_counter()
     try:
-        return WMIObject(get_wmi_client().InstancesOf(instance_name))
+        instances = WMIObject(get_wmi_client().InstancesOf(instance_name))
+        record_call(f'InstancesOf:{instance_name}', time.perf_counter() - start)
+        return instances
     except Exception as e:
+        record_call(f'InstancesOf:{instance_name}', time.perf_counter() - start, ok=False)
         raise RuntimeError(f'[!] 获取 WMI 实例 {instance_name} 失败: {e}') from e
 
 
-def query_service_instance(class_name: str, query: str) -> WMIObject:
+def query_service_instance(query: Query) -> WMIObject:
     """
     获取指定UWF类的服务实例
-    :param class_name: UWF类名
-    :param query: WMI查询语句
+    :param query: WQL 查询
     :return: UWF类的服务实例
     """
-    if class_name not in uwf_classes(): raise ValueError(f'[!] 类名 "{class_name}" 不在已安装的UWF类列表中。')
+    if query.class_name not in uwf_classes(): raise ValueError(f'[!] 类名 "{query.class_name}" 不在已安装的UWF类列表中。')
+    start = time.perf_counter()
     try:
-        return WMIObject(get_wmi_client().ExecQuery(query))
+        instances = WMIObject(get_wmi_client().ExecQuery(query.text))
+        record_call(f'ExecQuery:{query.class_name}', time.perf_counter() - start)
+        return instances
     except Exception as e:
+        record_call(f'ExecQuery:{query.class_name}', time.perf_counter() - start, ok=False)
         raise RuntimeError(f'[!] 执行 WMI 查询失败: {e}') from e
 
 
-def install_uwf_service() -> bool:
+def stream_service_instances(
+    instance_name: str, convert: Optional[Callable[[WMIObject], Any]] = None, batch_size: Optional[int] = None,
+) -> Iterator:
+    """
+    以半同步、只向前的方式逐个获取指定 WMI 类的实例，内存占用与实例数量无关
+    :param instance_name: WMI 实例名
+    :param convert: 转换函数，例如 WMIObject.as_dict，默认产出 WMIObject
+    :param batch_size: 按批产出，每批为最多 batch_size 个记录的列表
+    :return: 生成器，提前退出时释放枚举器
+    """
+    if instance_name not in uwf_classes(): raise ValueError(f'[!] 无效的 WMI 实例名: {instance_name}')
+    start = time.perf_counter()
+    instances = WMIObject(get_wmi_client().InstancesOf(instance_name, STREAM_FLAGS))
+    record_call(f'InstancesOf:{instance_name}', time.perf_counter() - start)
+    return instances.stream(convert=convert, batch_size=batch_size)
+
+
+def stream_query(
+    query: Query, convert: Optional[Callable[[WMIObject], Any]] = None, batch_size: Optional[int] = None,
+) -> Iterator:
+    """
+    以半同步、只向前的方式逐个获取查询结果，内存占用与结果数量无关
+    :param query: WQL 查询
+    :param convert: 转换函数，例如 WMIObject.as_dict，默认产出 WMIObject
+    :param batch_size: 按批产出，每批为最多 batch_size 个记录的列表
+    :return: 生成器，提前退出时释放枚举器
+    """
+    if query.class_name not in uwf_classes(): raise ValueError(f'[!] 类名 "{query.class_name}" 不在已安装的UWF类列表中。')
+    start = time.perf_counter()
+    instances = WMIObject(get_wmi_client().ExecQuery(query.text, 'WQL', STREAM_FLAGS))
+    record_call(f'ExecQuery:{query.class_name}', time.perf_counter() - start)
+    return instances.stream(convert=convert, batch_size=batch_size)
+
+
+def dism_command() -> list[str]:
+    """
+    DISM 命令，可以通过环境变量 FREEZELOCK_DISM 替换（例如测试时使用模拟的 DISM）
+    :return: 命令及参数前缀
+    """
+    import shlex
+
+    override = os.environ.get(DISM_ENV)
+    if override: return shlex.split(override, posix=os.name != 'nt')
+    return ['DISM']
+
+
+def install_uwf_service(
+    on_progress: Optional[Callable[[float], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    timeout: Optional[float] = DISM_TIMEOUT,
+) -> bool:
     """
     安装 UWF 服务
+    :param on_progress: DISM 输出进度（0~100）时的回调
+    :param cancel_event: 设置后终止 DISM
+    :param timeout: DISM 超时秒数
     :return: True if the service was installed successfully, False otherwise.
     """
-    import subprocess
-    from win32com import client
+    from ..utils import stream_command
+    from .install_state import (
+        AVAILABLE, INSTALLED, PENDING_REBOOT, UNKNOWN, UWF_FEATURE_NAME, get_install_state, mark_installed,
+    )
 
-    try:
-        # 连接到 WMI 服务
-        wmi = client.GetObject(r'winmgmts:\\.\root\cimv2')
-        # 查询功能
-        features = wmi.ExecQuery(r'SELECT * FROM Win32_OptionalFeature WHERE Name = "Client-UnifiedWriteFilter"')
-
-        if not features: raise ValueError("未找到 UWF 功能")
-        feature = features[0]
-        if feature.InstallState == 1: return True  # UWF 已安装
-        elif feature.InstallState == 2:
-            try:
-                # 使用 DISM 安装 Windows 可选功能
-                result = subprocess.run(
-                    args=f"DISM /Online /Enable-Feature /FeatureName:Client-UnifiedWriteFilter /All",
-                    shell=True, capture_output=True, text=True
-                )
-                return result.returncode == 0
-            except Exception as e:
-                print(f"[!] 安装 UWF 功能失败: {e}")
-                return False
-        else:
-            return False
-    except Exception as e:
-        print(f"[!] Failed to install UWF service: {e}")
+    state = get_install_state()
+    if state in (INSTALLED, PENDING_REBOOT): return True  # UWF 已安装
+    if state not in (AVAILABLE, UNKNOWN):
+        print(f"[!] 当前系统不提供 UWF 功能: {state}")
         return False
 
+    # 使用 DISM 安装 Windows 可选功能，重启由界面提示
+    result = stream_command(
+        cmd=dism_command() + ['/Online', '/Enable-Feature', f'/FeatureName:{UWF_FEATURE_NAME}', '/All', '/NoRestart'],
+        on_progress=on_progress, cancel_event=cancel_event, timeout=timeout,
+    )
+    if result.cancelled or result.timed_out: return False
+    if result.returncode in (0, ERROR_SUCCESS_REBOOT_REQUIRED):
+        mark_installed()
+        return True
+    print(f"[!] 安装 UWF 功能失败 (DISM 退出码 {result.returncode}): {result.output[-500:]}")
+    return False
+
 
 def format_com_error(e: pywintypes.com_error) -> str:
     hresult, text, excepinfo, argerr = e.args
@@ -91,9 +156,20 @@ def format_com_error(e: pywintypes.com_error) -> str:
     if hresult == -2147352567:  # 处理 HRESULT 0x80020009 (DISP_E_EXCEPTION)
         hresult = excepinfo[5]
     hresult = HRESULT.from_code(hresult)
+    _last_error.hresult = hresult.hex()  # 供审计日志记录本次调用的错误码
     return f'{hresult.describe()} (HRESULT: {hresult.hex()})'
 
 
+def pop_last_hresult() -> Optional[str]:
+    """
+    取出并清除当前线程最近一次 format_com_error 处理的 HRESULT
+    :return: 例如 "0x80041001"，没有错误时返回 None
+    """
+    hresult = getattr(_last_error, 'hresult', None)
+    _last_error.hresult = None
+    return hresult
+
+
 def get_filter_instance() -> Optional[WMIObject]:
     """
     获取 UWF 过滤器实例
@@ -111,18 +187,35 @@ def get_filter_instance() -> Optional[WMIObject]:
     return None
 
 
-def get_volume_instance(drive: str, current_session: bool = False) -> Optional[WMIObject]:
+def get_overlay_instance() -> Optional[WMIObject]:
+    """
+    获取 UWF 覆盖层实例
+    :return: UWF 覆盖层实例或 None
+    """
+    try:
+        instances = get_service_instance(instance_name='UWF_Overlay')
+        return instances[0]
+    except pywintypes.com_error as e:
+        print(f'[!] Querying UWF overlay failed: {format_com_error(e=e)}')
+    except IndexError:
+        print('[!] No UWF overlay instance found')
+    except Exception as e:
+        print(f'[!] An unexpected error occurred: {e}')
+    return None
+
+
+def get_volume_instance(drive: str, current_session: bool = False, columns: Optional[tuple[str, ...]] = ()) -> Optional[WMIObject]:
     """
     获取指定盘符的 UWF 卷实例
     :param drive: 盘符字符串，例如 "C:"
     :param current_session: 是否查询当前会话的卷
+    :param columns: 需要读取的属性，默认只返回键属性（足够调用实例方法），None 表示全部属性
     :return: UWF 卷实例或 None
     """
     try:
-        volumes = query_service_instance(
-            class_name='UWF_Volume',
-            query=f'SELECT * FROM UWF_Volume WHERE DriveLetter="{drive}" AND CurrentSession={str(current_session)}'
-        )
+        query = Query('UWF_Volume').where(DriveLetter=drive, CurrentSession=current_session)
+        if columns is not None: query = query.select(*KEY_PROPERTIES['UWF_Volume'], *columns)
+        volumes = query_service_instance(query=query)
         return volumes[0]
     except pywintypes.com_error as e:
         print(f'[!] Querying volume failed: {format_com_error(e=e)}')
@@ -133,15 +226,17 @@ def get_volume_instance(drive: str, current_session: bool = False) -> Optional[W
     return None
 
 
-def get_overlay_config_instance(current_session: bool = False) -> Optional[WMIObject]:
+def get_overlay_config_instance(current_session: bool = False, columns: Optional[tuple[str, ...]] = ()) -> Optional[WMIObject]:
     """
     Get the UWF OverlayConfig instance.
+    :param current_session: Whether to query the settings of the current session.
+    :param columns: Properties to read, only the key properties by default, None for all properties.
     :return: WMIObject representing the UWF OverlayConfig instance.
     """
     try:
-        instances = query_service_instance(
-            class_name='UWF_OverlayConfig', query=f'SELECT * FROM UWF_OverlayConfig WHERE CurrentSession={str(current_session)}'
-        )
+        query = Query('UWF_OverlayConfig').where(CurrentSession=current_session)
+        if columns is not None: query = query.select(*KEY_PROPERTIES['UWF_OverlayConfig'], *columns)
+        instances = query_service_instance(query=query)
         return instances[0]
     except pywintypes.com_error as e:
         print(f'[!] Querying UWF OverlayConfig failed: {format_com_error(e=e)}')
@@ -1,10 +1,33 @@
-from typing import Optional
+import fnmatch
+import ntpath
+import os
+import threading
+import time
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 
 import pywintypes
 
 from .base import BaseUWFService
-from .utils import format_com_error, get_volume_instance
+from .utils import format_com_error, get_service_instance, get_volume_instance
+from ..journal import audited
 from ..object import WMIObject
+from ..paths import canonicalize_volume_path
+
+
+@dataclass
+class CommitTreeResult:
+    """commit_tree 的执行结果"""
+    total: int = 0  # 匹配的覆盖文件数量
+    committed: int = 0  # 已提交的文件更改
+    deleted: int = 0  # 已提交的文件删除
+    cancelled: bool = False
+    failures: list[tuple[str, str]] = field(default_factory=list)  # [(文件路径, 错误信息)]
+
+    @property
+    def success(self) -> bool:
+        return not self.failures and not self.cancelled
 
 
 class UWFVolume(BaseUWFService):
@@ -15,6 +38,7 @@ class UWFVolume(BaseUWFService):
     """
 
     @staticmethod
+    @audited
     def add_exclusion(drive: str, file_name: str) -> bool:
         """
         添加排除项
@@ -22,6 +46,7 @@ class UWFVolume(BaseUWFService):
         :param file_name: 要排除的文件或注册表路径
         :return: 操作是否成功
         """
+        drive, file_name = canonicalize_volume_path(drive=drive, file_name=file_name)
         try:
             volume = get_volume_instance(drive=drive, current_session=False)
             if volume:
@@ -32,6 +57,7 @@ class UWFVolume(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def commit_file(drive: str, file_name: str) -> bool:
         """
         提交文件更改
@@ -39,6 +65,7 @@ class UWFVolume(BaseUWFService):
         :param file_name: 要提交的文件路径
         :return: 操作是否成功
         """
+        drive, file_name = canonicalize_volume_path(drive=drive, file_name=file_name)
         try:
             volume = get_volume_instance(drive=drive, current_session=False)
             if volume:
@@ -49,6 +76,7 @@ class UWFVolume(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def commit_file_deletion(drive: str, file_name: str) -> bool:
         """
         提交文件删除
@@ -56,6 +84,7 @@ class UWFVolume(BaseUWFService):
         :param file_name: 要删除的文件路径
         :return: 操作是否成功
         """
+        drive, file_name = canonicalize_volume_path(drive=drive, file_name=file_name)
         try:
             volume = get_volume_instance(drive=drive, current_session=False)
             if volume:
@@ -66,15 +95,102 @@ class UWFVolume(BaseUWFService):
         return False
 
     @staticmethod
-    def find_exclusion(drive: str, file_name: str) -> tuple[bool, Optional[bool]]:
+    @audited
+    def commit_tree(
+        drive: str, path: str = '\\', pattern: str = '*', max_workers: int = 4,
+        progress: Optional[Callable[[int, int], None]] = None, cancel_event: Optional[threading.Event] = None,
+        progress_interval: float = 0.2,
+    ) -> CommitTreeResult:
+        """
+        提交覆盖层中某个目录下的所有文件更改，已不存在的文件提交为删除
+        :param drive: 盘符字符串，例如 "C:"
+        :param path: 卷内目录，例如 "\\ProgramData\\App"
+        :param pattern: 文件名或相对路径的通配符，例如 "*.db"
+        :param max_workers: 并发提交的线程数
+        :param progress: 进度回调 progress(已完成数量, 总数)，最多每 progress_interval 秒调用一次
+        :param cancel_event: 设置后停止提交尚未开始的文件
+        :param progress_interval: 进度回调的最小间隔（秒）
+        :return: 执行结果
+        """
+        from ..com import COMThreadPool
+
+        result = CommitTreeResult()
+        drive, path = canonicalize_volume_path(drive=drive, file_name=path)
+        try:
+            overlay = get_service_instance(instance_name='UWF_Overlay')[0]
+            overlay_files = overlay.execute_method('GetOverlayFiles', Volume=drive).OverlayFiles or []
+        except pywintypes.com_error as e:
+            print(f'[!] Getting overlay files failed: {format_com_error(e=e)}')
+            result.failures.append((drive + path, format_com_error(e=e)))
+            return result
+
+        # 筛选目录下匹配通配符的文件。覆盖文件路径已是卷内的规范形式，只需大小写无关地比较前缀，
+        # 提交时使用覆盖层返回的原始 FileName
+        prefix = path.casefold().rstrip('\\') + '\\'
+        pattern = pattern.casefold()
+        files = []
+        for overlay_file in overlay_files:
+            file_name = overlay_file.FileName
+            key = file_name.casefold()
+            if not key.startswith(prefix): continue
+            relative = key[len(prefix):]
+            if fnmatch.fnmatchcase(ntpath.basename(relative), pattern) or fnmatch.fnmatchcase(relative, pattern):
+                files.append(file_name)
+        result.total = len(files)
+        if not files: return result
+        print(f'[+] 提交 {drive}{path} 下的 {len(files)} 个覆盖文件...')
+
+        local = threading.local()
+
+        def commit(file_name: str) -> str:
+            if cancel_event is not None and cancel_event.is_set(): return 'cancelled'
+            # 每个工作线程只查询一次卷实例
+            volume = getattr(local, 'volume', None)
+            if volume is None:
+                volume = local.volume = get_volume_instance(drive=drive, current_session=False)
+                if volume is None: raise RuntimeError(f'No UWF volume found for drive {drive}')
+            if os.path.exists(drive + file_name):
+                ret = volume.execute_method("CommitFile", FileName=file_name).ReturnValue
+                kind = 'committed'
+            else:
+                ret = volume.execute_method("CommitFileDeletion", FileName=file_name).ReturnValue
+                kind = 'deleted'
+            if ret != 0: raise RuntimeError(f'ReturnValue {ret}')
+            return kind
+
+        done, last_report = 0, 0.0
+        with COMThreadPool(max_workers=max(1, min(max_workers, len(files)))) as pool:
+            futures = {pool.submit(commit, file_name): file_name for file_name in files}
+            for future in as_completed(futures):
+                done += 1
+                try:
+                    kind = future.result()
+                    if kind == 'cancelled': result.cancelled = True
+                    else: setattr(result, kind, getattr(result, kind) + 1)
+                except pywintypes.com_error as e:
+                    result.failures.append((drive + futures[future], format_com_error(e=e)))
+                except Exception as e:
+                    result.failures.append((drive + futures[future], str(e)))
+                now = time.monotonic()
+                if progress and (now - last_report >= progress_interval or done == len(files)):
+                    last_report = now
+                    progress(done, len(files))
+
+        print(f'[+] 提交完成: {result.committed} 个更改, {result.deleted} 个删除, {len(result.failures)} 个失败' + ('（已取消）' if result.cancelled else ''))
+        return result
+
+    @staticmethod
+    def find_exclusion(drive: str, file_name: str, current_session: bool = False) -> tuple[bool, Optional[bool]]:
         """
         查找排除项
         :param drive: 盘符字符串，例如 "C:"
         :param file_name: 要查找的文件或注册表路径
+        :param current_session: 查找当前会话中已生效的排除项，默认为下次会话
         :return: 如果找到排除项则返回 True，否则返回 False
         """
+        drive, file_name = canonicalize_volume_path(drive=drive, file_name=file_name)
         try:
-            volume = get_volume_instance(drive=drive, current_session=False)
+            volume = get_volume_instance(drive=drive, current_session=current_session)
             if volume:
                 result = volume.execute_method("FindExclusion", FileName=file_name, bFound=False)
                 # result.bFound is a boolean indicating if the exclusion was found
@@ -102,6 +218,7 @@ class UWFVolume(BaseUWFService):
         return False, []
 
     @staticmethod
+    @audited
     def protect(drive: str) -> bool:
         """
         保护卷
@@ -118,6 +235,55 @@ class UWFVolume(BaseUWFService):
         return False
 
     @staticmethod
+    def protect_many(
+        drives: list[str], max_workers: int = 4, on_result: Optional[Callable[[str, bool], None]] = None,
+    ) -> dict[str, bool]:
+        """
+        并发保护多个卷
+        :param drives: 盘符列表，例如 ["C:", "D:"]
+        :param max_workers: 并发线程数
+        :param on_result: 每个卷完成时的回调 on_result(盘符, 是否成功)
+        :return: {盘符: 是否成功}
+        """
+        return UWFVolume._run_many(UWFVolume.protect, drives, max_workers=max_workers, on_result=on_result)
+
+    @staticmethod
+    def unprotect_many(
+        drives: list[str], max_workers: int = 4, on_result: Optional[Callable[[str, bool], None]] = None,
+    ) -> dict[str, bool]:
+        """
+        并发取消保护多个卷
+        :param drives: 盘符列表，例如 ["C:", "D:"]
+        :param max_workers: 并发线程数
+        :param on_result: 每个卷完成时的回调 on_result(盘符, 是否成功)
+        :return: {盘符: 是否成功}
+        """
+        return UWFVolume._run_many(UWFVolume.unprotect, drives, max_workers=max_workers, on_result=on_result)
+
+    @staticmethod
+    def _run_many(
+        operation: Callable[[str], bool], drives: list[str], max_workers: int,
+        on_result: Optional[Callable[[str, bool], None]],
+    ) -> dict[str, bool]:
+        """在 COM 线程池中对每个卷执行 operation，每个线程使用自己的 WMI 连接"""
+        from ..com import COMThreadPool
+
+        results = {}
+        if not drives: return results
+        with COMThreadPool(max_workers=max(1, min(max_workers, len(drives)))) as pool:
+            futures = {pool.submit(operation, drive=drive): drive for drive in drives}
+            for future in as_completed(futures):
+                drive = futures[future]
+                try:
+                    results[drive] = bool(future.result())
+                except Exception as e:
+                    print(f'[!] Volume operation on {drive} failed: {e}')
+                    results[drive] = False
+                if on_result: on_result(drive, results[drive])
+        return {drive: results[drive] for drive in drives}
+
+    @staticmethod
+    @audited
     def remove_all_exclusions(drive: str) -> bool:
         """
         移除所有排除项
@@ -134,6 +300,7 @@ class UWFVolume(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def remove_exclusion(drive: str, file_name: str) -> bool:
         """
         移除排除项
@@ -141,6 +308,7 @@ class UWFVolume(BaseUWFService):
         :param file_name: 要移除的文件或注册表路径
         :return: 操作是否成功
         """
+        drive, file_name = canonicalize_volume_path(drive=drive, file_name=file_name)
         try:
             volume = get_volume_instance(drive=drive, current_session=False)
             if volume:
@@ -151,6 +319,7 @@ class UWFVolume(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def set_bind_by_drive_letter(drive: str, bind: bool) -> bool:
         """
         设置BindByDriveLetter属性，该属性指示统一写入筛选器 (UWF) 卷是否通过驱动器号或卷名绑定到物理卷。
@@ -168,6 +337,7 @@ class UWFVolume(BaseUWFService):
         return False
 
     @staticmethod
+    @audited
     def unprotect(drive: str) -> bool:
         """
         取消保护卷
@@ -0,0 +1,204 @@
+"""
+覆盖层容量建议
+
+每次启动的覆盖层用量峰值（OverlayConsumption，MB）按固定的桶边界累计到数据目录的 overlay_history.json 中，
+文件大小与运行时间无关。本次启动的峰值单独记录，检测到新的启动时才计入直方图。只有数据目录的写入能在重启后
+保留时（见 storage.data_dir_persistent()）才写入文件，否则历史只保存在内存中；排除项由用户在设置页中确认添加。
+根据峰值分布的分位数给出最大缓存、覆盖层类型与阈值建议：
+    advice = recommend(load_history())
+    advice.maximum_size, advice.overlay_type, advice.warning, advice.critical
+分位数取所在桶的上边界，结果偏保守。
+"""
+import bisect
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .storage import data_dir_persistent, read_json, write_json
+
+HISTORY_FILE = 'overlay_history.json'
+# 桶上边界（MB），最后一个桶容纳超过 32768 MB 的峰值
+BUCKET_EDGES = (16, 32, 64, 128, 256, 384, 512, 768, 1024, 1536, 2048, 3072, 4096, 6144, 8192, 12288, 16384, 24576, 32768)
+
+WARNING_PERCENTILE = 90
+CRITICAL_PERCENTILE = 99
+HEADROOM = 1.25  # 最大缓存相对临界阈值的余量
+MIN_BOOTS = 5  # 少于该启动次数时建议仅供参考
+MIN_SIZE, MAX_SIZE, SIZE_STEP = 1024, 32768, 128  # 与设置页最大缓存输入框一致
+THRESHOLD_STEP = 64
+RAM_FRACTION = 0.25  # 最大缓存不超过物理内存的该比例时建议使用 RAM 模式
+
+_lock = threading.Lock()
+_history: Optional['ConsumptionHistory'] = None
+
+
+def _round_up(value: float, step: int) -> int:
+    return max(step, int(math.ceil(value / step)) * step)
+
+
+class ConsumptionHistory:
+    """
+    每次启动的覆盖层用量峰值直方图
+    :param counts: 各桶的启动次数，长度为 len(BUCKET_EDGES) + 1
+    :param boot: 本次启动的标识（install_state.boot_id()）
+    :param peak: 本次启动的用量峰值（MB）
+    :param max_peak: 已计入直方图的最大峰值（MB）
+    """
+    def __init__(self, counts: Optional[list[int]] = None, boot: Optional[int] = None, peak: int = 0, max_peak: int = 0):
+        self.counts = list(counts) if counts and len(counts) == len(BUCKET_EDGES) + 1 else [0] * (len(BUCKET_EDGES) + 1)
+        self.boot = boot
+        self.peak = peak
+        self.max_peak = max_peak
+
+    @classmethod
+    def load(cls) -> 'ConsumptionHistory':
+        data = read_json(HISTORY_FILE, default=None)
+        if not isinstance(data, dict): return cls()
+        if list(data.get('edges') or ()) != list(BUCKET_EDGES):
+            print('[!] 覆盖层用量历史的桶边界已变化，重新开始统计')
+            return cls()
+        current = data.get('current') or {}
+        return cls(counts=data.get('counts'), boot=current.get('boot'), peak=int(current.get('peak') or 0), max_peak=int(data.get('max_peak') or 0))
+
+    def to_dict(self) -> dict:
+        return {
+            'edges': list(BUCKET_EDGES), 'counts': self.counts, 'max_peak': self.max_peak,
+            'current': {'boot': self.boot, 'peak': self.peak},
+        }
+
+    def _add(self, peak: int):
+        self.counts[bisect.bisect_left(BUCKET_EDGES, peak)] += 1
+        self.max_peak = max(self.max_peak, peak)
+
+    def record(self, consumption: int, boot: int, tolerance: int = 0) -> bool:
+        """
+        记录一次用量采样
+        :param consumption: 当前覆盖层用量（MB）
+        :param boot: 本次启动的标识
+        :param tolerance: 启动标识允许的误差（秒）
+        :return: 是否需要保存
+        """
+        if self.boot is None or abs(boot - self.boot) > tolerance:
+            if self.boot is not None: self._add(self.peak)  # 上一次启动结束，峰值计入直方图
+            self.boot, self.peak = boot, max(0, consumption)
+            return True
+        if consumption <= self.peak: return False
+        self.peak = consumption
+        return True
+
+    def bucket_counts(self, include_current: bool = True) -> list[int]:
+        """各桶的启动次数，include_current 为 True 时包含本次启动目前的峰值"""
+        counts = list(self.counts)
+        if include_current and self.boot is not None: counts[bisect.bisect_left(BUCKET_EDGES, self.peak)] += 1
+        return counts
+
+    @property
+    def boots(self) -> int:
+        return sum(self.counts) + (1 if self.boot is not None else 0)
+
+    def quantile(self, percentile: float) -> Optional[int]:
+        """
+        峰值分布的分位数（MB），取所在桶的上边界
+        :param percentile: 0~100
+        :return: 没有数据时返回 None
+        """
+        counts = self.bucket_counts()
+        total = sum(counts)
+        if not total: return None
+        rank = max(1, math.ceil(total * percentile / 100))
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                if index < len(BUCKET_EDGES): return BUCKET_EDGES[index]
+                return max(self.max_peak, self.peak)  # 超出最后一个桶时用实际观测到的最大值
+        return None
+
+
+def load_history() -> ConsumptionHistory:
+    """读取用量历史（返回进程内缓存的副本）"""
+    global _history
+    with _lock:
+        if _history is None: _history = ConsumptionHistory.load()
+        return ConsumptionHistory(counts=_history.counts, boot=_history.boot, peak=_history.peak, max_peak=_history.max_peak)
+
+
+def record_consumption(consumption: int) -> bool:
+    """
+    记录当前覆盖层用量，只在本次启动的峰值升高或检测到新的启动时写入文件
+    :param consumption: OverlayConsumption（MB）
+    :return: 是否写入成功（无需写入或数据目录不会保留时返回 True）
+    """
+    global _history
+    from .services.install_state import BOOT_TOLERANCE, boot_id
+
+    with _lock:
+        if _history is None: _history = ConsumptionHistory.load()
+        if not _history.record(int(consumption or 0), boot_id(), tolerance=BOOT_TOLERANCE): return True
+        snapshot = _history.to_dict()
+    if not data_dir_persistent(): return True  # 写入的文件会在重启后丢弃，只保留内存中的历史
+    return write_json(HISTORY_FILE, snapshot)
+
+
+def physical_memory() -> Optional[int]:
+    """物理内存大小（MB），无法获取时返回 None"""
+    try:
+        import win32api
+        return int(win32api.GlobalMemoryStatusEx()['TotalPhys']) // (1024 * 1024)
+    except Exception as e:
+        print(f'[!] 获取物理内存大小失败: {e}')
+        return None
+
+
+@dataclass
+class SizingAdvice:
+    """容量建议"""
+    boots: int = 0  # 参与统计的启动次数（含本次）
+    maximum_size: Optional[int] = None  # MB
+    overlay_type: Optional[str] = None  # "RAM" / "Disk"，无法获取物理内存时为 None
+    warning: Optional[int] = None  # MB
+    critical: Optional[int] = None  # MB
+    percentiles: dict[int, int] = field(default_factory=dict)  # {分位: 峰值 MB}
+    max_peak: int = 0  # 观测到的最大峰值（MB）
+    physical_memory: Optional[int] = None  # MB
+    histogram: list[tuple[str, int]] = field(default_factory=list)  # [("512-768 MB", 次数), ...]，只含非空桶
+
+    @property
+    def low_confidence(self) -> bool:
+        return self.boots < MIN_BOOTS
+
+
+def _bucket_label(index: int) -> str:
+    if index == 0: return f'≤{BUCKET_EDGES[0]} MB'
+    if index == len(BUCKET_EDGES): return f'>{BUCKET_EDGES[-1]} MB'
+    return f'{BUCKET_EDGES[index - 1]}-{BUCKET_EDGES[index]} MB'
+
+
+def recommend(
+    history: ConsumptionHistory, warning_percentile: float = WARNING_PERCENTILE,
+    critical_percentile: float = CRITICAL_PERCENTILE, memory: Optional[int] = -1,
+) -> SizingAdvice:
+    """
+    根据峰值分布给出容量建议
+    :param history: 用量历史
+    :param warning_percentile: 警告阈值取峰值的该分位数
+    :param critical_percentile: 临界阈值取峰值的该分位数，最大缓存在此基础上增加 HEADROOM 余量
+    :param memory: 物理内存（MB），默认自动获取，None 表示未知
+    :return: 没有历史数据时只包含 boots 与 physical_memory
+    """
+    advice = SizingAdvice(boots=history.boots, physical_memory=physical_memory() if memory == -1 else memory)
+    advice.histogram = [(_bucket_label(index), count) for index, count in enumerate(history.bucket_counts()) if count]
+    warning_peak = history.quantile(warning_percentile)
+    critical_peak = history.quantile(critical_percentile)
+    if warning_peak is None or critical_peak is None: return advice
+    advice.percentiles = {int(warning_percentile): warning_peak, int(critical_percentile): critical_peak}
+    advice.max_peak = max(history.max_peak, history.peak)
+
+    advice.maximum_size = min(MAX_SIZE, max(MIN_SIZE, _round_up(critical_peak * HEADROOM, SIZE_STEP)))
+    # 阈值需满足 警告 < 临界 ≤ 最大缓存
+    advice.critical = min(max(_round_up(critical_peak, THRESHOLD_STEP), 2 * THRESHOLD_STEP), advice.maximum_size)
+    advice.warning = min(_round_up(warning_peak, THRESHOLD_STEP), advice.critical - THRESHOLD_STEP)
+    if advice.physical_memory:
+        advice.overlay_type = 'RAM' if advice.maximum_size <= advice.physical_memory * RAM_FRACTION else 'Disk'
+    return advice
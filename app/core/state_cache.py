@@ -0,0 +1,65 @@
+"""
+上次已知状态缓存
+
+页面最近一次从 WMI 加载的数据按页面保存在数据目录的 state.json 中，启动时先用缓存渲染（标记为过期），
+再在后台重新加载。数据目录的写入无法在重启后保留时（卷受保护且未加入排除项），缓存只保存在内存中。
+"""
+import threading
+import time
+from typing import Any, Optional
+
+from .storage import data_dir_persistent, read_json, write_json
+
+STATE_FILE = 'state.json'
+
+_lock = threading.Lock()
+_state: Optional[dict] = None
+
+
+def _load() -> dict:
+    global _state
+    if _state is None:
+        data = read_json(STATE_FILE, default={})
+        _state = data if isinstance(data, dict) else {}
+    return _state
+
+
+def load_state(key: str) -> Optional[Any]:
+    """
+    读取缓存的页面数据
+    :param key: 页面缓存键，例如 "status"
+    :return: 缓存的数据，不存在时返回 None
+    """
+    with _lock:
+        entry = _load().get(key)
+    return entry.get('data') if isinstance(entry, dict) else None
+
+
+def state_saved_at(key: str) -> Optional[float]:
+    """缓存数据的保存时间（time.time() 时间戳）"""
+    with _lock:
+        entry = _load().get(key)
+    return entry.get('saved_at') if isinstance(entry, dict) else None
+
+
+def save_state(key: str, data: Any, persistent: Optional[bool] = None) -> bool:
+    """
+    保存页面数据，数据与缓存相同时不写入
+    :param key: 页面缓存键
+    :param data: 可 JSON 序列化的数据
+    :param persistent: 数据目录的写入能否在重启后保留，None 时调用 data_dir_persistent()（首次调用会查询 WMI，
+        在 GUI 线程中保存时应传入后台线程中检查的结果）
+    :return: 是否写入成功（未发生变化时返回 True，数据目录的写入无法在重启后保留时只更新内存并返回 False）
+    """
+    with _lock:
+        state = _load()
+        if state.get(key, {}).get('data') == data: return True
+        state[key] = {'saved_at': time.time(), 'data': data}
+        snapshot = dict(state)
+    try:
+        if persistent is None: persistent = data_dir_persistent()
+        if not persistent: return False  # 不为了缓存而修改 UWF 排除项
+    except Exception as e:
+        print(f'[!] 检查数据目录排除项失败: {e}')
+        return False
+    return write_json(STATE_FILE, snapshot)
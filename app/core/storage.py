@@ -0,0 +1,217 @@
+"""
+本地数据目录
+
+FreezeLock 的持久化数据（计划任务、状态缓存等）保存在 %ProgramData%\\FreezeLock 下，可以通过环境变量
+FREEZELOCK_DATA_DIR 覆盖。UWF 启用后写入会在重启时丢失，因此该目录需要加入 UWF 排除项。添加排除项会修改 UWF
+配置，只能在用户明确同意后（创建计划任务或在设置页确认）调用 ensure_data_dir_excluded()；其他可选的持久化数据
+在 data_dir_persistent() 为 False 时不写入。新添加的排除项下次启动才生效，本次运行中 data_dir_persistent() 仍为 False，
+data_dir_excluded() 表示下次启动后的状态。
+
+FreezeLock 以管理员权限运行，并会执行数据目录中配置文件（scheduler.json、overlay_policy.json）指定的动作，
+因此数据目录只允许 SYSTEM 和 Administrators 访问（首次使用时设置），读取这类配置时还会拒绝不属于管理员的文件。
+"""
+import json
+import os
+import sys
+import threading
+from typing import Any, Optional
+
+DATA_DIR_ENV = 'FREEZELOCK_DATA_DIR'
+
+_lock = threading.Lock()
+_persistent_lock = threading.Lock()
+_persistent: Optional[bool] = None  # 本次运行中数据目录的写入能否在重启后保留（当前会话的状态在重启前不会变化）
+_excluded: Optional[bool] = None  # 下次启动后数据目录的写入能否保留（添加排除项后更新）
+_secured_lock = threading.Lock()
+_secured: set[str] = set()  # 本进程已设置过权限的数据目录
+
+
+def _admin_sids() -> list:
+    """SYSTEM、Administrators 与当前进程用户的 SID"""
+    import win32api
+    import win32security
+
+    token = win32security.OpenProcessToken(win32api.GetCurrentProcess(), win32security.TOKEN_QUERY)
+    return [
+        win32security.CreateWellKnownSid(win32security.WinLocalSystemSid),
+        win32security.CreateWellKnownSid(win32security.WinBuiltinAdministratorsSid),
+        win32security.GetTokenInformation(token, win32security.TokenUser)[0],
+    ]
+
+
+def restrict_to_admins(path: str) -> bool:
+    """
+    使文件或目录只允许 SYSTEM 和 Administrators 访问（不继承上级权限，目录中的新文件继承该权限）
+    :return: 是否设置成功
+    """
+    try:
+        if sys.platform != 'win32':
+            os.chmod(path, 0o700 if os.path.isdir(path) else 0o600)
+            return True
+        import ntsecuritycon
+        import win32security
+
+        dacl = win32security.ACL()
+        inherit = win32security.OBJECT_INHERIT_ACE | win32security.CONTAINER_INHERIT_ACE if os.path.isdir(path) else 0
+        for sid in _admin_sids()[:2]:
+            dacl.AddAccessAllowedAceEx(win32security.ACL_REVISION, inherit, ntsecuritycon.FILE_ALL_ACCESS, sid)
+        win32security.SetNamedSecurityInfo(
+            path, win32security.SE_FILE_OBJECT,
+            win32security.DACL_SECURITY_INFORMATION | win32security.PROTECTED_DACL_SECURITY_INFORMATION,
+            None, None, dacl, None,
+        )
+        return True
+    except Exception as e:
+        print(f'[!] 设置 {path} 的访问权限失败: {e}')
+        return False
+
+
+def is_admin_owned(path: str) -> bool:
+    """文件的所有者是否为 SYSTEM、Administrators 或当前（已提升权限的）用户"""
+    try:
+        if sys.platform != 'win32': return os.stat(path).st_uid in (0, os.getuid())
+        import win32security
+
+        owner = win32security.GetFileSecurity(path, win32security.OWNER_SECURITY_INFORMATION).GetSecurityDescriptorOwner()
+        return any(owner == sid for sid in _admin_sids())
+    except Exception as e:
+        print(f'[!] 读取 {path} 的所有者失败: {e}')
+        return False
+
+
+def get_data_dir() -> str:
+    """
+    获取数据目录（不存在时创建）
+    :return: 数据目录的绝对路径
+    """
+    path = os.environ.get(DATA_DIR_ENV)
+    if not path:
+        base = os.environ.get('ProgramData') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+        path = os.path.join(base, 'FreezeLock')
+    path = os.path.abspath(path)
+    os.makedirs(path, exist_ok=True)
+    with _secured_lock:
+        if path not in _secured:
+            _secured.add(path)
+            restrict_to_admins(path)
+    return path
+
+
+def data_path(name: str) -> str:
+    """
+    获取数据目录下的文件路径
+    :param name: 文件名，例如 "scheduler.json"
+    """
+    return os.path.join(get_data_dir(), name)
+
+
+def read_json(name: str, default: Any = None) -> Any:
+    """
+    读取数据目录下的 JSON 文件，文件不存在或损坏时返回 default
+    """
+    try:
+        with open(data_path(name), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f'[!] 读取 {name} 失败: {e}')
+        return default
+
+
+def read_config(name: str, default: Any = None) -> Any:
+    """
+    读取会触发动作的配置文件，文件不属于管理员时拒绝加载并返回 default
+    """
+    path = data_path(name)
+    if not os.path.exists(path): return default
+    if not is_admin_owned(path):
+        print(f'[!] {path} 不属于管理员，拒绝加载')
+        return default
+    return read_json(name, default=default)
+
+
+def write_json(name: str, data: Any) -> bool:
+    """
+    原子写入数据目录下的 JSON 文件（先写临时文件再替换）
+    :return: 是否写入成功
+    """
+    path = data_path(name)
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with _lock:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+        return True
+    except OSError as e:
+        print(f'[!] 写入 {name} 失败: {e}')
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+
+
+def _session_persistent(drive: str, file_name: str, current_session: bool) -> bool:
+    """数据目录所在卷在指定会话中不受保护，或数据目录已加入该会话的排除项"""
+    from .services.utils import get_volume_instance
+    from .services.volume import UWFVolume
+
+    volume = get_volume_instance(drive=drive, current_session=current_session, columns=('Protected',))
+    if volume is None or not volume.Protected: return True
+    success, found = UWFVolume.find_exclusion(drive=drive, file_name=file_name, current_session=current_session)
+    return bool(success and found)
+
+
+def data_dir_persistent() -> bool:
+    """
+    只读检查本次运行中数据目录的写入能否在重启后保留：未安装 UWF、所在卷在当前会话中不受保护，或排除项已在当前会话中生效。
+    不修改 UWF 配置，结果按进程缓存。
+    """
+    global _persistent
+    with _persistent_lock:
+        if _persistent is not None: return _persistent
+        from .paths import canonicalize
+        from .services import is_uwf_installed
+
+        path = canonicalize(get_data_dir())
+        _persistent = not is_uwf_installed() or _session_persistent(path.drive, path.file_name, current_session=True)
+        if not _persistent: print(f'[*] 数据目录 {path.path} 的 UWF 排除项未在当前会话中生效，可选的缓存数据不会写入，审计日志会在重启后丢失')
+        return _persistent
+
+
+def data_dir_excluded() -> bool:
+    """
+    只读检查下次启动后数据目录的写入能否保留：未安装 UWF、所在卷在下次会话中不受保护，或已加入排除项。
+    不修改 UWF 配置，结果按进程缓存。
+    """
+    global _excluded
+    with _persistent_lock:
+        if _excluded is not None: return _excluded
+        from .paths import canonicalize
+        from .services import is_uwf_installed
+
+        path = canonicalize(get_data_dir())
+        _excluded = not is_uwf_installed() or _session_persistent(path.drive, path.file_name, current_session=False)
+        return _excluded
+
+
+def ensure_data_dir_excluded() -> bool:
+    """
+    确保数据目录已加入 UWF 排除项，会修改 UWF 配置，只能在用户明确同意后调用。
+    排除项下次启动才生效，不改变本次运行中 data_dir_persistent() 的结果。
+    :return: 数据目录是否已排除或已成功添加排除
+    """
+    if data_dir_excluded(): return True
+    global _excluded
+    from .paths import canonicalize
+    from .services.volume import UWFVolume
+
+    with _persistent_lock:
+        if _excluded: return True
+        path = canonicalize(get_data_dir())
+        print(f'[+] 将数据目录加入排除项（下次启动生效）: {path.path}')
+        if not UWFVolume.add_exclusion(drive=path.drive, file_name=path.file_name): return False
+        _excluded = True
+        return True
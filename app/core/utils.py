@@ -1,4 +1,13 @@
+import locale
+import re
 import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+PROGRESS_PATTERN = re.compile(r'(\d{1,3}(?:[.,]\d+)?)\s*%')
+PROGRESS_BAR_PATTERN = re.compile(rb'\[[^\[\]]*%[^\[\]]*\]\s*$')  # 完整的进度条，例如 "[===  10.0%   ]"
 
 
 def run_command(cmd: list[str]) -> tuple[bool, str]:
@@ -13,3 +22,121 @@ def run_command(cmd: list[str]) -> tuple[bool, str]:
         return True, result.stdout.strip()
     except subprocess.CalledProcessError as e:
         return False, e.stderr.strip() or str(e)
+
+
+@dataclass
+class CommandResult:
+    """stream_command 的执行结果"""
+    returncode: Optional[int]
+    output: str
+    cancelled: bool = False
+    timed_out: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.cancelled and not self.timed_out
+
+
+def parse_progress(line: str) -> Optional[float]:
+    """
+    解析一行输出中的百分比，例如 DISM 的 "[=====     10.0%      ]"
+    :return: 0~100 之间的进度，没有百分比时返回 None
+    """
+    match = PROGRESS_PATTERN.search(line)
+    if match is None: return None
+    value = float(match.group(1).replace(',', '.'))
+    return value if 0 <= value <= 100 else None
+
+
+def stream_command(
+    cmd: list[str],
+    on_line: Optional[Callable[[str], None]] = None,
+    on_progress: Optional[Callable[[float], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    timeout: Optional[float] = None,
+    encoding: Optional[str] = None,
+) -> CommandResult:
+    """
+    执行命令并逐行读取输出（\\r 也视为换行，DISM 用它刷新进度条）
+    :param cmd: 命令及参数
+    :param on_line: 每读到一行非空输出时的回调
+    :param on_progress: 输出中出现新的百分比时的回调
+    :param cancel_event: 设置后终止进程
+    :param timeout: 超时秒数，超时后终止进程
+    :param encoding: 输出编码，默认使用系统首选编码
+    :return: 执行结果
+    """
+    encoding = encoding or locale.getpreferredencoding(False)
+    try:
+        process = subprocess.Popen(
+            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            shell=False, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0),
+        )
+    except OSError as e:
+        print(f'[!] 启动命令失败 {cmd[0]}: {e}')
+        return CommandResult(returncode=None, output=str(e))
+
+    lines: list[str] = []
+    last_progress = None
+
+    def emit(raw: bytes):
+        nonlocal last_progress
+        line = raw.decode(encoding, errors='replace').strip()
+        if not line: return
+        lines.append(line)
+        if on_line: on_line(line)
+        progress = parse_progress(line)
+        if progress is not None and progress != last_progress:
+            last_progress = progress
+            if on_progress: on_progress(progress)
+
+    def reader():
+        buffer = b''
+        while True:
+            chunk = process.stdout.read1(4096)
+            if not chunk: break
+            buffer += chunk
+            parts = re.split(rb'[\r\n]', buffer)
+            buffer = parts.pop()
+            # DISM 在进度条之前输出 \r，最新的进度条要等到下一次刷新才有分隔符，完整时立即处理
+            if PROGRESS_BAR_PATTERN.search(buffer):
+                parts.append(buffer)
+                buffer = b''
+            for part in parts:
+                emit(part)
+        if buffer: emit(buffer)
+
+    reader_thread = threading.Thread(target=reader, name='CommandReader', daemon=True)
+    reader_thread.start()
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    cancelled = timed_out = False
+    while process.poll() is None:
+        if cancel_event is not None and cancel_event.is_set():
+            cancelled = True
+        elif deadline is not None and time.monotonic() >= deadline:
+            timed_out = True
+        if cancelled or timed_out:
+            print(f'[!] 命令{"已取消" if cancelled else "执行超时"}，终止进程: {cmd[0]}')
+            _terminate(process)
+            break
+        try:
+            process.wait(timeout=0.1)
+        except subprocess.TimeoutExpired:
+            pass
+
+    reader_thread.join(timeout=5)
+    process.stdout.close()
+    return CommandResult(
+        returncode=process.returncode, output='\n'.join(lines), cancelled=cancelled, timed_out=timed_out,
+    )
+
+
+def _terminate(process: subprocess.Popen, grace: float = 5.0):
+    """先请求进程退出，超过 grace 秒后强制结束"""
+    process.terminate()
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
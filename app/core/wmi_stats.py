@@ -0,0 +1,31 @@
+"""
+WMI 调用统计
+
+服务层在每次 WMI 调用处累计次数、耗时与错误数，由 metrics 模块导出。该模块在每次启动时都会被导入，
+只能依赖标准库中的轻量模块。
+"""
+import threading
+
+_calls_lock = threading.Lock()
+_calls: dict[str, list] = {}  # 调用名 -> [次数, 总耗时秒数, 错误数]
+
+
+def record_call(name: str, seconds: float, ok: bool = True):
+    """
+    累计一次 WMI 调用
+    :param name: 调用名，例如 "ExecQuery:UWF_Volume" 或 "ExecMethod:Protect"
+    :param seconds: 耗时
+    :param ok: 是否成功
+    """
+    with _calls_lock:
+        stats = _calls.get(name)
+        if stats is None: stats = _calls[name] = [0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += seconds
+        if not ok: stats[2] += 1
+
+
+def call_stats() -> dict[str, tuple[int, float, int]]:
+    """WMI 调用统计的副本 {调用名: (次数, 总耗时秒数, 错误数)}"""
+    with _calls_lock:
+        return {name: tuple(stats) for name, stats in _calls.items()}
@@ -0,0 +1,12 @@
+from .client import AgentClient, AgentRequestError
+from .orchestrator import ChangeSet, FleetOrchestrator, Host, RolloutReport, load_inventory
+
+__all__ = [
+    'AgentClient',
+    'AgentRequestError',
+    'ChangeSet',
+    'FleetOrchestrator',
+    'Host',
+    'RolloutReport',
+    'load_inventory',
+]
@@ -0,0 +1,37 @@
+"""
+用法：python -m app.fleet --inventory hosts.json --changes change.json --report rollout.json [--canary 1] [--wave-size 10]
+"""
+import argparse
+import sys
+
+from .orchestrator import ROLLOUT_COMPLETED, ChangeSet, FleetOrchestrator, load_inventory
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m app.fleet', description='向多台主机批量发布 UWF 配置变更')
+    parser.add_argument('--inventory', required=True, help='主机清单 JSON 文件')
+    parser.add_argument('--changes', required=True, help='变更 JSON 文件')
+    parser.add_argument('--report', required=True, help='进度报告文件，已存在时续跑')
+    parser.add_argument('--canary', type=int, default=1, help='金丝雀主机数量')
+    parser.add_argument('--wave-size', type=int, default=10, help='每批主机数量')
+    parser.add_argument('--max-workers', type=int, default=4, help='每批内的最大并发数')
+    parser.add_argument('--max-error-rate', type=float, default=0.1, help='允许的失败比例，超过时停止')
+    parser.add_argument('--no-verify', action='store_true', help='应用后不读回状态检查')
+    parser.add_argument('--no-retry-failed', action='store_true', help='续跑时不重试之前失败的主机')
+    args = parser.parse_args(argv)
+
+    try:
+        orchestrator = FleetOrchestrator(
+            hosts=load_inventory(args.inventory), change_set=ChangeSet.load(args.changes), report_path=args.report,
+            canary=args.canary, wave_size=args.wave_size, max_workers=args.max_workers,
+            max_error_rate=args.max_error_rate, verify=not args.no_verify, retry_failed=not args.no_retry_failed,
+        )
+    except (OSError, ValueError, KeyError) as e:
+        print(f'[!] {e}')
+        return 2
+    report = orchestrator.run()
+    return 0 if report.state == ROLLOUT_COMPLETED and not report.counts()['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+FreezeLock 代理的 HTTP 客户端（见 app.agent.server）
+"""
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Optional
+
+DEFAULT_TIMEOUT = 30.0  # 秒
+
+
+class AgentRequestError(Exception):
+    """代理不可达或返回了错误"""
+
+
+class AgentClient:
+    """
+    访问一台主机上的 FreezeLock 代理
+    :param url: 代理地址，例如 "http://127.0.0.1:19401"（经 SSH 端口转发）
+    :param token: 访问令牌（FREEZELOCK_AGENT_TOKEN）
+    :param timeout: 单个请求的超时秒数
+    """
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, path: str, body: Optional[dict] = None) -> Any:
+        headers = {'Content-Type': 'application/json'}
+        if self.token: headers['Authorization'] = f'Bearer {self.token}'
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers=headers, method='POST' if data is not None else 'GET')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise AgentRequestError(f'{self.url}{path}: HTTP {e.code} {message}') from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise AgentRequestError(f'{self.url}{path}: {e}') from e
+
+    def status(self) -> dict:
+        return self._request('/status')
+
+    def volumes(self) -> list[dict]:
+        return self._request('/volumes')
+
+    def exclusions(self, drive: str) -> list[str]:
+        return self._request(f'/exclusions?drive={urllib.request.quote(drive)}')
+
+    def batch(self, operations: list[dict], atomic: bool = False) -> dict:
+        return self._request('/batch', {'operations': operations, 'atomic': atomic})
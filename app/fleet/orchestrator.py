@@ -0,0 +1,350 @@
+"""
+批量发布 UWF 配置变更
+
+每台主机运行 FreezeLock 代理（main.py --agent），编排器通过代理的 JSON API 把同一组变更应用到清单中的所有主机：
+先在金丝雀主机上执行，然后按批次（wave）推进，每批内最多 max_workers 台并发。每台主机应用后都会读回状态，
+确认变更确实生效（健康检查），一批全部完成且错误率未超过 max_error_rate 时才进入下一批；金丝雀失败或错误率
+超过阈值时自动停止。进度在每台主机完成后写入报告文件，重新运行时跳过已成功的主机，从中断处继续。
+
+代理只监听回环地址，编排器通过 SSH 端口转发访问各主机：
+    ssh -N -L 19401:127.0.0.1:9478 admin@kiosk-01
+清单中的地址是转发后的本机端口，例如 "http://127.0.0.1:19401"，令牌见各主机数据目录的 agent_token.json。
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+from .client import AgentClient, AgentRequestError
+
+HOST_PENDING = 'pending'
+HOST_SUCCEEDED = 'succeeded'
+HOST_FAILED = 'failed'
+
+ROLLOUT_RUNNING = 'running'
+ROLLOUT_COMPLETED = 'completed'
+ROLLOUT_HALTED = 'halted'
+
+# 代理支持的写操作：名称 -> {参数: 类型}，与 app.agent.agent 中的写操作一致（编排器不导入代理，可以在非 Windows 上运行）
+OPERATIONS: dict[str, dict[str, type]] = {
+    'enable': {},
+    'disable': {},
+    'protect': {'drive': str},
+    'unprotect': {'drive': str},
+    'add_exclusion': {'drive': str, 'path': str},
+    'remove_exclusion': {'drive': str, 'path': str},
+    'set_overlay_type': {'type': str},
+    'set_maximum_size': {'size': int},
+    'set_thresholds': {'warning': int, 'critical': int},
+}
+TRANSACTION_WRITES = ('protect', 'add_exclusion', 'set_overlay_type', 'set_maximum_size', 'enable')
+
+
+@dataclass
+class Host:
+    """
+    清单中的一台主机
+    :param name: 主机名，在清单中唯一
+    :param url: 代理地址
+    :param token: 访问令牌
+    """
+    name: str
+    url: str
+    token: Optional[str] = None
+
+
+def load_inventory(path: str) -> list[Host]:
+    """
+    读取主机清单：[{"name": "kiosk-01", "url": "http://127.0.0.1:19401", "token": "..."}, ...]
+    :param path: JSON 文件路径
+    :return: 主机列表
+    """
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    hosts = [Host(name=entry['name'], url=entry['url'], token=entry.get('token')) for entry in entries]
+    names = [host.name for host in hosts]
+    if len(set(names)) != len(names): raise ValueError('主机清单中存在重复的主机名')
+    return hosts
+
+
+def _normalize_path(path: str) -> str:
+    path = path.replace('/', '\\')
+    return path.rstrip('\\').lower() if len(path) > 1 else path
+
+
+@dataclass
+class ChangeSet:
+    """
+    一组变更，格式与代理的 /batch 请求相同
+    :param operations: [{"op": "protect", "drive": "D:"}, ...]
+    :param atomic: 在每台主机上按事务执行，失败时回滚
+    """
+    operations: list[dict]
+    atomic: bool = True
+
+    def __post_init__(self):
+        self.validate()
+
+    def validate(self):
+        """检查每个操作的名称与参数，发布前发现错误，而不是在主机上失败"""
+        if not isinstance(self.operations, list) or not self.operations: raise ValueError('operations 必须是非空列表')
+        for index, operation in enumerate(self.operations):
+            if not isinstance(operation, dict): raise ValueError(f'第 {index + 1} 个操作必须是对象')
+            name = operation.get('op')
+            if name not in OPERATIONS: raise ValueError(f'第 {index + 1} 个操作未知: {name}')
+            if self.atomic and name not in TRANSACTION_WRITES: raise ValueError(f'{name} 不支持在事务中执行')
+            for key, kind in OPERATIONS[name].items():
+                value = operation.get(key)
+                if value in (None, '') or not isinstance(value, kind) or isinstance(value, bool):
+                    raise ValueError(f'第 {index + 1} 个操作 {name} 的参数 {key} 缺失或类型错误')
+
+    @classmethod
+    def load(cls, path: str) -> 'ChangeSet':
+        """读取并检查变更文件：{"atomic": true, "operations": [...]}"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not isinstance(data.get('operations'), list) or not data['operations']:
+            raise ValueError('变更文件缺少 operations')
+        return cls(operations=data['operations'], atomic=bool(data.get('atomic', True)))
+
+    @property
+    def digest(self) -> str:
+        """变更内容的摘要，用于确认续跑的报告属于同一组变更"""
+        text = json.dumps({'operations': self.operations, 'atomic': self.atomic}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def verify(self, client: AgentClient) -> list[str]:
+        """
+        读回主机状态，检查每个变更是否已生效
+        :return: 未生效的变更描述，空列表表示通过
+        """
+        problems = []
+        status, volumes, exclusions = None, None, {}
+        for operation in self.operations:
+            name = operation.get('op')
+            if name in ('enable', 'disable', 'set_overlay_type', 'set_maximum_size', 'set_thresholds') and status is None:
+                status = client.status()
+            if name in ('protect', 'unprotect') and volumes is None:
+                volumes = {volume['drive'].upper(): volume['protected'] for volume in client.volumes() if volume['session'] == 'next'}
+            if name in ('add_exclusion', 'remove_exclusion'):
+                drive = operation['drive'].upper()
+                if drive not in exclusions: exclusions[drive] = {_normalize_path(path) for path in client.exclusions(drive)}
+
+            if name in ('enable', 'disable'):
+                if status.get('filter', {}).get('next') != (name == 'enable'): problems.append(f'{name}: 过滤器下次启动状态不符')
+            elif name in ('protect', 'unprotect'):
+                if volumes.get(operation['drive'].upper()) != (name == 'protect'): problems.append(f'{name} {operation["drive"]}: 卷保护状态不符')
+            elif name in ('add_exclusion', 'remove_exclusion'):
+                present = _normalize_path(operation['path']) in exclusions[operation['drive'].upper()]
+                if present != (name == 'add_exclusion'): problems.append(f'{name} {operation["drive"]}{operation["path"]}: 排除项状态不符')
+            elif name == 'set_overlay_type':
+                if status.get('overlay', {}).get('type') != operation['type']: problems.append(f'{name}: 覆盖层类型不符')
+            elif name == 'set_maximum_size':
+                if status.get('overlay', {}).get('maximum_size') != operation['size']: problems.append(f'{name}: 覆盖层大小不符')
+            elif name == 'set_thresholds':
+                overlay = status.get('overlay', {})
+                if (overlay.get('WarningOverlayThreshold'), overlay.get('CriticalOverlayThreshold')) != (operation['warning'], operation['critical']):
+                    problems.append(f'{name}: 覆盖层阈值不符')
+        return problems
+
+
+@dataclass
+class RolloutReport:
+    """
+    发布进度报告，每台主机完成后保存，可用于续跑
+    :param path: 报告文件路径，为 None 时不保存
+    """
+    path: Optional[str]
+    change_set: str = ''
+    state: str = ROLLOUT_RUNNING
+    halt_reason: Optional[str] = None
+    waves: list[list[str]] = field(default_factory=list)
+    hosts: dict[str, dict] = field(default_factory=dict)
+    updated: str = ''
+
+    @classmethod
+    def load(cls, path: str) -> Optional['RolloutReport']:
+        """读取已有报告，不存在时返回 None"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(
+            path=path, change_set=data.get('change_set', ''), state=data.get('state', ROLLOUT_RUNNING),
+            halt_reason=data.get('halt_reason'), waves=data.get('waves', []), hosts=data.get('hosts', {}),
+            updated=data.get('updated', ''),
+        )
+
+    def save(self):
+        """原子写入报告文件"""
+        self.updated = datetime.now().astimezone().isoformat(timespec='seconds')
+        if not self.path: return
+        data = {
+            'change_set': self.change_set, 'state': self.state, 'halt_reason': self.halt_reason,
+            'updated': self.updated, 'summary': self.counts(), 'waves': self.waves, 'hosts': self.hosts,
+        }
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def counts(self) -> dict[str, int]:
+        """各状态的主机数量"""
+        counts = {HOST_PENDING: 0, HOST_SUCCEEDED: 0, HOST_FAILED: 0}
+        for host in self.hosts.values():
+            counts[host['status']] = counts.get(host['status'], 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        counts = self.counts()
+        text = f'{self.state}: 成功 {counts[HOST_SUCCEEDED]}，失败 {counts[HOST_FAILED]}，未执行 {counts[HOST_PENDING]}'
+        if self.halt_reason: text += f'（{self.halt_reason}）'
+        return text
+
+
+class FleetOrchestrator:
+    """
+    批量发布编排器
+    :param hosts: 主机清单，按该顺序划分金丝雀与批次
+    :param change_set: 变更
+    :param report_path: 报告文件路径，已存在且属于同一组变更时续跑
+    :param canary: 金丝雀主机数量，金丝雀中任意一台失败即停止
+    :param wave_size: 之后每批的主机数量
+    :param max_workers: 每批内的最大并发数
+    :param max_error_rate: 允许的失败比例（按本次运行已执行的主机计算），超过时停止
+    :param verify: 应用后读回状态检查变更是否生效
+    :param retry_failed: 续跑时重试之前失败的主机
+    :param on_event: 进度回调，参数为一行描述
+    """
+    def __init__(
+        self, hosts: list[Host], change_set: ChangeSet, report_path: Optional[str] = None,
+        canary: int = 1, wave_size: int = 10, max_workers: int = 4, max_error_rate: float = 0.1,
+        verify: bool = True, retry_failed: bool = True, on_event: Optional[Callable[[str], None]] = None,
+    ):
+        if wave_size < 1 or max_workers < 1 or canary < 0: raise ValueError('canary、wave_size 与 max_workers 必须为正数')
+        if not 0 <= max_error_rate <= 1: raise ValueError('max_error_rate 必须在 0 到 1 之间')
+        self.hosts = {host.name: host for host in hosts}
+        if len(self.hosts) != len(hosts): raise ValueError('主机清单中存在重复的主机名')
+        self.change_set = change_set
+        self.canary = canary
+        self.wave_size = wave_size
+        self.max_workers = max_workers
+        self.max_error_rate = max_error_rate
+        self.verify = verify
+        self.retry_failed = retry_failed
+        self.on_event = on_event or print
+        self._lock = threading.Lock()
+        self.report = self._load_report(report_path)
+
+    def _load_report(self, path: Optional[str]) -> RolloutReport:
+        report = RolloutReport.load(path) if path else None
+        if report is not None:
+            if report.change_set != self.change_set.digest:
+                raise ValueError(f'报告 {path} 属于另一组变更，请换一个报告文件')
+            for name in self.hosts:
+                report.hosts.setdefault(name, {'status': HOST_PENDING, 'attempts': 0, 'error': None})
+            self.on_event(f'[*] 续跑发布：{report.summary()}')
+        else:
+            report = RolloutReport(path=path, change_set=self.change_set.digest)
+            report.hosts = {name: {'status': HOST_PENDING, 'attempts': 0, 'error': None} for name in self.hosts}
+        report.waves = self.plan()
+        return report
+
+    def plan(self) -> list[list[str]]:
+        """金丝雀一批，其余主机按 wave_size 分批"""
+        names = list(self.hosts)
+        waves = [names[:self.canary]] if self.canary else []
+        rest = names[self.canary:]
+        waves.extend(rest[i:i + self.wave_size] for i in range(0, len(rest), self.wave_size))
+        return [wave for wave in waves if wave]
+
+    def _apply_host(self, host: Host) -> Optional[str]:
+        """在一台主机上应用变更并检查，返回错误描述，成功时返回 None"""
+        client = AgentClient(host.url, token=host.token)
+        try:
+            result = client.batch(self.change_set.operations, atomic=self.change_set.atomic)
+            if not result.get('success'):
+                failed = [entry['op'] for entry in result.get('results', []) if entry.get('success') is False or entry.get('status') == 'failed']
+                return f'应用失败: {", ".join(failed) or "未知原因"}' + ('（已回滚）' if result.get('rolled_back') else '')
+            if self.verify:
+                problems = self.change_set.verify(client)
+                if problems: return '健康检查失败: ' + '; '.join(problems)
+        except AgentRequestError as e:
+            return str(e)
+        except Exception as e:  # 例如代理返回了意外的结构，只记为该主机失败，不中断发布
+            return f'{type(e).__name__}: {e}'
+        return None
+
+    def _record(self, name: str, wave: int, error: Optional[str]):
+        with self._lock:
+            entry = self.report.hosts[name]
+            entry.update(
+                status=HOST_FAILED if error else HOST_SUCCEEDED, wave=wave, error=error,
+                attempts=entry.get('attempts', 0) + 1,
+                finished=datetime.now().astimezone().isoformat(timespec='seconds'),
+            )
+            self.report.save()
+
+    def _halt(self, reason: str) -> RolloutReport:
+        self.report.state = ROLLOUT_HALTED
+        self.report.halt_reason = reason
+        self.report.save()
+        self.on_event(f'[!] 发布已停止: {reason}')
+        return self.report
+
+    def run(self) -> RolloutReport:
+        """
+        按批次执行发布
+        :return: 报告
+        """
+        self.report.state = ROLLOUT_RUNNING
+        self.report.halt_reason = None
+        self.report.save()
+        attempted = failed = 0
+        for index, wave in enumerate(self.report.waves):
+            todo = [
+                name for name in wave
+                if self.report.hosts[name]['status'] == HOST_PENDING
+                or (self.retry_failed and self.report.hosts[name]['status'] == HOST_FAILED)
+            ]
+            is_canary = index == 0 and self.canary > 0
+            label = '金丝雀' if is_canary else f'第 {index} 批'
+            if not todo: continue
+            self.on_event(f'[+] {label}: {len(todo)} 台主机')
+
+            allowed = 0 if is_canary else int(self.max_error_rate * len(todo))
+            wave_failed = 0
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='FleetWorker') as executor:
+                futures = {executor.submit(self._apply_host, self.hosts[name]): name for name in todo}
+                for future in as_completed(futures):
+                    if future.cancelled(): continue  # 超过错误率后取消的主机保持 pending
+                    name = futures[future]
+                    error = future.result()
+                    self._record(name, index, error)
+                    attempted += 1
+                    if error:
+                        failed += 1
+                        wave_failed += 1
+                        self.on_event(f'[!] {name}: {error}')
+                        if wave_failed > allowed:
+                            for pending in futures: pending.cancel()  # 只能取消尚未开始的主机
+                    else:
+                        self.on_event(f'[✓] {name}')
+
+            if is_canary and wave_failed:
+                return self._halt(f'金丝雀主机失败 {wave_failed} 台')
+            if wave_failed > allowed:
+                return self._halt(f'{label}失败 {wave_failed}/{len(todo)} 台，超过错误率阈值 {self.max_error_rate:.0%}')
+            if attempted and failed / attempted > self.max_error_rate:
+                return self._halt(f'累计错误率 {failed / attempted:.0%} 超过阈值 {self.max_error_rate:.0%}')
+
+        counts = self.report.counts()
+        self.report.state = ROLLOUT_COMPLETED
+        self.report.save()
+        self.on_event(f'[✓] 发布完成：{self.report.summary()}' if not counts[HOST_FAILED] else f'[*] 发布完成：{self.report.summary()}')
+        return self.report
@@ -1,11 +1,13 @@
-from typing import Any
+from typing import Any, Optional
 
 from PySide6.QtCore import Signal
-from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout
+from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel
 from win32com import client
 
 from .widgets.status_bar import StatusBar
 from ..core.services import get_wmi_client
+from ..core.state_cache import load_state, save_state
+from ..core.storage import data_dir_persistent
 
 
 class BaseMainWindow(QMainWindow):
@@ -91,14 +93,99 @@ class BaseMainWindow(QMainWindow):
 
 
 class BasePage(QWidget):
+    cache_key: Optional[str] = None  # 支持状态缓存的页面设置该键
+    STALE_TEXT = "正在刷新，当前显示的是上次保存的状态…"
+
     def __init__(self, parent: QMainWindow):
         super().__init__()
         self.parent = parent
         self.services: dict[str, Any] = {}
 
+        # 过期数据提示，由子类加入布局
+        self.stale_label = QLabel(self.STALE_TEXT)
+        self.stale_label.setStyleSheet("color: gray;")
+        self.stale_label.hide()
+
+    def load(self) -> dict:
+        """
+        从 WMI 加载页面数据，可能在后台线程中调用，不能访问控件。
+        支持状态缓存的子类必须实现。
+        """
+        raise NotImplementedError("子类必须实现 load 方法")
+
+    def render(self, data: dict, stale: bool = False):
+        """
+        使用 load() 返回的数据更新页面，只更新发生变化的部分。
+        :param data: 页面数据
+        :param stale: 数据是否来自缓存
+        """
+        raise NotImplementedError("子类必须实现 render 方法")
+
     def refresh(self):
         """
         页面刷新时调用。可用于重新加载数据或重置状态。
-        子类必须实现。
+        默认实现为 render(load()) 并更新状态缓存，子类可以重载。
+        """
+        self.apply_loaded(self.load())
+
+    def load_in_background(self) -> tuple[dict, Optional[bool]]:
+        """
+        在后台线程中加载页面数据，同时检查状态缓存能否在重启后保留，避免 apply_loaded() 在 GUI 线程中查询 WMI
+        :return: (页面数据, 数据目录的写入能否在重启后保留，不支持状态缓存的页面为 None)
+        """
+        data = self.load()
+        if not self.cache_key: return data, None
+        try:
+            return data, data_dir_persistent()
+        except Exception as e:
+            print(f'[!] 检查数据目录排除项失败: {e}')
+            return data, False
+
+    def apply_loaded(self, data: dict, persistent: Optional[bool] = None):
+        """
+        渲染新加载的数据并更新状态缓存（在 GUI 线程中调用）
+        :param data: 页面数据
+        :param persistent: load_in_background() 检查的数据目录状态，None 时在当前线程中检查
+        """
+        self.stale_label.setText(self.STALE_TEXT)
+        self.render(data)
+        if self.cache_key: save_state(self.cache_key, data, persistent=persistent)
+
+    def show_load_error(self, error: str):
+        """
+        后台加载失败时保留当前显示的数据，并在过期提示中显示错误（在 GUI 线程中调用）
+        :param error: 错误信息
+        """
+        self.stale_label.setText(f"刷新失败，当前显示的可能是过期的状态：{error}")
+        self.stale_label.show()
+
+    def stop_workers(self):
+        """
+        等待页面自己启动的后台线程结束（关闭窗口时调用），子类按需重载
+        """
+
+    def request_refresh(self, force: bool = True):
+        """
+        请求刷新页面，由主窗口的刷新调度器合并请求并在后台加载，没有调度器时同步刷新
+        :param force: 数据已被修改，忽略数据有效期
+        """
+        scheduler = getattr(self.parent, 'refresh_scheduler', None)
+        if scheduler is None:
+            self.refresh()
+            return
+        scheduler.request(self, force=force)
+
+    def render_cached(self) -> bool:
+        """
+        使用缓存数据渲染页面
+        :return: 是否存在缓存
         """
-        raise NotImplementedError("子类必须实现 refresh 方法")
+        if not self.cache_key: return False
+        data = load_state(self.cache_key)
+        if data is None: return False
+        try:
+            self.render(data, stale=True)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f'[!] 缓存数据无效: {e}')
+            return False
+        return True
@@ -1,14 +1,22 @@
+from typing import Optional
+
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon
 from PySide6.QtWidgets import (
     QHBoxLayout, QListWidget, QListWidgetItem, QStackedWidget, QLabel
 )
 
-from .base import BaseMainWindow
+from .base import BaseMainWindow, BasePage
 from .pages import AboutPage, FreezePage, StatusPage
 from .pages.settings_page import SettingsPage
+from .refresh import RefreshScheduler
+from ..core.metrics import MetricsExporter
+from ..core.overlay_policy import OverlayPolicy
+from ..core.scheduler import Scheduler
 from ..core.services import is_uwf_installed
 from ..core.services.filter import current_enabled, next_enabled
+from ..worker.overlay import OverlayPolicyWorker
+from ..worker.scheduler import SchedulerWorker
 
 
 class MainWindow(BaseMainWindow):
@@ -23,8 +31,15 @@ class MainWindow(BaseMainWindow):
         self.pages: list[tuple[str, callable]]  # 页面列表，包含页面名称和图标路径
 
         self.uwf_status_value: QLabel
+        self.scheduler_worker: Optional[SchedulerWorker] = None
+        self.overlay_policy_worker: Optional[OverlayPolicyWorker] = None
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        self.refresh_scheduler = RefreshScheduler.from_env(parent=self)  # 页面通过 request_refresh 使用，需在创建页面前初始化
 
         self._init_ui()
+        self._init_scheduler()
+        self._init_overlay_policy()
+        self._init_metrics()
 
     def _init_ui(self):
         """
@@ -112,10 +127,13 @@ class MainWindow(BaseMainWindow):
 
         # 设置默认显示第一个页面
         self.stack.setCurrentIndex(0)
-        # 初始化第一个页面
-        first_page = self.stack.widget(0)
-        if hasattr(first_page, "refresh"):
-            first_page.refresh()
+        # 初始化页面：有缓存的页面先显示上次保存的状态，再在后台重新加载；首个页面没有缓存时同步刷新
+        for index in range(self.stack.count()):
+            page = self.stack.widget(index)
+            if isinstance(page, BasePage) and page.render_cached():
+                self.refresh_scheduler.request(page, delay=0)
+            elif index == 0 and hasattr(page, "refresh"):
+                self.refresh_scheduler.refresh_now(page)
 
         # 连接侧边栏和堆叠页面
         self.sidebar.currentRowChanged.connect(self._on_page_changed)
@@ -138,6 +156,51 @@ class MainWindow(BaseMainWindow):
 
         self.refresh_status_bar_signal.emit()
 
+    def _init_scheduler(self):
+        """
+        有计划任务时启动后台调度线程
+        :return:
+        """
+        if not is_uwf_installed(): return
+        scheduler = Scheduler()
+        if not scheduler.jobs(): return
+        print(f'[+] 启动计划任务调度，共 {len(scheduler.jobs())} 个任务')
+        self.scheduler_worker = SchedulerWorker(scheduler=scheduler)
+        self.scheduler_worker.job_finished_signal.connect(lambda job_id, result: self.refresh_status_bar_signal.emit())
+        self.scheduler_worker.start()
+
+    def _init_overlay_policy(self):
+        """
+        配置了覆盖层压力策略时启动后台监控线程
+        :return:
+        """
+        if not is_uwf_installed(): return
+        policy = OverlayPolicy.load()
+        if policy is None: return
+        print('[+] 启动覆盖层压力监控')
+        self.overlay_policy_worker = OverlayPolicyWorker(policy=policy)
+        self.overlay_policy_worker.level_changed_signal.connect(lambda level: self.refresh_status_bar_signal.emit())
+        self.overlay_policy_worker.start()
+
+    def _init_metrics(self):
+        """
+        设置了 FREEZELOCK_METRICS / FREEZELOCK_METRICS_FILE 时启动指标导出
+        :return:
+        """
+        try:
+            self.metrics_exporter = MetricsExporter.from_env()
+            if self.metrics_exporter is not None: self.metrics_exporter.start()
+        except (ValueError, OSError) as e:
+            print(f'[!] 启动指标导出失败: {e}')
+            self.metrics_exporter = None
+
+    def closeEvent(self, event):
+        for worker in (self.scheduler_worker, self.overlay_policy_worker, self.metrics_exporter, self.refresh_scheduler):
+            if worker is not None: worker.stop()
+        for _, page in self.pages:
+            if isinstance(page, BasePage): page.stop_workers()
+        super().closeEvent(event)
+
     def refresh_status_bar(self):
         """ Refresh the status bar with UWF status. """
         if not is_uwf_installed():
@@ -168,4 +231,4 @@ class MainWindow(BaseMainWindow):
         self.stack.setCurrentIndex(index)
         page = self.stack.widget(index)
         if hasattr(page, "refresh"):
-            page.refresh()
+            self.refresh_scheduler.focus(page)  # 合并快速切换产生的请求，数据仍在有效期内时不重新加载
@@ -1,5 +1,5 @@
-import os
-from getpass import getuser
+import time
+from typing import Optional
 
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
@@ -8,19 +8,29 @@ from PySide6.QtWidgets import (
 )
 
 from ..base import BasePage
-from ..widgets.dialog import WaitDialog
+from ..widgets.dialog import VolumeOperationDialog, WaitDialog
+from ...core.exclusion_impact import ExclusionImpact, ExclusionSimulator
+from ...core.path_rules import get_path_rules
+from ...core.paths import canonicalize
 from ...core.services import is_uwf_installed
 from ...core.services.filter import UWFFilter as UWF_Filter
-from ...core.services.utils import get_service_instance, get_service_class, get_system_volume
+from ...core.services.utils import get_service_instance, get_service_class, stream_service_instances
 from ...core.services.volume import UWFVolume as UWF_Volume
+from ...worker.page import PageLoadWorker
+from ...worker.volume import VolumeOperationWorker
+
+EXCLUSION_INDEX_TTL = 60.0  # 秒，预估排除项效果用的索引的有效期
 
 
 class FreezePage(BasePage):
+    cache_key = 'freeze'
+
     def __init__(self, parent: QMainWindow):
         super().__init__(parent=parent)
 
         self.services['uwf_filter'] = UWF_Filter()
         self.services['uwf_volume'] = UWF_Volume()
+        self.volume_worker = None
 
         # 状态显示
         status_section_layout = QHBoxLayout()
@@ -53,6 +63,12 @@ class FreezePage(BasePage):
         self.volume_table.setFixedHeight(120)
         volume_layout.addWidget(self.volume_table)
         self._volumes_info: dict[str, dict[str, dict]] = {}
+        self._rendered: dict = {}  # 上次渲染的数据
+        # 预估排除项效果用的索引，打开添加排除项的对话框时在后台建立（GetOverlayFiles 开销较大，不随页面刷新）
+        self._exclusion_index: Optional[ExclusionSimulator] = None
+        self._exclusion_index_at = 0.0  # 索引建立的时间（time.monotonic()）
+        self._index_generation = 0  # 数据被修改时递增，之前开始建立的索引作废
+        self.index_worker: Optional[PageLoadWorker] = None
         # 卷管理区
         volume_button_row = QHBoxLayout()
         volume_button_row.addStretch()
@@ -105,6 +121,7 @@ class FreezePage(BasePage):
         layout.setSpacing(10)
 
         # 状态栏区
+        layout.addWidget(self.stale_label)
         layout.addLayout(status_section_layout)
 
         # 卷管理区
@@ -140,7 +157,7 @@ class FreezePage(BasePage):
         msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
         msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
         if self.services['uwf_filter'].enable():
-            self.refresh()
+            self.request_refresh()
             self.parent.refresh_status_bar()
             msg_box.setIcon(QMessageBox.Icon.Information)
             msg_box.setWindowTitle("提示")
@@ -172,7 +189,7 @@ class FreezePage(BasePage):
         msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
         msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
         if self.services['uwf_filter'].disable():
-            self.refresh()
+            self.request_refresh()
             self.parent.refresh_status_bar()
             msg_box.setIcon(QMessageBox.Icon.Information)
             msg_box.setWindowTitle("提示")
@@ -211,32 +228,10 @@ class FreezePage(BasePage):
         这将使选中的卷受 UWF 保护。
         :return:
         """
-        wait_dialog = WaitDialog(
-            title="保护卷",
-            description="正在保护选中的卷，请稍候..."
+        self._run_volume_operation(
+            operation='protect', title="保护卷",
+            description="正在保护选中的卷，请稍候...",
         )
-        wait_dialog.show()
-        msg_box = QMessageBox()
-        msg_box.setMinimumWidth(150)
-        msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
-        msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
-        result = []
-        for drive in self.get_checked_volumes():
-            result.append(self.services['uwf_volume'].protect(drive=drive))
-        self.refresh()
-        if any(result):
-            msg_box.setIcon(QMessageBox.Icon.Information)
-            msg_box.setWindowTitle("提示")
-            msg_box.setText("选中的卷已成功保护")
-            msg_box.setInformativeText("请重启系统以使更改生效。")
-        else:
-            msg_box.setIcon(QMessageBox.Icon.Critical)
-            msg_box.setWindowTitle("错误")
-            msg_box.setText("保护卷失败")
-            msg_box.setInformativeText("请检查系统日志以获取更多信息。")
-        wait_dialog.close()
-
-        msg_box.exec()
 
     def _unprotect_volumes(self):
         """
@@ -244,31 +239,33 @@ class FreezePage(BasePage):
         这将使选中的卷不再受 UWF 保护。
         :return:
         """
-        wait_dialog = WaitDialog(
-            title="撤销卷保护",
-            description="正在撤销选中的卷保护，请稍候..."
+        self._run_volume_operation(
+            operation='unprotect', title="撤销卷保护",
+            description="正在撤销选中的卷保护，请稍候...",
         )
-        msg_box = QMessageBox()
-        msg_box.setMinimumWidth(150)
-        msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
-        msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
-        result = []
-        for drive in self.get_checked_volumes():
-            result.append(self.services['uwf_volume'].unprotect(drive=drive))
-        self.refresh()
-        if any(result):
-            msg_box.setIcon(QMessageBox.Icon.Information)
-            msg_box.setWindowTitle("提示")
-            msg_box.setText("选中的卷保护已成功撤销")
-            msg_box.setInformativeText("请重启系统以使更改生效。")
-        else:
-            msg_box.setIcon(QMessageBox.Icon.Critical)
-            msg_box.setWindowTitle("错误")
-            msg_box.setText("撤销卷保护失败")
-            msg_box.setInformativeText("请检查系统日志以获取更多信息。")
-        wait_dialog.close()
 
-        msg_box.exec()
+    def _run_volume_operation(self, operation: str, title: str, description: str):
+        """
+        在后台并发处理选中的卷，对话框中实时显示每个卷的结果
+        :param operation: "protect" 或 "unprotect"
+        :param title: 对话框标题
+        :param description: 对话框说明
+        """
+        drives = self.get_checked_volumes()
+        if not drives: return
+        self.volume_protect_button.setEnabled(False)
+        self.volume_unprotect_button.setEnabled(False)
+
+        dialog = VolumeOperationDialog(title=title, drives=drives, description=description)
+        self.volume_worker = VolumeOperationWorker(operation=operation, drives=drives)
+        self.volume_worker.volume_result_signal.connect(dialog.set_result)
+        self.volume_worker.operation_result_signal.connect(dialog.finish)
+        self.volume_worker.start()
+        dialog.exec()
+
+        self.volume_worker.wait()
+        self.volume_worker = None
+        self.request_refresh()
 
     def _add_exclusion(self, path: str):
         """
@@ -280,55 +277,91 @@ class FreezePage(BasePage):
         msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
         msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
 
-        driver_letter, absolute_path = os.path.splitdrive(path)
-        normpath_absolute_path = os.path.normpath(absolute_path)
-        if normpath_absolute_path == '\\':
+        check = get_path_rules().check(path)
+        if not check.allowed:
             msg_box.setIcon(QMessageBox.Icon.Warning)
             msg_box.setWindowTitle("警告")
-            msg_box.setText("无法添加卷根目录作为排除项")
+            msg_box.setText(check.reason)
             msg_box.exec()
             return
-
-        # 排除项禁用列表
-        system_volume = get_system_volume()
-        disabled_exclusions = [
-            r'\Windows',
-            r'\EFI\Microsoft\Boot\BOOTSTAT.DAT',
-            r'\Boot\BOOTSTAT.DAT',
-            fr'\Users\{getuser()}\NTUSER.DAT',
-        ]
-        if driver_letter == system_volume and (
-            normpath_absolute_path in disabled_exclusions or any(
-                normpath_absolute_path.startswith(disabled_exclusion_item) for disabled_exclusion_item in disabled_exclusions
-            )
-        ):
-            msg_box.setIcon(QMessageBox.Icon.Warning)
-            msg_box.setWindowTitle("警告")
-            msg_box.setText("无法添加特殊路径作为排除项")
+        impact = self._estimate_exclusion(check.drive, check.file_name)
+        if impact is not None and impact.covered_by:
+            msg_box.setIcon(QMessageBox.Icon.Information)
+            msg_box.setWindowTitle("提示")
+            msg_box.setText("无需添加该排除项")
+            msg_box.setInformativeText(f"该路径已被排除项 {impact.covered_by} 覆盖。")
             msg_box.exec()
             return
         print(f'[+] 添加排除项: {path}')
         if self.services['uwf_volume'].add_exclusion(
-            drive=driver_letter, file_name=normpath_absolute_path
+            drive=check.drive, file_name=check.file_name
         ):
-            self.refresh()
+            self.request_refresh()
             msg_box.setIcon(QMessageBox.Icon.Information)
             msg_box.setWindowTitle("提示")
             msg_box.setText("排除项已成功添加")
-            msg_box.setInformativeText("请重启系统以使更改生效。")
+            informative = "请重启系统以使更改生效。"
+            if impact is not None:
+                informative = f"重启后预计可减少覆盖层占用 {impact.bytes / (1024 * 1024):.1f} MB（当前 {impact.files} 个覆盖文件）。\n" + informative
+                if impact.covers:
+                    informative += f"\n以下 {len(impact.covers)} 个排除项已被新排除项包含，可以删除：\n" + '\n'.join(impact.covers[:5])
+            msg_box.setInformativeText(informative)
         else:
             msg_box.setIcon(QMessageBox.Icon.Critical)
             msg_box.setWindowTitle("错误")
             msg_box.setText("添加排除项失败")
             msg_box.setInformativeText("请检查系统日志以获取更多信息。")
         msg_box.exec()
-        self.refresh()
+
+    def _estimate_exclusion(self, drive: str, file_name: str) -> Optional[ExclusionImpact]:
+        """
+        预估排除项的效果（覆盖层节省量、与现有排除项的重叠），失败时返回 None
+        使用 _prepare_exclusion_index() 在后台建立的索引，不在 GUI 线程中查询；索引尚未就绪时返回 None
+        """
+        if self._exclusion_index is None:
+            print('[*] 排除项效果的索引尚未就绪，跳过预估')
+            return None
+        try:
+            return self._exclusion_index.simulate([drive + file_name])[0]
+        except Exception as e:
+            print(f'[!] 预估排除项效果失败: {e}')
+            return None
+
+    def _prepare_exclusion_index(self):
+        """
+        在后台建立预估排除项效果用的索引，已有未过期的索引或正在建立时跳过
+        """
+        if self.index_worker is not None or not self._rendered.get('installed'): return
+        if self._exclusion_index is not None and time.monotonic() - self._exclusion_index_at < EXCLUSION_INDEX_TTL: return
+        exclusions = list(self._rendered['exclusions'])
+        drives = [
+            volume['CurrentSession']['DriveLetter'] for volume in self._rendered['volumes'].values()
+            if volume['CurrentSession'].get('Protected')
+        ]
+        generation = self._index_generation
+        self.index_worker = PageLoadWorker(load=lambda: ExclusionSimulator.from_exclusions(exclusions, drives))
+        self.index_worker.loaded_signal.connect(lambda index: self._on_index_built(generation, index))
+        self.index_worker.finished.connect(self._on_index_worker_finished)
+        self.index_worker.start()
+
+    def _on_index_built(self, generation: int, index: ExclusionSimulator):
+        if generation != self._index_generation: return  # 建立期间数据已被修改
+        self._exclusion_index = index
+        self._exclusion_index_at = time.monotonic()
+
+    def _on_index_worker_finished(self):
+        self.index_worker.deleteLater()
+        self.index_worker = None
+
+    def stop_workers(self):
+        if self.index_worker is not None: self.index_worker.wait()
 
     def _add_exclusion_file(self):
         """
         添加排除项（文件）。
         :return:
         """
+        self._prepare_exclusion_index()  # 用户选择文件期间在后台建立索引
         path, _ = QFileDialog.getOpenFileName(self, "选择排除的文件")
         if not path: return  # 如果没有选择文件，则返回
         self._add_exclusion(path=path)
@@ -338,6 +371,7 @@ class FreezePage(BasePage):
         添加排除项（目录）。
         :return:
         """
+        self._prepare_exclusion_index()
         path = QFileDialog.getExistingDirectory(self, "选择排除的目录")
         if not path: return  # 如果没有选择目录，则返回
         self._add_exclusion(path=path)
@@ -367,12 +401,11 @@ class FreezePage(BasePage):
             result_msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
             result_msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
             for item in selected_items:
-                path = item.text()
-                drive_letter, absolute_path = os.path.splitdrive(path)
+                path = canonicalize(item.text())
                 result.append(self.services['uwf_volume'].remove_exclusion(
-                    drive=drive_letter, file_name=os.path.normpath(absolute_path)
+                    drive=path.drive, file_name=path.file_name
                 ))
-            self.refresh()
+            self.request_refresh()
             if any(result):
                 result_msg_box.setIcon(QMessageBox.Icon.Information)
                 result_msg_box.setWindowTitle("提示")
@@ -393,7 +426,7 @@ class FreezePage(BasePage):
         """
         volumes_info = {}
 
-        for volume in get_service_instance(instance_name='UWF_Volume'):
+        for volume in stream_service_instances(instance_name='UWF_Volume'):
             if not volume.DriveLetter: continue
 
             # 将卷信息存储到字典中
@@ -434,11 +467,10 @@ class FreezePage(BasePage):
 
         return volumes_info
 
-    def _refresh_status(self):
+    def _render_status(self, uwf_filter_instance: dict):
         """
-        刷新UWF状态信息。
+        显示UWF状态信息。
         """
-        uwf_filter_instance = get_service_instance(instance_name='UWF_Filter')[0].as_dict()
         if uwf_filter_instance['CurrentEnabled']:
             service_status_message = '已启用'
             self.status_value.setStyleSheet("color: green;")
@@ -461,12 +493,12 @@ class FreezePage(BasePage):
                 self.disable_button.show()
         self.status_value.setText(service_status_message)
 
-    def _refresh_volumes(self):
+    def _render_volumes(self, volumes_info: dict[str, dict[str, dict]]):
         """
-        刷新卷列表。
+        显示卷列表。
         """
         self.volume_table.setRowCount(0)  # 清空表格行
-        self._volumes_info = self._get_volumes_info()
+        self._volumes_info = volumes_info
 
         # 填充表格
         for row, (drive_letter, volume_info) in enumerate(self._volumes_info.items()):
@@ -510,34 +542,76 @@ class FreezePage(BasePage):
                     status_item.setForeground(Qt.GlobalColor.darkYellow)
             self.volume_table.setItem(row, 2, status_item)
 
-    def _refresh_exclusions(self):
+    def _render_exclusions(self, exclusions: list[str]):
         """
-        刷新排除路径列表。
+        显示排除路径列表，只增删发生变化的项。
         """
-        # 更新排除路径列表
-        self.exclusions_list.clear()
-        # 获取排除项列表
-        for drive in self._volumes_info.values():
+        wanted = set(exclusions)
+        for row in reversed(range(self.exclusions_list.count())):
+            if self.exclusions_list.item(row).text() not in wanted:
+                self.exclusions_list.takeItem(row)
+        existing = {self.exclusions_list.item(row).text() for row in range(self.exclusions_list.count())}
+        for path in exclusions:
+            if path not in existing:
+                self.exclusions_list.addItem(path)
+                existing.add(path)
+
+    def request_refresh(self, force: bool = True):
+        """数据已被修改时索引作废，下次添加排除项时重建"""
+        if force:
+            self._exclusion_index = None
+            self._index_generation += 1
+        super().request_refresh(force=force)
+
+    def load(self) -> dict:
+        """
+        加载UWF状态、卷列表和排除路径列表。
+        """
+        if not is_uwf_installed(): return {'installed': False}
+
+        uwf_filter_instance = get_service_instance(instance_name='UWF_Filter')[0].as_dict()
+        volumes_info = self._get_volumes_info()
+        exclusions = []
+        for drive in volumes_info.values():
             drive_letter = drive['CurrentSession']['DriveLetter']
-            success, results = self.services['uwf_volume'].get_exclusions(drive=drive_letter)
+            success, results = UWF_Volume.get_exclusions(drive=drive_letter)
             if not success: continue
             for path in results:
                 # path 是 WMIObject 实例，只有一个属性 FileName
-                self.exclusions_list.addItem(f'{drive_letter}{path.FileName}')
-
-    def refresh(self):
+                exclusions.append(f'{drive_letter}{path.FileName}')
+        return {
+            'installed': True,
+            'filter': {
+                'CurrentEnabled': uwf_filter_instance['CurrentEnabled'],
+                'NextEnabled': uwf_filter_instance['NextEnabled'],
+            },
+            'volumes': volumes_info,
+            'exclusions': exclusions,
+        }
+
+    def render(self, data: dict, stale: bool = False):
         """
-        刷新页面内容，重新加载UWF状态和卷列表。
+        显示页面内容，只更新发生变化的部分。过期数据显示期间禁用修改操作。
         """
-        if not is_uwf_installed():
+        self.stale_label.setVisible(stale)
+        for button in (
+            self.enable_button, self.disable_button, self.volume_protect_button, self.volume_unprotect_button,
+            self.select_file_button, self.select_dir_button, self.remove_exclude_button,
+        ):
+            button.setEnabled(not stale)
+
+        if not data['installed']:
             self.status_value.setText("未安装 UWF 服务")
+            self._rendered = {}
             return
 
         # 更新状态信息
-        self._refresh_status()
+        if data['filter'] != self._rendered.get('filter'): self._render_status(data['filter'])
 
         # 更新卷列表
-        self._refresh_volumes()
+        if data['volumes'] != self._rendered.get('volumes'): self._render_volumes(data['volumes'])
 
         # 更新排除路径列表
-        self._refresh_exclusions()
+        if data['exclusions'] != self._rendered.get('exclusions'): self._render_exclusions(data['exclusions'])
+
+        self._rendered = data
@@ -1,17 +1,27 @@
+from typing import Optional
+
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QMainWindow, QVBoxLayout, QGroupBox, QHBoxLayout, QComboBox, QLabel, QSpinBox, QPushButton, QMessageBox
 )
 
 from ..base import BasePage
 from ...core.services.filter import current_enabled
+from ...core.services.overlay import overlay_status, UWFOverlay
 from ...core.services.overlay_config import get_type, maximum_size, UWFOverlayConfig
+from ...core.services.transaction import Transaction
+from ...core.sizing import CRITICAL_PERCENTILE, WARNING_PERCENTILE, SizingAdvice, load_history, recommend, record_consumption
+from ...core.storage import data_dir_excluded, data_dir_persistent, ensure_data_dir_excluded, get_data_dir
 
+NOT_EXCLUDED_REMARK = '数据目录未加入排除项，状态缓存、用量历史与审计日志在重启后会丢失。'
+EXCLUSION_PENDING_REMARK = '数据目录的排除项将在下次启动后生效，本次运行的状态缓存、用量历史与审计日志不会保留。'
 
 class SettingsPage(BasePage):
     def __init__(self, parent: QMainWindow):
         super().__init__(parent=parent)
 
         self.services['uwf_overlay_config'] = UWFOverlayConfig()
+        self.services['uwf_overlay'] = UWFOverlay()
 
         # 禁用提示
         self.disabled_remark = QLabel()
@@ -59,8 +69,61 @@ class SettingsPage(BasePage):
         max_cache_row.addWidget(max_cache_remark_ii)
         run_layout.addLayout(max_cache_row)
 
+        # 覆盖层阈值（立即生效，不受 UWF 启用状态限制）
+        threshold_group = QGroupBox('覆盖层阈值')
+        threshold_layout = QVBoxLayout()
+        threshold_layout.setSpacing(6)
+        threshold_group.setLayout(threshold_layout)
+        threshold_input_row = QHBoxLayout()
+        threshold_input_row.addWidget(QLabel("警告阈值："))
+        self.warning_threshold_spin = QSpinBox()
+        self.warning_threshold_spin.setRange(1, 32767)
+        self.warning_threshold_spin.setSingleStep(64)
+        self.warning_threshold_spin.setSuffix(' MB')
+        threshold_input_row.addWidget(self.warning_threshold_spin)
+        threshold_input_row.addSpacing(24)
+        threshold_input_row.addWidget(QLabel("临界阈值："))
+        self.critical_threshold_spin = QSpinBox()
+        self.critical_threshold_spin.setRange(2, 32768)
+        self.critical_threshold_spin.setSingleStep(64)
+        self.critical_threshold_spin.setSuffix(' MB')
+        threshold_input_row.addWidget(self.critical_threshold_spin)
+        threshold_input_row.addStretch()
+        self.apply_threshold_button = QPushButton('应用阈值')
+        self.apply_threshold_button.setStyleSheet("padding: 6px 15px;")
+        threshold_input_row.addWidget(self.apply_threshold_button)
+        threshold_layout.addLayout(threshold_input_row)
+        threshold_layout.addWidget(QLabel('覆盖层使用量达到阈值时系统会发出警告事件，警告阈值必须小于临界阈值，修改后立即生效。'))
+
+        # 容量建议（根据历次启动的覆盖层用量峰值）
+        advice_group = QGroupBox('容量建议')
+        advice_layout = QVBoxLayout()
+        advice_layout.setSpacing(6)
+        advice_group.setLayout(advice_layout)
+        self.advice_label = QLabel()
+        self.advice_label.setWordWrap(True)
+        self.advice_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        advice_layout.addWidget(self.advice_label)
+        advice_button_row = QHBoxLayout()
+        advice_button_row.addWidget(QLabel('建议值只会填入上方输入框，确认后需点击“应用阈值”或“应用更改”。'))
+        advice_button_row.addStretch()
+        self.apply_advice_button = QPushButton('填入建议')
+        self.apply_advice_button.setStyleSheet("padding: 6px 15px;")
+        advice_button_row.addWidget(self.apply_advice_button)
+        advice_layout.addLayout(advice_button_row)
+        self._advice: Optional[SizingAdvice] = None
+
         # 应用更改按钮
         button_row = QHBoxLayout()
+        # 数据目录未排除时提示，只有用户确认后才修改 UWF 排除项
+        self.persist_remark = QLabel(NOT_EXCLUDED_REMARK)
+        self.persist_remark.setStyleSheet('color: gray;')
+        self.persist_remark.hide()
+        button_row.addWidget(self.persist_remark)
+        self.persist_button = QPushButton('保留数据')
+        self.persist_button.setStyleSheet("padding: 6px 15px;")
+        self.persist_button.hide()
+        button_row.addWidget(self.persist_button)
         button_row.addStretch()
         self.apply_button = QPushButton('应用更改')
         self.apply_button.setStyleSheet("padding: 6px 15px;")
@@ -79,6 +142,12 @@ class SettingsPage(BasePage):
         # 添加运行配置
         layout.addWidget(run_group)
 
+        # 添加覆盖层阈值
+        layout.addWidget(threshold_group)
+
+        # 添加容量建议
+        layout.addWidget(advice_group)
+
         layout.addStretch()  # 添加弹性空间
 
         # 添加按钮行
@@ -86,43 +155,142 @@ class SettingsPage(BasePage):
 
         # 信号绑定
         self.apply_button.clicked.connect(self._apply_settings)
-        self.reset_button.clicked.connect(self.refresh)
+        self.reset_button.clicked.connect(lambda: self.request_refresh())
+        self.apply_threshold_button.clicked.connect(self._apply_thresholds)
+        self.apply_advice_button.clicked.connect(self._fill_advice)
+        self.persist_button.clicked.connect(self._persist_data_dir)
 
     def _apply_settings(self):
         """应用设置"""
         print(f"[+] 应用设置")
 
-        all_success = True
-
-        mode = self.mode_combo.currentText()
-        if mode != get_type():
-            all_success = self.services['uwf_overlay_config'].set_type(mode)
-
-        max_cache = self.max_size_spin.value()
-        if max_cache != maximum_size():
-            all_success = self.services['uwf_overlay_config'].set_maximum_size(max_cache)
+        transaction = Transaction('应用设置')
+        transaction.set_overlay_type(self.mode_combo.currentText())
+        transaction.set_maximum_size(self.max_size_spin.value())
+        result = transaction.apply()
 
         msg_box = QMessageBox()
         msg_box.setMinimumWidth(150)
         msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
         msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
-        if all_success:
+        msg_box.setDetailedText(result.summary())
+        if result.success:
             msg_box.setWindowTitle("提示")
             msg_box.setIcon(QMessageBox.Icon.Information)
             msg_box.setText("设置已成功应用。")
             msg_box.setInformativeText("请重启系统以使更改生效。")
-            self.refresh()
+            self.request_refresh()
+        elif result.rollback_failures:
+            msg_box.setWindowTitle("错误")
+            msg_box.setIcon(QMessageBox.Icon.Critical)
+            msg_box.setText(f"设置应用失败（{result.failed_step}），且部分步骤未能回滚。")
+            msg_box.setInformativeText("请检查详细信息并手动恢复以下设置：" + "、".join(result.rollback_failures))
+            self.request_refresh()
+        else:
+            msg_box.setWindowTitle("错误")
+            msg_box.setIcon(QMessageBox.Icon.Critical)
+            msg_box.setText(f"设置应用失败（{result.failed_step}），已恢复原有设置。")
+            msg_box.setInformativeText("请检查系统日志以获取更多信息。")
+            self.request_refresh()
+
+        msg_box.exec()
+
+    def _persist_data_dir(self):
+        """经用户确认后把数据目录加入 UWF 排除项"""
+        answer = QMessageBox.question(
+            self, "保留数据",
+            f"将把数据目录 {get_data_dir()} 加入 UWF 排除项（下次启动生效），使状态缓存与用量历史在重启后保留。是否继续？",
+        )
+        if answer != QMessageBox.StandardButton.Yes: return
+        if ensure_data_dir_excluded():
+            self.persist_remark.setText(EXCLUSION_PENDING_REMARK)
+            self.persist_button.hide()
+        else:
+            QMessageBox.critical(self, "错误", "添加数据目录排除项失败。\n请检查系统日志以获取更多信息。")
+
+    def _apply_thresholds(self):
+        """应用覆盖层阈值"""
+        warning = self.warning_threshold_spin.value()
+        critical = self.critical_threshold_spin.value()
+        print(f"[+] 设置覆盖层阈值: 警告 {warning} MB, 临界 {critical} MB")
+
+        msg_box = QMessageBox()
+        msg_box.setMinimumWidth(150)
+        msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
+        msg_box.setDefaultButton(QMessageBox.StandardButton.Ok)
+        if warning >= critical:
+            msg_box.setWindowTitle("警告")
+            msg_box.setIcon(QMessageBox.Icon.Warning)
+            msg_box.setText("警告阈值必须小于临界阈值。")
+        elif self.services['uwf_overlay'].set_thresholds(warning=warning, critical=critical):
+            msg_box.setWindowTitle("提示")
+            msg_box.setIcon(QMessageBox.Icon.Information)
+            msg_box.setText("覆盖层阈值已更新。")
+            self.request_refresh()
         else:
             msg_box.setWindowTitle("错误")
             msg_box.setIcon(QMessageBox.Icon.Critical)
-            msg_box.setText("设置应用失败，请检查日志以获取更多信息。")
+            msg_box.setText("设置覆盖层阈值失败。")
             msg_box.setInformativeText("请检查系统日志以获取更多信息。")
 
         msg_box.exec()
 
-    def refresh(self):
-        """刷新页面内容"""
-        if current_enabled():
+    def _fill_advice(self):
+        """把容量建议填入输入框（不直接应用）"""
+        advice = self._advice
+        if advice is None or advice.maximum_size is None: return
+        print(f"[*] 填入容量建议: 最大缓存 {advice.maximum_size} MB, 警告 {advice.warning} MB, 临界 {advice.critical} MB")
+        if advice.overlay_type: self.mode_combo.setCurrentText(advice.overlay_type)
+        self.max_size_spin.setValue(advice.maximum_size)
+        self.warning_threshold_spin.setValue(advice.warning)
+        self.critical_threshold_spin.setValue(advice.critical)
+
+    def _render_advice(self, advice: SizingAdvice):
+        """显示容量建议与支撑数据"""
+        self._advice = advice
+        self.apply_advice_button.setEnabled(advice.maximum_size is not None)
+        if advice.maximum_size is None:
+            self.advice_label.setText('尚无覆盖层用量记录。打开“状态”页或启用压力策略、监控指标后会自动记录每次启动的用量峰值。')
+            return
+        lines = [f'最大缓存：{advice.maximum_size} MB（P{CRITICAL_PERCENTILE} 峰值 {advice.percentiles[CRITICAL_PERCENTILE]} MB 加余量）']
+        if advice.overlay_type:
+            lines.append(f'运行模式：{advice.overlay_type}（物理内存 {advice.physical_memory} MB）')
+        lines.append(
+            f'警告阈值：{advice.warning} MB（P{WARNING_PERCENTILE} 峰值 {advice.percentiles[WARNING_PERCENTILE]} MB），'
+            f'临界阈值：{advice.critical} MB'
+        )
+        lines.append(f'统计 {advice.boots} 次启动，最大峰值 {advice.max_peak} MB；峰值分布：' + '，'.join(
+            f'{bucket} ×{count}' for bucket, count in advice.histogram
+        ))
+        if advice.low_confidence: lines.append('启动次数较少，建议仅供参考。')
+        self.advice_label.setText('\n'.join(lines))
+
+    def load(self) -> dict:
+        """
+        加载 UWF 启用状态、覆盖层配置与容量建议（可能在后台线程中调用）
+        """
+        status = overlay_status()
+        if status: record_consumption(status.get('OverlayConsumption', 0))
+        return {
+            'enabled': bool(current_enabled()),
+            'type': get_type(),
+            'maximum_size': maximum_size(),
+            'overlay': status,
+            'advice': recommend(load_history()),
+            'persistent': data_dir_persistent(),
+            'excluded': data_dir_excluded(),
+        }
+
+    def render(self, data: dict, stale: bool = False):
+        """
+        显示当前设置，输入框中未应用的修改会被覆盖
+        """
+        excluded = data.get('excluded', False)
+        self.persist_remark.setText(EXCLUSION_PENDING_REMARK if excluded else NOT_EXCLUDED_REMARK)
+        self.persist_remark.setVisible(not data['persistent'])
+        self.persist_button.setVisible(not data['persistent'] and not excluded)
+
+        if data['enabled']:
             self.disabled_remark.setText("当前 UWF 服务已启用，请停用后再进行设置。")
             self.disabled_remark.show()
 
@@ -134,5 +302,12 @@ class SettingsPage(BasePage):
             self.apply_button.setEnabled(True)
             self.reset_button.setEnabled(True)
 
-        self.mode_combo.setCurrentText(get_type())
-        self.max_size_spin.setValue(maximum_size())
+        self.mode_combo.setCurrentText(data['type'])
+        self.max_size_spin.setValue(data['maximum_size'])
+
+        status = data['overlay']
+        self.apply_threshold_button.setEnabled(bool(status))
+        self._render_advice(data['advice'])
+        if status:
+            self.warning_threshold_spin.setValue(status['WarningOverlayThreshold'])
+            self.critical_threshold_spin.setValue(status['CriticalOverlayThreshold'])
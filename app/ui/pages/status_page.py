@@ -7,18 +7,34 @@ from PySide6.QtWidgets import QLabel, QVBoxLayout, QHBoxLayout, QProgressBar, QP
 
 from ..base import BasePage, BaseMainWindow
 from ..widgets.dialog import InstallUWFServiceDialog, RebootDialog
+from ...core.overlay_analysis import analyze_overlay, write_report
+from ...core.sizing import record_consumption
 from ...core.services import refresh_wmi_client, is_uwf_installed
+from ...core.services.install_state import PENDING_REBOOT, UNAVAILABLE, get_install_state
 from ...core.services.filter import current_enabled, next_enabled
 from ...core.services.overlay_config import get_type
 from ...core.services.utils import get_service_instance
+from ...worker.page import PageLoadWorker
 from ...worker.uwf import InstallUWFServiceWorker
 
+BREAKDOWN_TOP = 5  # 状态页显示的目录与文件类型数量
+ANALYSIS_INTERVAL = 300.0  # 覆盖层占用分析的最短间隔（秒），分析需要枚举所有受保护卷的覆盖文件
+
+
+def _format_megabytes(size: int) -> str:
+    return f'{size / (1024 * 1024):.1f} MB'
+
 
 class StatusPage(BasePage):
+    cache_key = 'status'
+
     def __init__(self, parent: BaseMainWindow):
         super().__init__(parent=parent)
 
         self.install_service_worker: Optional[InstallUWFServiceWorker] = None
+        self._rendered: Optional[dict] = None  # 上次渲染的数据
+        self.analysis_worker: Optional[PageLoadWorker] = None
+        self._analysis_at: Optional[float] = None  # 上次完成占用分析的时间
 
         # 标题
         self.title_label = QLabel("运行状态")
@@ -76,10 +92,18 @@ class StatusPage(BasePage):
         """)
         usage_row.addWidget(self.usage_bar)
 
+        # 覆盖层占用分布
+        self.breakdown_label = QLabel()
+        self.breakdown_label.setStyleSheet("font-size: 13px; color: #555;")
+        self.breakdown_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.breakdown_label.hide()
+        usage_row.addWidget(self.breakdown_label)
+
         # 主体布局
         layout = QVBoxLayout(self)
         layout.setSpacing(14)
         layout.addWidget(self.title_label)
+        layout.addWidget(self.stale_label)
         layout.addLayout(status_layout)
         layout.addLayout(cache_mode_layout)
         layout.addStretch()
@@ -97,14 +121,22 @@ class StatusPage(BasePage):
 
         self.install_service_worker = InstallUWFServiceWorker()
         loop = QEventLoop()
+        installed = False
 
         def on_install_result(install_result):
+            nonlocal installed
+            installed = install_result
             if install_result:
-                install_dialog.update_progress(85)
+                install_dialog.update_progress(90)
+                install_dialog.cancel_button.setEnabled(False)
                 self.install_button.hide()
                 time.sleep(3)  # 等待系统刷新
                 refresh_wmi_client()
                 install_dialog.update_progress(100)
+            elif self.install_service_worker.cancelled:
+                self.install_button.setText('安装 UWF 服务')
+                self.install_button.setEnabled(True)
+                self.status_value.setText('已取消安装 UWF 服务')
             else:
                 self.install_button.setText('安装失败')
                 self.install_button.setStyleSheet("color: red; font-size: 15px; padding: 5px;")
@@ -113,13 +145,16 @@ class StatusPage(BasePage):
             self.install_service_worker = None
             loop.quit()
 
+        # DISM 进度占进度条的 0~90%，剩余部分用于刷新 WMI 连接
+        self.install_service_worker.progress_signal.connect(lambda value: install_dialog.update_progress(value * 90 // 100))
         self.install_service_worker.install_result_signal.connect(on_install_result)
+        install_dialog.cancel_requested_signal.connect(self.install_service_worker.cancel)
         self.install_service_worker.start()
 
-        install_dialog.update_progress(25)
         loop.exec()
 
         install_dialog.close()
+        if not installed: return
 
         reboot_dialog = RebootDialog(
             description='安装 UWF 服务后需要重启系统才能生效。请保存您的工作并重启系统。',
@@ -127,26 +162,94 @@ class StatusPage(BasePage):
         reboot_dialog.show()
         self.status_value.setText('等待重启...')
 
-    def refresh(self):
+    def load(self) -> dict:
+        """
+        加载状态信息
+        """
+        if not is_uwf_installed(): return {'installed': False, 'install_state': get_install_state()}
+        overlay = get_service_instance(instance_name='UWF_Overlay')[0].as_dict()
+        record_consumption(overlay.get('OverlayConsumption', 0))  # 累计每次启动的用量峰值，供设置页给出容量建议
+        return {
+            'installed': True,
+            'current_enabled': bool(current_enabled()),
+            'next_enabled': bool(next_enabled()),
+            'type': get_type(),
+            'overlay': overlay,
+        }
+
+    def apply_loaded(self, data: dict, persistent: Optional[bool] = None):
+        super().apply_loaded(data, persistent=persistent)
+        self._request_analysis(data)
+
+    def _request_analysis(self, data: dict):
+        """
+        按独立的间隔在后台分析覆盖层占用，状态刷新本身不枚举覆盖文件
+        :param data: load() 返回的数据
+        """
+        if not data['installed'] or not (data['overlay'] or {}).get('OverlayConsumption'):  # 覆盖层为空时无需枚举覆盖文件
+            self._analysis_at = None
+            self.breakdown_label.hide()
+            return
+        if self.analysis_worker is not None: return
+        if self._analysis_at is not None and time.monotonic() - self._analysis_at < ANALYSIS_INTERVAL: return
+        self.analysis_worker = PageLoadWorker(load=self._analyze)
+        self.analysis_worker.loaded_signal.connect(self._on_analyzed)
+        self.analysis_worker.failed_signal.connect(lambda error: print(f'[!] 分析覆盖层占用失败: {error}'))
+        self.analysis_worker.finished.connect(self._on_analysis_worker_finished)
+        self.analysis_worker.start()
+
+    @staticmethod
+    def _analyze() -> dict:
         """
-        刷新状态信息
+        分析覆盖层占用并写入报告（在后台线程中调用）
         """
-        if not is_uwf_installed():
-            self.status_value.setText("未安装 UWF 服务")
+        result = analyze_overlay(top=BREAKDOWN_TOP)
+        write_report(result)
+        return {'top_directories': result.top_directories, 'top_extensions': result.top_extensions}
+
+    def _on_analyzed(self, breakdown: dict):
+        self._analysis_at = time.monotonic()
+        self._render_breakdown(breakdown)
+
+    def _on_analysis_worker_finished(self):
+        self.analysis_worker.deleteLater()
+        self.analysis_worker = None
+
+    def stop_workers(self):
+        if self.analysis_worker is not None: self.analysis_worker.wait()
+
+    def render(self, data: dict, stale: bool = False):
+        """
+        显示状态信息
+        """
+        self.stale_label.setVisible(stale)
+        if data == self._rendered: return
+        self._rendered = data
+
+        if not data['installed']:
+            install_state = data.get('install_state')
+            if install_state == PENDING_REBOOT:
+                self.status_value.setText("UWF 服务已安装，等待重启...")
+            elif install_state == UNAVAILABLE:
+                self.status_value.setText("当前系统版本不支持 UWF")
+            else:
+                self.status_value.setText("未安装 UWF 服务")
             self.cache_mode_value.setText("N/A")
             self.usage_bar.setValue(0)
-            self.install_button.show()
+            self.breakdown_label.hide()
+            self.install_button.setVisible(install_state not in (PENDING_REBOOT, UNAVAILABLE))
             return
+        self.install_button.hide()
 
-        if current_enabled():
-            if next_enabled():
+        if data['current_enabled']:
+            if data['next_enabled']:
                 self.status_value.setText('Enabled')
                 self.status_value.setStyleSheet('color: green; font-weight: bold; font-size: 15px;')
             else:
                 self.status_value.setText('Enabled (will be disabled after reboot)')
                 self.status_value.setStyleSheet('color: orange; font-weight: bold; font-size: 15px;')
         else:
-            if next_enabled():
+            if data['next_enabled']:
                 self.status_value.setText('Disabled (will be enabled after reboot)')
                 self.status_value.setStyleSheet('color: orange; font-weight: bold; font-size: 15px;')
             else:
@@ -154,10 +257,10 @@ class StatusPage(BasePage):
                 self.status_value.setStyleSheet('color: red; font-weight: bold; font-size: 15px;')
 
         # 更新缓存模式显示
-        self.cache_mode_value.setText(get_type())
+        self.cache_mode_value.setText(data['type'])
 
         # 获取缓存使用情况
-        uwf_overly_instance = get_service_instance(instance_name='UWF_Overlay')[0].as_dict()
+        uwf_overly_instance = data['overlay']
         if uwf_overly_instance:
             # {'AvailableSpace': 0, 'CriticalOverlayThreshold': 1024, 'Id': 'UWF_Overlay', 'OverlayConsumption': 0, 'WarningOverlayThreshold': 512}
             available_space = uwf_overly_instance.get('AvailableSpace', 0)
@@ -173,3 +276,19 @@ class StatusPage(BasePage):
         else:
             self.usage_bar.setValue(0)
             self.usage_bar.setToolTip("无法获取缓存使用情况")
+
+    def _render_breakdown(self, breakdown: dict):
+        """
+        显示占用最多的目录与文件类型
+        :param breakdown: 覆盖层占用分析结果
+        """
+        if breakdown['top_directories']:
+            lines = ['占用最多的目录：']
+            lines += [f'    {item["name"]}  {_format_megabytes(item["bytes"])}（{item["files"]} 个文件）' for item in breakdown['top_directories']]
+            lines.append('占用最多的文件类型：' + '，'.join(
+                f'{item["name"]} {_format_megabytes(item["bytes"])}' for item in breakdown['top_extensions']
+            ))
+            self.breakdown_label.setText('\n'.join(lines))
+            self.breakdown_label.show()
+        else:
+            self.breakdown_label.hide()
@@ -0,0 +1,175 @@
+"""
+页面刷新调度
+
+侧边栏切换和各操作完成后都会请求刷新页面，直接同步调用 refresh() 会在 GUI 线程中排队执行大量 WMI 查询。
+RefreshScheduler 对每个页面：
+    - 在 debounce 毫秒内合并重复的请求，只执行最后一次；
+    - 数据的年龄小于 ttl 秒时跳过普通请求（force=True 表示数据已被修改，忽略 ttl 并使其他页面的数据失效）；
+    - 在后台线程中执行 page.load()，再在 GUI 线程中渲染；
+    - 强制请求到达时正在进行的加载结果作废，完成后重新加载；切换到其他页面时取消尚未开始的刷新；
+    - 后台加载失败时保留当前显示的数据并提示错误，数据的年龄不变，下次请求时重试。
+没有实现 load() 的页面在合并后同步调用 refresh()。启动时没有缓存可显示的首个页面通过 refresh_now() 同步刷新。
+"""
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from PySide6.QtCore import QObject, QTimer
+
+from .base import BasePage
+from ..worker.page import PageLoadWorker
+
+REFRESH_TTL_ENV = 'FREEZELOCK_REFRESH_TTL'
+DEFAULT_DEBOUNCE = 150  # 毫秒
+DEFAULT_TTL = 5.0  # 秒
+
+
+@dataclass
+class _PageState:
+    timer: QTimer
+    force: bool = False  # 合并的请求中是否有强制刷新
+    generation: int = 0  # 任一页面的强制请求都会递增，加载结果的代数不一致时丢弃
+    loaded_at: Optional[float] = None  # 最近一次成功加载的时间（time.monotonic()），None 表示数据已失效
+    worker: Optional[PageLoadWorker] = None
+    rerun: bool = False  # 当前加载完成后需要重新加载
+
+
+class RefreshScheduler(QObject):
+    """
+    页面刷新调度器（只能在 GUI 线程中使用）
+    :param debounce: 合并请求的时间窗口（毫秒）
+    :param ttl: 数据有效期（秒），0 表示每次请求都重新加载
+    """
+    def __init__(self, debounce: int = DEFAULT_DEBOUNCE, ttl: float = DEFAULT_TTL, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.debounce = debounce
+        self.ttl = ttl
+        self._states: dict[QObject, _PageState] = {}
+        self.stats = {'requests': 0, 'loads': 0, 'skipped': 0, 'discarded': 0, 'cancelled': 0, 'failed': 0}
+
+    @classmethod
+    def from_env(cls, parent: Optional[QObject] = None) -> 'RefreshScheduler':
+        """ttl 可以通过环境变量 FREEZELOCK_REFRESH_TTL 覆盖"""
+        try:
+            ttl = float(os.environ.get(REFRESH_TTL_ENV) or DEFAULT_TTL)
+        except ValueError:
+            print(f'[!] 无效的 {REFRESH_TTL_ENV}: {os.environ.get(REFRESH_TTL_ENV)}')
+            ttl = DEFAULT_TTL
+        return cls(ttl=ttl, parent=parent)
+
+    def _state(self, page: QObject) -> _PageState:
+        state = self._states.get(page)
+        if state is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._fire(page))
+            state = self._states[page] = _PageState(timer=timer)
+        return state
+
+    def request(self, page: QObject, force: bool = False, delay: Optional[int] = None):
+        """
+        请求刷新页面
+        :param page: 页面
+        :param force: 数据已被修改，忽略 ttl，正在进行的加载结果作废，其他页面的数据失效
+        :param delay: 合并窗口（毫秒），默认为 debounce
+        """
+        self.stats['requests'] += 1
+        state = self._state(page)
+        if force:
+            state.force = True
+            for other in self._states.values():
+                other.generation += 1  # 其他页面正在进行的加载结果同样作废，下次访问时重新加载
+                other.loaded_at = None
+        state.timer.start(self.debounce if delay is None else delay)
+
+    def cancel(self, page: QObject):
+        """取消页面尚未开始的刷新，正在进行的加载完成后不再重新加载"""
+        state = self._states.get(page)
+        if state is None: return
+        if state.timer.isActive() or state.rerun: self.stats['cancelled'] += 1
+        state.timer.stop()
+        if state.force: state.loaded_at = None  # 被取消的强制刷新下次访问时仍需执行
+        state.force = False
+        state.rerun = False
+
+    def focus(self, page: QObject, force: bool = False):
+        """
+        切换到页面：取消其他页面尚未开始的刷新，并请求刷新该页面
+        """
+        for other in list(self._states):
+            if other is not page: self.cancel(other)
+        self.request(page, force=force)
+
+    def refresh_now(self, page: QObject):
+        """在 GUI 线程中立即同步刷新页面，取消尚未开始的刷新（启动时首个页面没有缓存可显示时调用）"""
+        state = self._state(page)
+        state.timer.stop()
+        state.force = False
+        self.stats['loads'] += 1
+        page.refresh()
+        state.loaded_at = time.monotonic()
+
+    def invalidate(self, page: Optional[QObject] = None):
+        """使页面（默认为所有页面）的数据失效，下次请求时重新加载"""
+        for key, state in self._states.items():
+            if page is None or key is page: state.loaded_at = None
+
+    def is_fresh(self, page: QObject) -> bool:
+        """页面数据是否仍在有效期内"""
+        state = self._states.get(page)
+        return state is not None and state.loaded_at is not None and time.monotonic() - state.loaded_at < self.ttl
+
+    def _fire(self, page: QObject):
+        state = self._states[page]
+        force, state.force = state.force, False
+        if not force and self.is_fresh(page):
+            self.stats['skipped'] += 1
+            return
+        if state.worker is not None:
+            # 普通请求由正在进行的加载满足；强制请求需要在其完成后重新加载
+            if force: state.rerun = True
+            return
+        self._start(page, state)
+
+    def _start(self, page: QObject, state: _PageState):
+        self.stats['loads'] += 1
+        if not isinstance(page, BasePage) or type(page).load is BasePage.load:
+            page.refresh()  # 页面不支持后台加载
+            state.loaded_at = time.monotonic()
+            return
+        generation = state.generation
+        worker = PageLoadWorker(load=page.load_in_background)
+        worker.loaded_signal.connect(lambda loaded: self._on_loaded(page, generation, *loaded))
+        worker.failed_signal.connect(lambda error: self._on_failed(page, generation, error))
+        worker.finished.connect(lambda: self._on_finished(page, worker))
+        state.worker = worker
+        worker.start()
+
+    def _on_loaded(self, page: BasePage, generation: int, data: dict, persistent: Optional[bool]):
+        state = self._states[page]
+        if generation != state.generation:
+            self.stats['discarded'] += 1  # 加载期间数据已被修改
+            return
+        page.apply_loaded(data, persistent=persistent)
+        state.loaded_at = time.monotonic()
+
+    def _on_failed(self, page: BasePage, generation: int, error: str):
+        self.stats['failed'] += 1
+        if generation != self._states[page].generation: return
+        page.show_load_error(error)  # 不在 GUI 线程中同步重试，loaded_at 不变，有效期过后或切换回页面时重新加载
+
+    def _on_finished(self, page: QObject, worker: PageLoadWorker):
+        worker.deleteLater()
+        state = self._states[page]
+        state.worker = None
+        if state.rerun:
+            state.rerun = False
+            self._start(page, state)
+
+    def stop(self, timeout: int = 5000):
+        """停止所有定时器并等待正在进行的加载结束（关闭窗口时调用）"""
+        for state in self._states.values():
+            state.timer.stop()
+            state.rerun = False
+            if state.worker is not None: state.worker.wait(timeout)
@@ -1,7 +1,7 @@
 import subprocess
 from typing import Optional
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
 from PySide6.QtWidgets import QDialog, QLabel, QProgressBar, QVBoxLayout, QPushButton, QHBoxLayout
 
 
@@ -20,10 +20,13 @@ class BaseDialog(QDialog):
 
 class InstallUWFServiceDialog(BaseDialog):
     """对话框，用于显示安装 UWF 服务的进度"""
+
+    cancel_requested_signal = Signal()
+
     def __init__(self):
         super().__init__(
             title="安装 UWF 服务",
-            size=(300, 100),
+            size=(300, 130),
             modal=True
         )
         self.label = QLabel("正在安装 UWF 服务，请稍候...", self)
@@ -37,13 +40,30 @@ class InstallUWFServiceDialog(BaseDialog):
         self.progress_bar.setRange(0, 100)
         self.progress_bar.setValue(0)
 
+        self.cancel_button = QPushButton("取消", self)
+        self.cancel_button.setStyleSheet('padding: 6px 15px;')
+        self.cancel_button.clicked.connect(self._cancel)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.cancel_button)
+
         layout = QVBoxLayout(self)
         layout.addWidget(self.label)
         layout.addWidget(self.progress_bar)
+        layout.addLayout(button_layout)
 
     def update_progress(self, value):
         self.progress_bar.setValue(value)
 
+    def _cancel(self):
+        self.cancel_button.setEnabled(False)
+        self.label.setText("正在取消安装...")
+        self.cancel_requested_signal.emit()
+
+    def reject(self):
+        """Esc 等同于取消"""
+        if self.cancel_button.isEnabled(): self._cancel()
+
 
 class RebootDialog(BaseDialog):
     """对话框，用于提示用户重启系统"""
@@ -113,3 +133,76 @@ class WaitDialog(BaseDialog):
         if description:
             self.label = QLabel(description, self)
             layout.addWidget(self.label)
+
+
+class VolumeOperationDialog(BaseDialog):
+    """对话框，用于显示多个卷操作的实时状态"""
+    def __init__(
+        self,
+        title: str,
+        drives: list[str],
+        description: Optional[str] = None,
+    ):
+        super().__init__(
+            title=title,
+            size=(340, 140 + 28 * len(drives)),
+            modal=True
+        )
+
+        # 操作完成前禁止关闭
+        self.setWindowFlags(self.windowFlags() & ~(
+            Qt.WindowType.WindowMaximizeButtonHint | Qt.WindowType.WindowMinimizeButtonHint | Qt.WindowType.WindowCloseButtonHint
+        ))
+
+        layout = QVBoxLayout(self)
+        if description:
+            self.label = QLabel(description, self)
+            layout.addWidget(self.label)
+
+        self.status_labels: dict[str, QLabel] = {}
+        for drive in drives:
+            row = QHBoxLayout()
+            row.addWidget(QLabel(drive, self))
+            status_label = QLabel("处理中...", self)
+            status_label.setStyleSheet("color: gray;")
+            row.addWidget(status_label)
+            row.addStretch()
+            layout.addLayout(row)
+            self.status_labels[drive] = status_label
+
+        self.summary_label = QLabel(self)
+        layout.addWidget(self.summary_label)
+        layout.addStretch()
+
+        self.close_button = QPushButton("关闭", self)
+        self.close_button.setStyleSheet('padding: 6px 15px;')
+        self.close_button.setEnabled(False)
+        self.close_button.clicked.connect(self.accept)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+    def set_result(self, drive: str, success: bool):
+        """更新单个卷的状态"""
+        status_label = self.status_labels.get(drive)
+        if status_label is None: return
+        status_label.setText("✓ 成功" if success else "✗ 失败")
+        status_label.setStyleSheet("color: green;" if success else "color: red;")
+
+    def finish(self, results: dict[str, bool]):
+        """全部完成后显示汇总并允许关闭"""
+        for drive, success in results.items():
+            self.set_result(drive, success)
+        succeeded = sum(results.values())
+        if succeeded == len(results):
+            self.summary_label.setText("全部完成，请重启系统以使更改生效。")
+        elif succeeded:
+            self.summary_label.setText(f"{succeeded}/{len(results)} 个卷成功，请检查系统日志以获取失败原因。")
+        else:
+            self.summary_label.setText("操作失败，请检查系统日志以获取更多信息。")
+        self.close_button.setEnabled(True)
+
+    def reject(self):
+        """操作完成前忽略 Esc"""
+        if self.close_button.isEnabled(): super().reject()
@@ -0,0 +1,28 @@
+import threading
+
+from PySide6.QtCore import Signal
+
+from .base import BaseWorker
+from ..core.com import com_thread
+from ..core.overlay_policy import OverlayPolicy
+
+
+class OverlayPolicyWorker(BaseWorker):
+    """在后台监控覆盖层压力并执行策略动作的工作线程"""
+
+    level_changed_signal = Signal(str)  # 新的压力等级
+
+    def __init__(self, policy: OverlayPolicy):
+        super().__init__()
+        self.policy = policy
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """持续轮询覆盖层状态，直到调用 stop()"""
+        with com_thread():
+            self.policy.run(stop_event=self._stop_event, on_level_changed=self.level_changed_signal.emit)
+
+    def stop(self):
+        """停止监控并等待线程退出"""
+        self._stop_event.set()
+        self.wait()
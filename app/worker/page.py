@@ -0,0 +1,28 @@
+from typing import Callable
+
+from PySide6.QtCore import Signal
+
+from .base import BaseWorker
+from ..core.com import com_thread
+
+
+class PageLoadWorker(BaseWorker):
+    """在后台加载页面数据的工作线程"""
+
+    loaded_signal = Signal(object)  # 加载到的数据
+    failed_signal = Signal(str)  # 错误信息
+
+    def __init__(self, load: Callable[[], dict]):
+        super().__init__()
+        self.load = load
+
+    def run(self):
+        """执行页面的 load 方法（不能访问控件）"""
+        with com_thread():
+            try:
+                data = self.load()
+            except Exception as e:
+                print(f'[!] 后台加载页面数据失败: {e}')
+                self.failed_signal.emit(str(e))
+                return
+        self.loaded_signal.emit(data)
@@ -0,0 +1,33 @@
+import threading
+
+from PySide6.QtCore import Signal
+
+from .base import BaseWorker
+from ..core.com import com_thread
+from ..core.scheduler import Scheduler
+from ..core.storage import ensure_data_dir_excluded
+
+
+class SchedulerWorker(BaseWorker):
+    """在后台执行维护计划任务的工作线程"""
+
+    job_finished_signal = Signal(str, bool)  # 任务 ID, 是否成功
+
+    def __init__(self, scheduler: Scheduler):
+        super().__init__()
+        self.scheduler = scheduler
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """持续执行到期任务，直到调用 stop()"""
+        with com_thread():
+            ensure_data_dir_excluded()  # 任务的执行记录需要在重启后保留
+            self.scheduler.run(
+                stop_event=self._stop_event,
+                on_finished=lambda job, result: self.job_finished_signal.emit(job.id, result),
+            )
+
+    def stop(self):
+        """停止调度并等待线程退出"""
+        self._stop_event.set()
+        self.wait()
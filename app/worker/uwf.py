@@ -1,3 +1,5 @@
+import threading
+
 from PySide6.QtCore import Signal
 
 from .base import BaseWorker
@@ -8,11 +10,24 @@ class InstallUWFServiceWorker(BaseWorker):
     """安装 UWF 服务的工作线程"""
 
     install_result_signal = Signal(bool)
+    progress_signal = Signal(int)  # DISM 进度 0~100
 
     def __init__(self):
         super().__init__()
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """请求终止安装"""
+        self.cancel_event.set()
 
     def run(self):
         """执行安装 UWF 服务的具体逻辑"""
         # 调用 UWF 服务的安装方法
-        self.install_result_signal.emit(install_uwf_service())
+        self.install_result_signal.emit(install_uwf_service(
+            on_progress=lambda value: self.progress_signal.emit(int(value)),
+            cancel_event=self.cancel_event,
+        ))
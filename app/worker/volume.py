@@ -0,0 +1,27 @@
+from PySide6.QtCore import Signal
+
+from .base import BaseWorker
+from ..core.services.volume import UWFVolume
+
+
+class VolumeOperationWorker(BaseWorker):
+    """并发保护/取消保护多个卷的工作线程"""
+
+    volume_result_signal = Signal(str, bool)  # 盘符, 是否成功
+    operation_result_signal = Signal(dict)  # {盘符: 是否成功}
+
+    def __init__(self, operation: str, drives: list[str]):
+        """
+        :param operation: "protect" 或 "unprotect"
+        :param drives: 盘符列表
+        """
+        super().__init__()
+        if operation not in ('protect', 'unprotect'): raise ValueError(f'未知的卷操作: {operation}')
+        self.operation = operation
+        self.drives = drives
+
+    def run(self):
+        """执行卷操作，每个卷完成时发出 volume_result_signal"""
+        run_many = UWFVolume.protect_many if self.operation == 'protect' else UWFVolume.unprotect_many
+        results = run_many(drives=self.drives, on_result=self.volume_result_signal.emit)
+        self.operation_result_signal.emit(results)
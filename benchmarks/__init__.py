@@ -0,0 +1,6 @@
+"""
+FreezeLock 服务层基准测试
+
+在 Linux 上使用模拟的 win32com/WMI 后端运行，统计各页面背后工作流的耗时与 COM 往返次数。
+用法：python -m benchmarks --help
+"""
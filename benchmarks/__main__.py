@@ -0,0 +1,122 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+from .backend import build_backend, install, use_backend
+
+install()  # 必须在导入 app 之前注册替身模块
+
+from app.core.services import refresh_wmi_client  # noqa: E402
+from .workflows import DATASETS, WORKFLOWS  # noqa: E402
+
+DEFAULT_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+
+def run_workflow(name: str, repeat: int, latency: float, dispatch_latency: float, exclusions: int, verbose: bool = False) -> dict:
+    """
+    在全新的后端上运行工作流
+    :return: {'wall_ms': 中位数耗时, 'round_trips': ..., 'dispatch_calls': ..., 'marshalled': ..., 'calls': {...}}
+    """
+    samples = []
+    stats = {}
+    for _ in range(repeat):
+        backend = build_backend(exclusions=exclusions, latency=latency, dispatch_latency=dispatch_latency, **DATASETS.get(name, {}))
+        use_backend(backend)
+        # 服务层的 print 输出会影响计时，默认丢弃
+        with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+            refresh_wmi_client()
+            backend.reset_stats()  # 不统计客户端初始化
+
+            start = time.perf_counter()
+            WORKFLOWS[name]()
+            samples.append((time.perf_counter() - start) * 1000)
+        stats = backend.stats()
+    return {'wall_ms': round(statistics.median(samples), 3), **stats}
+
+
+def compare(name: str, result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    与基线比较，往返次数是确定值必须不增加，耗时允许 tolerance 的浮动
+    :return: 回归描述列表
+    """
+    regressions = []
+    for key in ('round_trips', 'dispatch_calls', 'marshalled'):
+        if key in baseline and result[key] > baseline[key]:
+            regressions.append(f'{name}: {key} {baseline[key]} -> {result[key]}')
+    if result['wall_ms'] > baseline['wall_ms'] * (1 + tolerance):
+        regressions.append(f'{name}: wall_ms {baseline["wall_ms"]} -> {result["wall_ms"]}')
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='FreezeLock 服务层基准测试')
+    parser.add_argument('--latency', type=float, default=1.0, help='每次 WMI 往返注入的延迟（毫秒），默认 1')
+    parser.add_argument('--dispatch-latency', type=float, default=0.0, help='每次 IDispatch 调用注入的延迟（毫秒），默认 0')
+    parser.add_argument('--repeat', type=int, default=5, help='每个工作流的运行次数，耗时取中位数')
+    parser.add_argument('--exclusions', type=int, default=20, help='每个卷的排除项数量')
+    parser.add_argument('--only', action='append', choices=sorted(WORKFLOWS), help='只运行指定工作流，可重复')
+    parser.add_argument('--baselines', default=DEFAULT_BASELINES, help='基线文件路径')
+    parser.add_argument('--update-baselines', action='store_true', help='用本次结果覆盖基线')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='耗时允许的相对浮动，默认 0.25')
+    parser.add_argument('--json', dest='json_output', help='把本次结果写入 JSON 文件')
+    parser.add_argument('--verbose', action='store_true', help='显示服务层的输出')
+    args = parser.parse_args()
+
+    settings = {
+        'latency_ms': args.latency,
+        'dispatch_latency_ms': args.dispatch_latency,
+        'exclusions': args.exclusions,
+    }
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, encoding='utf-8') as f:
+            baselines = json.load(f)
+    same_settings = baselines.get('settings') == settings
+
+    results = {}
+    regressions = []
+    print(f'{"workflow":<40}{"wall_ms":>10}{"round_trips":>13}{"dispatch":>10}{"marshalled":>12}')
+    for name in args.only or WORKFLOWS:
+        result = run_workflow(
+            name, repeat=args.repeat, latency=args.latency / 1000,
+            dispatch_latency=args.dispatch_latency / 1000, exclusions=args.exclusions,
+            verbose=args.verbose,
+        )
+        results[name] = result
+        print(f'{name:<40}{result["wall_ms"]:>10.2f}{result["round_trips"]:>13}{result["dispatch_calls"]:>10}{result["marshalled"]:>12}')
+        baseline = baselines.get('workflows', {}).get(name)
+        if baseline and same_settings:
+            regressions.extend(compare(name, result, baseline, args.tolerance))
+
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'workflows': results}, f, indent=2, ensure_ascii=False)
+
+    if args.update_baselines:
+        merged = baselines.get('workflows', {}) if same_settings else {}
+        merged.update(results)
+        with open(args.baselines, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'workflows': merged}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f'[✓] 基线已更新: {args.baselines}')
+        return 0
+
+    if baselines and not same_settings:
+        print('[*] 基线的运行参数与本次不同，跳过比较')
+    if regressions:
+        print('[!] 检测到性能回归:')
+        for regression in regressions:
+            print(f'    {regression}')
+        return 1
+    if baselines and same_settings:
+        print('[✓] 未检测到性能回归')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
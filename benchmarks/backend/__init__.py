@@ -0,0 +1,20 @@
+from .com import CDispatch, com_error, make_com_error, FakeClass, FakeMethodDef, FakeWMIBackend
+from .dataset import build_backend
+from .modules import install, use_backend, current_backend
+from .replay import ReplayBackend, ReplayMismatch
+
+
+__all__ = [
+    'CDispatch',
+    'com_error',
+    'make_com_error',
+    'FakeClass',
+    'FakeMethodDef',
+    'FakeWMIBackend',
+    'build_backend',
+    'install',
+    'use_backend',
+    'current_backend',
+    'ReplayBackend',
+    'ReplayMismatch',
+]
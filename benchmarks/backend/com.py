@@ -0,0 +1,493 @@
+"""
+模拟 win32com / WMI 对象模型
+
+仅实现 FreezeLock 实际使用到的 SWbem* 接口子集，所有跨进程调用（ExecQuery、ExecMethod_ 等）
+都会经过 FakeWMIBackend.round_trip 计数并注入延迟，属性读取等进程内 IDispatch 调用单独计数。
+"""
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Optional
+
+
+class CDispatch:
+    """与 win32com.client.CDispatch 对应的基类，WMIObject 依赖 isinstance 判断"""
+    pass
+
+
+class com_error(Exception):
+    """与 pywintypes.com_error 对应，args 为 (hresult, text, excepinfo, argerr)"""
+    pass
+
+
+DISP_E_EXCEPTION = -2147352567
+
+
+def make_com_error(scode: int, description: str = '') -> com_error:
+    """
+    构造一个 DISP_E_EXCEPTION 包装的 WMI 错误，与真实 WMI 抛出的异常结构一致
+    :param scode: WMI 错误码，例如 HRESULT.WBEM_E_NOT_FOUND
+    :param description: 错误描述
+    :return: com_error 实例
+    """
+    if scode > 0x7FFFFFFF: scode -= 0x100000000  # 转为有符号 32 位整数
+    return com_error(DISP_E_EXCEPTION, 'Exception occurred.', (0, 'SWbemObjectEx', description, None, 0, scode), None)
+
+
+class FakeMethodDef:
+    """WMI 方法定义"""
+    def __init__(
+        self,
+        name: str,
+        in_params: tuple[str, ...] = (),
+        handler: Optional[Callable[..., dict]] = None,
+    ):
+        self.name = name
+        self.in_params = in_params
+        # handler(backend, instance, **params) -> 输出参数字典（需包含 ReturnValue）
+        self.handler = handler or (lambda backend, instance, **params: {'ReturnValue': 0})
+
+
+class FakeClass:
+    """WMI 类定义"""
+    def __init__(
+        self,
+        name: str,
+        properties: dict[str, Any],
+        keys: tuple[str, ...] = (),
+        methods: tuple[FakeMethodDef, ...] = (),
+    ):
+        self.name = name
+        self.properties = properties  # 属性名 -> 默认值，顺序即 Properties_ 的枚举顺序
+        self.keys = keys
+        self.methods = {method.name: method for method in methods}
+
+
+class FakeWMIBackend:
+    """
+    模拟 WMI 后端
+
+    :param latency: 每次 WMI 往返（跨进程调用）注入的延迟，单位秒
+    :param dispatch_latency: 每次进程内 IDispatch 调用（属性读取、集合索引等）注入的延迟，单位秒
+    :param parent: 其他命名空间的后端把统计和延迟转交给所属的主后端
+    """
+    def __init__(self, latency: float = 0.0, dispatch_latency: float = 0.0, parent: Optional['FakeWMIBackend'] = None):
+        self.parent = parent
+        self.latency = latency
+        self.dispatch_latency = dispatch_latency
+        self.calls: Counter = Counter()  # WMI 往返次数，按操作名统计
+        self.dispatch_calls: int = 0  # 进程内 IDispatch 调用次数
+        self.marshalled: int = 0  # 跨进程传输的属性值数量
+        self.classes: dict[str, FakeClass] = {}
+        self.instances: dict[str, list['FakeObject']] = {}
+        self.namespaces: dict[str, 'FakeWMIBackend'] = {}  # 其他命名空间（小写），例如 root\cimv2
+        self._lock = threading.Lock()
+
+    # ---- 统计 ----
+
+    def round_trip(self, op: str):
+        if self.parent is not None: return self.parent.round_trip(op)
+        with self._lock:
+            self.calls[op] += 1
+        if self.latency: time.sleep(self.latency)
+
+    def dispatch(self):
+        if self.parent is not None: return self.parent.dispatch()
+        with self._lock:
+            self.dispatch_calls += 1
+        if self.dispatch_latency: time.sleep(self.dispatch_latency)
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+            self.dispatch_calls = 0
+            self.marshalled = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'round_trips': sum(self.calls.values()),
+                'dispatch_calls': self.dispatch_calls,
+                'marshalled': self.marshalled,
+                'calls': dict(self.calls),
+            }
+
+    # ---- 数据定义 ----
+
+    def define_class(self, wmi_class: FakeClass):
+        self.classes[wmi_class.name] = wmi_class
+        self.instances.setdefault(wmi_class.name, [])
+
+    def add_instance(self, class_name: str, **values) -> 'FakeObject':
+        wmi_class = self.classes[class_name]
+        instance = FakeObject(self, wmi_class, {**wmi_class.properties, **values})
+        self.instances[class_name].append(instance)
+        return instance
+
+    def new_object(self, class_name: str, **values) -> 'FakeObject':
+        """创建不入库的对象，用于方法输出的嵌入对象（例如 UWF_ExcludedFile）"""
+        wmi_class = self.classes[class_name]
+        return FakeObject(self, wmi_class, {**wmi_class.properties, **values})
+
+    def find_instance(self, instance: 'FakeObject') -> Optional['FakeObject']:
+        """根据键属性查找库中的实例"""
+        keys = instance.wmi_class.keys
+        for stored in self.instances.get(instance.wmi_class.name, []):
+            if all(stored.values.get(key) == instance.values.get(key) for key in keys):
+                return stored
+        return None
+
+    # ---- SWbemServices 接口实现 ----
+
+    def connect(self, pathname: str) -> 'FakeWMIService':
+        """
+        对应 GetObject('winmgmts:\\\\.\\root\\...')
+        :param pathname: moniker 路径
+        :return: 命名空间服务对象
+        """
+        namespace = pathname.split(':', 1)[-1].lstrip('\\').split('\\', 1)[-1].lower()
+        if namespace in self.namespaces: return FakeWMIService(self.namespaces[namespace])
+        if namespace == 'root\\standardcimv2\\embedded': return FakeWMIService(self)
+        raise make_com_error(0x8004100E, f'Invalid namespace {namespace}')
+
+    def snapshot(self, instance: 'FakeObject', columns: Optional[list[str]] = None) -> 'FakeObject':
+        """返回实例的副本，与真实 WMI 一样查询结果不随后续修改变化"""
+        if columns is None:
+            values = dict(instance.values)
+        else:
+            names = list(dict.fromkeys([*instance.wmi_class.keys, *columns]))
+            values = {name: instance.values[name] for name in names if name in instance.values}
+        with self._lock:
+            (self.parent or self).marshalled += len(values)
+        return FakeObject(self, instance.wmi_class, values, source=instance)
+
+    def query(self, wql: str, flags: int = 0x10) -> 'FakeObjectSet':
+        class_name, columns, conditions = parse_wql(wql)
+        if class_name not in self.classes: raise make_com_error(0x80041010, 'Invalid class')
+        for prop, _, _ in conditions:
+            if prop not in self.classes[class_name].properties: raise make_com_error(0x80041017, 'Invalid query')
+        if columns is not None:
+            for column in columns:
+                if column not in self.classes[class_name].properties: raise make_com_error(0x80041017, 'Invalid query')
+        matched = [
+            instance for instance in self.instances[class_name]
+            if all(_compare(instance.values.get(prop), op, value) for prop, op, value in conditions)
+        ]
+        return FakeObjectSet(self, lambda: (self.snapshot(instance, columns) for instance in matched), len(matched), flags)
+
+    def instances_of(self, class_name: str, flags: int = 0x10) -> 'FakeObjectSet':
+        if class_name not in self.classes: raise make_com_error(0x80041010, 'Invalid class')
+        stored = list(self.instances[class_name])
+        return FakeObjectSet(self, lambda: (self.snapshot(instance) for instance in stored), len(stored), flags)
+
+    def put(self, instance: 'FakeObject', flags: int = 0):
+        stored = self.find_instance(instance)
+        if stored is not None:
+            if flags & 0x2: raise make_com_error(0x80041019, 'Instance already exists')
+            stored.values.update(instance.values)
+            return stored
+        if flags & 0x1: raise make_com_error(0x80041002, 'Instance not found')
+        stored = FakeObject(self, instance.wmi_class, dict(instance.values))
+        self.instances[instance.wmi_class.name].append(stored)
+        return stored
+
+    def exec_method(self, instance: 'FakeObject', method_name: str, params: dict) -> 'FakeObject':
+        method = instance.wmi_class.methods.get(method_name)
+        if method is None: raise make_com_error(0x80041008, f'Invalid method {method_name}')
+        target = instance.source or self.find_instance(instance) or instance
+        result = method.handler(self, target, **params)
+        return FakeOutParams(self, result)
+
+
+# ---- WQL 解析 ----
+
+_WQL_PATTERN = re.compile(
+    r'^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<class>\w+)(?:\s+WHERE\s+(?P<where>.+?))?\s*$',
+    re.IGNORECASE | re.DOTALL,
+)
+_CONDITION_PATTERN = re.compile(
+    r'\s*(?P<prop>\w+)\s*(?P<op>=|<>|!=)\s*(?P<value>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[^\s]+)\s*',
+)
+
+
+def _parse_value(token: str) -> Any:
+    if token[0] in '"\'':
+        return re.sub(r'\\(.)', r'\1', token[1:-1])
+    upper = token.upper()
+    if upper == 'TRUE': return True
+    if upper == 'FALSE': return False
+    if upper == 'NULL': return None
+    try:
+        return int(token)
+    except ValueError:
+        raise make_com_error(0x80041017, f'Invalid query value {token}')
+
+
+def _split_and(where: str) -> list[str]:
+    """按顶层 AND 拆分条件，忽略引号内的内容"""
+    parts, current, quote, i = [], [], None, 0
+    while i < len(where):
+        char = where[i]
+        if quote:
+            current.append(char)
+            if char == '\\' and i + 1 < len(where):
+                current.append(where[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+            current.append(char)
+        elif where[i:i + 5].upper() == ' AND ':
+            parts.append(''.join(current))
+            current = []
+            i += 4
+        else:
+            current.append(char)
+        i += 1
+    parts.append(''.join(current))
+    return parts
+
+
+def parse_wql(wql: str) -> tuple[str, Optional[list[str]], list[tuple[str, str, Any]]]:
+    """
+    解析 WQL 查询语句
+    :param wql: 仅支持 SELECT ... FROM ... [WHERE a = b AND ...]
+    :return: (类名, 选择的列或 None 表示 *, 条件列表)
+    """
+    match = _WQL_PATTERN.match(wql)
+    if not match: raise make_com_error(0x80041017, 'Invalid query')
+    columns_text = match.group('columns').strip()
+    columns = None if columns_text == '*' else [column.strip() for column in columns_text.split(',')]
+    conditions = []
+    if match.group('where'):
+        for part in _split_and(match.group('where')):
+            condition = _CONDITION_PATTERN.fullmatch(part)
+            if not condition: raise make_com_error(0x80041017, 'Invalid query')
+            conditions.append((condition.group('prop'), condition.group('op'), _parse_value(condition.group('value'))))
+    return match.group('class'), columns, conditions
+
+
+def _compare(actual: Any, op: str, expected: Any) -> bool:
+    if isinstance(actual, str) and isinstance(expected, str):
+        actual, expected = actual.lower(), expected.lower()  # WQL 字符串比较不区分大小写
+    return actual == expected if op == '=' else actual != expected
+
+
+# ---- SWbem* 对象 ----
+
+class FakeObjectSet(CDispatch):
+    """对应 SWbemObjectSet"""
+    def __init__(self, backend: FakeWMIBackend, factory: Callable, count: int, flags: int = 0x10):
+        self._backend = backend
+        self._factory = factory
+        self._count = count
+        self._flags = flags
+        self._buffer: Optional[list] = None
+        self._consumed = False
+
+    def _items(self):
+        if self._flags & 0x20:
+            # wbemFlagForwardOnly: 不缓存对象，只能枚举一次
+            if self._consumed: raise make_com_error(0x8004101D, 'Enumerator is forward-only')
+            self._consumed = True
+            return self._factory()
+        if self._buffer is None:
+            self._buffer = list(self._factory())
+        return iter(self._buffer)
+
+    def __iter__(self):
+        self._backend.dispatch()  # _NewEnum
+        for item in self._items():
+            self._backend.dispatch()  # IEnumVARIANT::Next
+            yield item
+
+    def __len__(self):
+        self._backend.dispatch()
+        return self._count
+
+    @property
+    def Count(self) -> int:
+        return len(self)
+
+    def __getitem__(self, index: int):
+        self._backend.dispatch()
+        if self._flags & 0x20: raise make_com_error(0x8004101D, 'Enumerator is forward-only')
+        if self._buffer is None:
+            self._buffer = list(self._factory())
+        return self._buffer[index]
+
+    def ItemIndex(self, index: int):
+        return self[index]
+
+
+class FakeProperty(CDispatch):
+    """对应 SWbemProperty"""
+    def __init__(self, owner: 'FakeObject', name: str):
+        self._owner = owner
+        self.Name = name
+
+    @property
+    def Value(self):
+        self._owner.backend.dispatch()
+        return self._owner.values.get(self.Name)
+
+    @Value.setter
+    def Value(self, value):
+        self._owner.backend.dispatch()
+        self._owner.values[self.Name] = value
+
+
+class FakePropertySet(CDispatch):
+    """对应 SWbemPropertySet"""
+    def __init__(self, owner: 'FakeObject'):
+        self._owner = owner
+
+    def __iter__(self):
+        self._owner.backend.dispatch()
+        for name in list(self._owner.values):
+            self._owner.backend.dispatch()
+            yield FakeProperty(self._owner, name)
+
+    def __len__(self):
+        return len(self._owner.values)
+
+    def Item(self, name: str) -> FakeProperty:
+        self._owner.backend.dispatch()
+        if name not in self._owner.values: raise make_com_error(0x80041002, f'Property {name} not found')
+        return FakeProperty(self._owner, name)
+
+
+class FakeMethod(CDispatch):
+    """对应 SWbemMethod"""
+    def __init__(self, backend: FakeWMIBackend, definition: FakeMethodDef):
+        self._backend = backend
+        self._definition = definition
+        self.Name = definition.name
+
+    @property
+    def InParameters(self) -> Optional['FakeObject']:
+        self._backend.dispatch()
+        if not self._definition.in_params: return None
+        params_class = FakeClass('__PARAMETERS', {name: None for name in self._definition.in_params})
+        return FakeObject(self._backend, params_class, dict(params_class.properties))
+
+
+class FakeMethodSet(CDispatch):
+    """对应 SWbemMethodSet"""
+    def __init__(self, backend: FakeWMIBackend, wmi_class: FakeClass):
+        self._backend = backend
+        self._wmi_class = wmi_class
+
+    def __iter__(self):
+        self._backend.dispatch()
+        for definition in self._wmi_class.methods.values():
+            self._backend.dispatch()
+            yield FakeMethod(self._backend, definition)
+
+    def Item(self, name: str) -> FakeMethod:
+        self._backend.dispatch()
+        if name not in self._wmi_class.methods: raise make_com_error(0x80041002, f'Method {name} not found')
+        return FakeMethod(self._backend, self._wmi_class.methods[name])
+
+
+class FakePath(CDispatch):
+    """对应 SWbemObjectPath"""
+    def __init__(self, instance: 'FakeObject'):
+        self.Class = instance.wmi_class.name
+        keys = ','.join(f'{key}={instance.values.get(key)!r}' for key in instance.wmi_class.keys)
+        self.Path = f'{self.Class}.{keys}' if keys else self.Class
+        self.RelPath = self.Path
+
+
+class FakeObject(CDispatch):
+    """对应 SWbemObject（类或实例）"""
+    def __init__(
+        self,
+        backend: FakeWMIBackend,
+        wmi_class: FakeClass,
+        values: dict[str, Any],
+        source: Optional['FakeObject'] = None,
+    ):
+        object.__setattr__(self, 'backend', backend)
+        object.__setattr__(self, 'wmi_class', wmi_class)
+        object.__setattr__(self, 'values', values)
+        object.__setattr__(self, 'source', source)  # 查询结果副本对应的库中实例
+
+    def __getattr__(self, name: str):
+        self.backend.dispatch()
+        values = object.__getattribute__(self, 'values')
+        if name in values: return values[name]
+        raise AttributeError(name)
+
+    def __setattr__(self, name: str, value):
+        self.backend.dispatch()
+        self.values[name] = value
+
+    def __repr__(self):
+        return f'<FakeObject {self.wmi_class.name} {self.values!r}>'
+
+    @property
+    def Properties_(self) -> FakePropertySet:
+        self.backend.dispatch()
+        return FakePropertySet(self)
+
+    @property
+    def Methods_(self) -> FakeMethodSet:
+        self.backend.dispatch()
+        return FakeMethodSet(self.backend, self.wmi_class)
+
+    @property
+    def Path_(self) -> FakePath:
+        self.backend.dispatch()
+        return FakePath(self)
+
+    def SpawnInstance_(self, flags: int = 0) -> 'FakeObject':
+        self.backend.dispatch()
+        return FakeObject(self.backend, self.wmi_class, dict(self.wmi_class.properties))
+
+    def Put_(self, flags: int = 0) -> FakePath:
+        self.backend.round_trip('Put_')
+        return FakePath(self.backend.put(self, flags))
+
+    def ExecMethod_(self, method_name: str, in_params: Optional['FakeObject'] = None, flags: int = 0) -> 'FakeObject':
+        self.backend.round_trip(f'ExecMethod_:{method_name}')
+        params = dict(in_params.values) if in_params is not None else {}
+        return self.backend.exec_method(self, method_name, params)
+
+
+class FakeOutParams(FakeObject):
+    """方法输出参数对象"""
+    def __init__(self, backend: FakeWMIBackend, values: dict[str, Any]):
+        super().__init__(backend, FakeClass('__PARAMETERS', dict(values)), dict(values))
+
+
+class FakeWMIService(CDispatch):
+    """对应 SWbemServices"""
+    def __init__(self, backend: FakeWMIBackend):
+        self._backend = backend
+
+    def ExecQuery(self, query: str, language: str = 'WQL', flags: int = 0x10) -> FakeObjectSet:
+        self._backend.round_trip('ExecQuery')
+        return self._backend.query(query, flags)
+
+    def InstancesOf(self, class_name: str, flags: int = 0x10) -> FakeObjectSet:
+        self._backend.round_trip('InstancesOf')
+        return self._backend.instances_of(class_name, flags)
+
+    def Get(self, path: str = '', flags: int = 0) -> FakeObject:
+        self._backend.round_trip('Get')
+        if path not in self._backend.classes: raise make_com_error(0x80041002, f'{path} not found')
+        wmi_class = self._backend.classes[path]
+        return FakeObject(self._backend, wmi_class, dict(wmi_class.properties))
+
+    def SubclassesOf(self, superclass: str = '', flags: int = 0x10) -> FakeObjectSet:
+        self._backend.round_trip('SubclassesOf')
+        classes = list(self._backend.classes.values())
+        return FakeObjectSet(
+            self._backend,
+            lambda: (FakeObject(self._backend, wmi_class, dict(wmi_class.properties)) for wmi_class in classes),
+            len(classes),
+            flags,
+        )
@@ -0,0 +1,119 @@
+"""
+固定数据集：按真实 UWF 的类结构生成静态实例，方法调用统一返回成功
+"""
+from .com import FakeClass, FakeMethodDef, FakeWMIBackend
+
+EMBEDDED_NAMESPACE = r'root\standardcimv2\embedded'
+CIMV2_NAMESPACE = r'root\cimv2'
+
+OTHER_CLASSES = ['MSFT_NetAdapter', 'MSFT_NetIPAddress', 'MSFT_Volume', 'WEKF_Settings']
+
+
+def _static_exclusions(count: int):
+    def handler(backend, instance, **params):
+        files = [backend.new_object('UWF_ExcludedFile', FileName=rf'\Data\Excluded{i:05d}') for i in range(count)]
+        return {'ReturnValue': 0, 'ExcludedFiles': files}
+    return handler
+
+
+def _static_overlay_files(count: int):
+    def handler(backend, instance, **params):
+        files = [
+            backend.new_object('UWF_OverlayFile', FileName=rf'\Users\Kiosk\AppData\File{i:05d}.dat', FileSize=4096 * (i % 64 + 1))
+            for i in range(count)
+        ]
+        return {'ReturnValue': 0, 'OverlayFiles': files}
+    return handler
+
+
+def uwf_classes(exclusions: int = 0, overlay_files: int = 0) -> list[FakeClass]:
+    """
+    UWF 类定义
+    :param exclusions: GetExclusions 返回的排除项数量
+    :param overlay_files: GetOverlayFiles 返回的覆盖文件数量
+    :return: 类定义列表
+    """
+    return [
+        FakeClass('UWF_Filter', {'Id': 'UWF_Filter', 'CurrentEnabled': False, 'NextEnabled': False}, keys=('Id',), methods=(
+            FakeMethodDef('Enable'),
+            FakeMethodDef('Disable'),
+            FakeMethodDef('ResetSettings'),
+            FakeMethodDef('ShutdownSystem'),
+            FakeMethodDef('RestartSystem'),
+        )),
+        FakeClass('UWF_Volume', {
+            'CurrentSession': True, 'DriveLetter': None, 'VolumeName': None,
+            'BindByDriveLetter': False, 'CommitPending': False, 'Protected': False,
+        }, keys=('CurrentSession', 'DriveLetter', 'VolumeName'), methods=(
+            FakeMethodDef('AddExclusion', ('FileName',)),
+            FakeMethodDef('CommitFile', ('FileName',)),
+            FakeMethodDef('CommitFileDeletion', ('FileName',)),
+            FakeMethodDef('FindExclusion', ('FileName', 'bFound'), lambda backend, instance, **params: {'ReturnValue': 0, 'bFound': False}),
+            FakeMethodDef('GetExclusions', handler=_static_exclusions(exclusions)),
+            FakeMethodDef('Protect'),
+            FakeMethodDef('RemoveAllExclusions'),
+            FakeMethodDef('RemoveExclusion', ('FileName',)),
+            FakeMethodDef('SetBindByDriveLetter', ('bBindByDriveLetter',)),
+            FakeMethodDef('Unprotect'),
+        )),
+        FakeClass('UWF_Overlay', {
+            'Id': 'UWF_Overlay', 'AvailableSpace': 0, 'CriticalOverlayThreshold': 1024,
+            'OverlayConsumption': 0, 'WarningOverlayThreshold': 512,
+        }, keys=('Id',), methods=(
+            FakeMethodDef('GetOverlayFiles', ('Volume',), _static_overlay_files(overlay_files)),
+            FakeMethodDef('SetWarningThreshold', ('size',)),
+            FakeMethodDef('SetCriticalThreshold', ('size',)),
+        )),
+        FakeClass('UWF_OverlayConfig', {'CurrentSession': True, 'Type': 0, 'MaximumSize': 1024}, keys=('CurrentSession',), methods=(
+            FakeMethodDef('SetType', ('type',)),
+            FakeMethodDef('SetMaximumSize', ('size',)),
+        )),
+        FakeClass('UWF_OverlayFile', {'FileName': None, 'FileSize': 0}),
+        FakeClass('UWF_ExcludedFile', {'FileName': None}),
+        FakeClass('UWF_RegistryFilter', {'Id': 'UWF_RegistryFilter', 'CurrentSession': True, 'PersistDomainSecretKey': False, 'PersistTSCAL': False}, keys=('CurrentSession',)),
+        FakeClass('UWF_ExcludedRegistryKey', {'RegistryKey': None}),
+        FakeClass('UWF_Servicing', {'Id': 'UWF_Servicing', 'CurrentSession': True, 'ServicingEnabled': False}, keys=('CurrentSession',)),
+    ]
+
+
+def build_backend(
+    volumes: tuple[str, ...] = ('C:', 'D:'),
+    exclusions: int = 20,
+    overlay_files: int = 0,
+    latency: float = 0.0,
+    dispatch_latency: float = 0.0,
+    protected: tuple[str, ...] = (),
+) -> FakeWMIBackend:
+    """
+    构造带有静态 UWF 数据的后端
+    :param volumes: 卷盘符列表
+    :param exclusions: 每个卷的排除项数量
+    :param overlay_files: 每个卷的覆盖文件数量
+    :param latency: 每次 WMI 往返的延迟，单位秒
+    :param dispatch_latency: 每次 IDispatch 调用的延迟，单位秒
+    :param protected: 在两个会话中都受保护的卷
+    :return: 后端对象
+    """
+    backend = FakeWMIBackend(latency=latency, dispatch_latency=dispatch_latency)
+    for wmi_class in uwf_classes(exclusions=exclusions, overlay_files=overlay_files):
+        backend.define_class(wmi_class)
+    for name in OTHER_CLASSES:
+        backend.define_class(FakeClass(name, {}))
+
+    backend.add_instance('UWF_Filter')
+    backend.add_instance('UWF_Overlay')
+    for current_session in (True, False):
+        backend.add_instance('UWF_OverlayConfig', CurrentSession=current_session)
+        for index, drive in enumerate(volumes):
+            backend.add_instance(
+                'UWF_Volume', CurrentSession=current_session, DriveLetter=drive,
+                VolumeName=rf'\\?\Volume{{{index:08x}-0000-0000-0000-000000000000}}',
+                Protected=drive in protected,
+            )
+
+    cimv2 = FakeWMIBackend(parent=backend)
+    cimv2.define_class(FakeClass('Win32_OptionalFeature', {'Name': None, 'Caption': None, 'InstallState': 2}, keys=('Name',)))
+    cimv2.add_instance('Win32_OptionalFeature', Name='Client-UnifiedWriteFilter', Caption='Unified Write Filter', InstallState=1)
+    backend.namespaces[CIMV2_NAMESPACE.lower()] = cimv2
+
+    return backend
@@ -0,0 +1,74 @@
+"""
+在 sys.modules 中注册 win32com / pywintypes / pythoncom / win32api 的替身模块
+
+必须在导入 app 包之前调用 install()，之后可以通过 use_backend() 随时切换后端。
+"""
+import sys
+import time
+import types
+from typing import Optional
+
+from .com import CDispatch, com_error, FakeWMIBackend
+
+_backend: Optional[FakeWMIBackend] = None
+_installed: bool = False
+
+SYSTEM_DIRECTORY = r'C:\Windows\System32'
+
+
+def _get_object(Pathname: str = None, Class: str = None):
+    if _backend is None: raise com_error(-2147221020, 'Invalid syntax', None, None)  # MK_E_SYNTAX
+    return _backend.connect(Pathname)
+
+
+def install(backend: Optional[FakeWMIBackend] = None):
+    """
+    注册替身模块
+    :param backend: 初始使用的后端
+    """
+    global _installed
+    if not _installed:
+        win32com = types.ModuleType('win32com')
+        client = types.ModuleType('win32com.client')
+        client.CDispatch = CDispatch
+        client.GetObject = _get_object
+        win32com.client = client
+
+        pywintypes = types.ModuleType('pywintypes')
+        pywintypes.com_error = com_error
+
+        pythoncom = types.ModuleType('pythoncom')
+        pythoncom.COINIT_MULTITHREADED = 0x0
+        pythoncom.COINIT_APARTMENTTHREADED = 0x2
+        pythoncom.CoInitialize = lambda: None
+        pythoncom.CoInitializeEx = lambda flags: None
+        pythoncom.CoUninitialize = lambda: None
+
+        win32api = types.ModuleType('win32api')
+        win32api.GetSystemDirectory = lambda: SYSTEM_DIRECTORY
+        win32api.GetTickCount = lambda: int(time.monotonic() * 1000) & 0xFFFFFFFF
+        win32api.GetTickCount64 = lambda: int(time.monotonic() * 1000)
+        win32api.GetLastInputInfo = lambda: 0  # 自启动以来没有用户输入
+
+        sys.modules.update({
+            'win32com': win32com,
+            'win32com.client': client,
+            'pywintypes': pywintypes,
+            'pythoncom': pythoncom,
+            'win32api': win32api,
+        })
+        _installed = True
+    if backend is not None: use_backend(backend)
+
+
+def use_backend(backend: FakeWMIBackend):
+    """
+    切换当前后端，已缓存的 WMI 客户端需要调用 refresh_wmi_client() 重新获取
+    :param backend: 新的后端
+    """
+    global _backend
+    _backend = backend
+
+
+def current_backend() -> Optional[FakeWMIBackend]:
+    return _backend
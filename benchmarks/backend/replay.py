@@ -0,0 +1,219 @@
+"""
+回放 app.core.recording 录制的 WMI 调用
+
+录制中的每个 COM 对象按其来源（父对象来源 + 产生它的调用 + 在结果中的位置）归为一类，
+例如多次 InstancesOf('UWF_Filter') 返回的对象属于同一类。事件按 (来源, 操作, 名称, 参数) 索引，
+同一调用多次发生时按顺序返回，用尽后重复最后一次结果，因此同样的代码路径可以反复回放。
+每个事件按录制耗时（除以 speed）注入延迟。
+"""
+import builtins
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Optional
+
+from .com import CDispatch, com_error
+
+
+_STOP = object()  # 迭代结束
+
+
+class ReplayMismatch(Exception):
+    """调用在录制中不存在，通常意味着代码路径与录制时不同"""
+    pass
+
+
+def load_events(path: str) -> list[dict]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _key(args: Any, kwargs: Any = None) -> str:
+    return json.dumps([args or [], kwargs or {}], sort_keys=True, ensure_ascii=False)
+
+
+class ReplayBackend:
+    """
+    回放后端，可直接传给 modules.use_backend()
+    :param path: 录制文件路径
+    :param speed: 延迟缩放倍数，2 表示以两倍速回放，0 表示不注入延迟
+    """
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self.events = load_events(path)
+        self.calls: Counter = Counter()
+        self._index: dict[tuple, list[tuple[tuple, dict]]] = defaultdict(list)  # 键 -> [(精确键, 事件)]
+        self._names: dict[str, dict[str, set]] = defaultdict(lambda: defaultdict(set))
+        self._cursor: Counter = Counter()
+        self._objects: dict[str, ReplayObject] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        origins = {-1: 'root'}  # 对象编号 -> 来源
+        for event in self.events:
+            origin = origins.get(event['r'])
+            if origin is None: continue  # 来源未知的对象（录制被截断）
+            op, name = event['op'], event.get('n')
+            args = self._normalize(event.get('a'), origins)
+            kwargs = self._normalize(event.get('k'), origins)
+            key = (origin, op, name, _key(args, kwargs))
+            self._index[key].append((key, event))
+            self._index[(origin, op, name, '*')].append((key, event))
+            self._names[origin][op].add(name)
+            self._assign(event.get('v'), key, origins, ())
+
+    @staticmethod
+    def _assign(value: Any, key: tuple, origins: dict, position: tuple):
+        """为结果中的对象分配来源"""
+        if isinstance(value, dict) and '$ref' in value:
+            digest = hashlib.blake2b(repr((key, position)).encode('utf-8'), digest_size=8).hexdigest()
+            origins.setdefault(value['$ref'], digest)
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                ReplayBackend._assign(item, key, origins, (*position, i))
+
+    @staticmethod
+    def _normalize(value: Any, origins: dict) -> Any:
+        """把参数中的对象编号替换为来源"""
+        if isinstance(value, dict):
+            if '$ref' in value: return {'$origin': origins.get(value['$ref'])}
+            return {k: ReplayBackend._normalize(v, origins) for k, v in value.items()}
+        if isinstance(value, list):
+            return [ReplayBackend._normalize(item, origins) for item in value]
+        return value
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'round_trips': sum(self.calls.values()), 'calls': dict(self.calls)}
+
+    def has(self, origin: str, op: str, name: Optional[str]) -> bool:
+        return name in self._names[origin][op]
+
+    def take(self, origin: str, op: str, name: Optional[str] = None, args: Any = None, kwargs: Any = None, exact: bool = True) -> Any:
+        """取出下一条匹配的事件，注入延迟后返回结果或抛出录制的错误"""
+        key = (origin, op, name, _key(args, kwargs) if exact else '*')
+        with self._lock:
+            events = self._index.get(key)
+            if not events:
+                raise ReplayMismatch(f'录制中不存在调用: {op} {name or ""} {args or ""}')
+            exact_key, event = events[min(self._cursor[key], len(events) - 1)]
+            self._cursor[key] += 1
+            self.calls[f'{op}:{name}' if name else op] += 1
+        if self.speed > 0 and event.get('t'):
+            self._delay(event['t'] / self.speed)
+        if 'e' in event:
+            raise self.decode_error(event['e'])
+        if event.get('stop'):
+            return _STOP
+        return self.decode(event.get('v'), exact_key)
+
+    def _delay(self, seconds: float):
+        """time.sleep 对微秒级延迟误差很大，累计到 1 毫秒以上再休眠"""
+        debt = getattr(self._local, 'debt', 0.0) + seconds
+        if debt >= 0.001:
+            start = time.perf_counter()
+            time.sleep(debt)
+            debt -= time.perf_counter() - start
+        self._local.debt = debt
+
+    def obj(self, origin: str) -> 'ReplayObject':
+        with self._lock:
+            if origin not in self._objects:
+                self._objects[origin] = ReplayObject(self, origin)
+            return self._objects[origin]
+
+    def decode(self, value: Any, key: tuple, position: tuple = ()) -> Any:
+        if isinstance(value, dict):
+            if '$ref' in value:
+                digest = hashlib.blake2b(repr((key, position)).encode('utf-8'), digest_size=8).hexdigest()
+                return self.obj(digest)
+            if '$repr' in value: return value['$repr']
+        if isinstance(value, list):
+            return tuple(self.decode(item, key, (*position, i)) for i, item in enumerate(value))
+        return value
+
+    @staticmethod
+    def decode_error(error: dict) -> Exception:
+        if error['type'] == 'com_error':
+            return com_error(*[tuple(arg) if isinstance(arg, list) else arg for arg in error['args']])
+        exception_type = getattr(builtins, error['type'], None)
+        if isinstance(exception_type, type) and issubclass(exception_type, Exception):
+            return exception_type(*error['args'])
+        return RuntimeError(f'{error["type"]}: {error["args"]}')
+
+    @staticmethod
+    def encode(value: Any) -> Any:
+        """与 WMIRecorder.encode 一致，对象以来源表示，用于匹配参数"""
+        if isinstance(value, ReplayObject):
+            return {'$origin': value._origin}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [ReplayBackend.encode(item) for item in value]
+        return {'$repr': str(value)}
+
+    def connect(self, pathname: str) -> 'ReplayObject':
+        return self.take('root', 'connect', pathname)
+
+
+class ReplayObject(CDispatch):
+    """回放的 COM 对象"""
+    def __init__(self, backend: ReplayBackend, origin: str):
+        object.__setattr__(self, '_backend', backend)
+        object.__setattr__(self, '_origin', origin)
+
+    def __getattr__(self, name: str):
+        if name.startswith('__'): raise AttributeError(name)
+        backend, origin = self._backend, self._origin
+        if backend.has(origin, 'call', name):
+            def method(*args, **kwargs):
+                return backend.take(
+                    origin, 'call', name, backend.encode(list(args)),
+                    {k: backend.encode(v) for k, v in kwargs.items()} or None,
+                )
+            return method
+        if backend.has(origin, 'get', name):
+            return backend.take(origin, 'get', name, exact=False)
+        raise AttributeError(name)
+
+    def __setattr__(self, name: str, value: Any):
+        backend = self._backend
+        try:
+            backend.take(self._origin, 'set', name, backend.encode([value]))
+        except ReplayMismatch:
+            # 参数值与录制不同（例如不同的输入参数），只要录制中设置过同名属性就接受
+            backend.take(self._origin, 'set', name, exact=False)
+
+    def __getitem__(self, key):
+        return self._backend.take(self._origin, 'index', None, [key])
+
+    def __len__(self):
+        return self._backend.take(self._origin, 'len')
+
+    def __bool__(self):
+        if self._backend.has(self._origin, 'bool', None):
+            return self._backend.take(self._origin, 'bool')
+        return True
+
+    def __iter__(self):
+        index = 0
+        while True:
+            try:
+                item = self._backend.take(self._origin, 'next', None, [index])
+            except ReplayMismatch:
+                return  # 录制时提前结束了迭代
+            if item is _STOP: return
+            yield item
+            index += 1
+
+    def __repr__(self):
+        return f'<ReplayObject {self._origin}>'
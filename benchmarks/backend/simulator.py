@@ -0,0 +1,368 @@
+"""
+内存中的 UWF 模拟器
+
+在 dataset 的类结构上实现 UWF 的语义：当前/下一会话状态、Enable/Disable、Protect/Unprotect、排除项、
+覆盖层配置、覆盖层占用增长与 GetOverlayFiles，真实 UWF 会失败的调用以 com_error 的形式返回 WBEM 错误码。
+通过 reboot() 模拟重启，使下一会话的设置生效并清空覆盖层。
+"""
+import ntpath
+import random
+import threading
+from typing import Optional
+
+from app.core.errors.hresult import HRESULT
+
+from .com import FakeObject, make_com_error
+from .dataset import build_backend
+
+MB = 1024 * 1024
+OVERLAY_TYPES = (0, 1)  # RAM, Disk
+
+
+def _normalize(path: str) -> str:
+    """统一分隔符并去掉末尾分隔符，UWF 排除项路径不区分大小写"""
+    path = path.replace('/', '\\')
+    return path.rstrip('\\') if len(path) > 1 else path
+
+
+def volume_letters(count: int) -> tuple[str, ...]:
+    """生成 count 个卷的盘符，超过 24 个的卷没有盘符"""
+    letters = [f'{chr(code)}:' for code in range(ord('C'), ord('Z') + 1)]
+    return tuple(letters[i] if i < len(letters) else '' for i in range(count))
+
+
+class UWFSimulator:
+    """
+    UWF 模拟器
+
+    :param volumes: 卷盘符列表或卷数量
+    :param exclusions: 每个卷初始的排除项数量（当前与下一会话相同）
+    :param overlay_files: 每个受保护卷初始的覆盖文件数量
+    :param filter_enabled: UWF 是否已启用
+    :param protected: 初始受保护的卷
+    :param maximum_size: 覆盖层最大大小（MB）
+    :param latency: 每次 WMI 往返的延迟，单位秒
+    :param dispatch_latency: 每次 IDispatch 调用的延迟，单位秒
+    :param seed: 随机数种子，用于生成覆盖文件
+    """
+    def __init__(
+        self,
+        volumes: tuple[str, ...] or int = ('C:', 'D:'),
+        exclusions: int = 0,
+        overlay_files: int = 0,
+        filter_enabled: bool = True,
+        protected: Optional[tuple[str, ...]] = None,
+        maximum_size: int = 1024,
+        latency: float = 0.0,
+        dispatch_latency: float = 0.0,
+        seed: int = 0,
+    ):
+        if isinstance(volumes, int): volumes = volume_letters(volumes)
+        self.backend = build_backend(volumes=volumes, exclusions=0, latency=latency, dispatch_latency=dispatch_latency)
+        self.random = random.Random(seed)
+        self._lock = threading.RLock()
+
+        self.filter: FakeObject = self.backend.instances['UWF_Filter'][0]
+        self.overlay: FakeObject = self.backend.instances['UWF_Overlay'][0]
+        self.overlay_configs: dict[bool, FakeObject] = {
+            instance.values['CurrentSession']: instance for instance in self.backend.instances['UWF_OverlayConfig']
+        }
+        # 卷名 -> {CurrentSession: 实例}，没有盘符的卷以卷名区分
+        self.volumes: dict[str, dict[bool, FakeObject]] = {}
+        for instance in self.backend.instances['UWF_Volume']:
+            self.volumes.setdefault(instance.values['VolumeName'], {})[instance.values['CurrentSession']] = instance
+        # (卷名, CurrentSession) -> {小写路径: 原始路径}
+        self.exclusions: dict[tuple[str, bool], dict[str, str]] = {}
+        # 卷名 -> {小写路径: (原始路径, 字节数)}
+        self.overlay_files: dict[str, dict[str, tuple[str, int]]] = {}
+        self._overlay_bytes = 0
+
+        protected = set(volumes if protected is None else protected)
+        for volume_name, sessions in self.volumes.items():
+            is_protected = sessions[True].values['DriveLetter'] in protected
+            for current_session, instance in sessions.items():
+                instance.values['Protected'] = is_protected
+                self.exclusions[(volume_name, current_session)] = {
+                    rf'\data\excluded{i:06d}': rf'\Data\Excluded{i:06d}' for i in range(exclusions)
+                }
+            self.overlay_files[volume_name] = {}
+        self.filter.values.update(CurrentEnabled=filter_enabled, NextEnabled=filter_enabled)
+        for instance in self.overlay_configs.values():
+            instance.values['MaximumSize'] = maximum_size
+        self.overlay.values.update(
+            CriticalOverlayThreshold=maximum_size, WarningOverlayThreshold=maximum_size // 2, AvailableSpace=maximum_size,
+        )
+
+        self._bind_methods()
+        for volume_name, sessions in self.volumes.items():
+            if overlay_files and sessions[True].values['Protected']:
+                for i in range(overlay_files):
+                    self._write(volume_name, rf'\Users\Kiosk\AppData\Local\Cache{i % 97:02d}\File{i:06d}.dat', self.random.randint(1, 16) * 1024)
+        self._update_consumption()
+
+    # ---- 状态辅助 ----
+
+    def _volume_name(self, instance: FakeObject) -> str:
+        return instance.values['VolumeName']
+
+    def volume_by_drive(self, drive: str) -> Optional[str]:
+        for volume_name, sessions in self.volumes.items():
+            if (sessions[True].values['DriveLetter'] or '').upper() == drive.upper():
+                return volume_name
+        return None
+
+    def _current(self, volume_name: str) -> FakeObject:
+        return self.volumes[volume_name][True]
+
+    def _is_excluded(self, volume_name: str, path: str) -> bool:
+        """当前会话下路径或其任一上级目录是否被排除"""
+        excluded = self.exclusions[(volume_name, True)]
+        key = _normalize(path).lower()
+        while key and key != '\\':
+            if key in excluded: return True
+            key = ntpath.dirname(key)
+        return False
+
+    def _update_consumption(self):
+        consumption = -(-self._overlay_bytes // MB)  # 向上取整为 MB
+        maximum = self.overlay_configs[True].values['MaximumSize']
+        self.overlay.values.update(OverlayConsumption=consumption, AvailableSpace=max(0, maximum - consumption))
+
+    def _write(self, volume_name: str, path: str, size: int) -> bool:
+        if not self.filter.values['CurrentEnabled'] or not self._current(volume_name).values['Protected']:
+            return True  # 未受保护，直接写入磁盘
+        if self._is_excluded(volume_name, path):
+            return True
+        files = self.overlay_files[volume_name]
+        key = _normalize(path).lower()
+        previous = files.get(key, (path, 0))[1]
+        maximum = self.overlay_configs[True].values['MaximumSize'] * MB
+        if self._overlay_bytes - previous + size > maximum:
+            return False  # 覆盖层已满，写入被拒绝
+        files[key] = (_normalize(path), size)
+        self._overlay_bytes += size - previous
+        return True
+
+    # ---- 模拟设备行为 ----
+
+    def write_file(self, drive: str, path: str, size: int) -> bool:
+        """
+        模拟写入文件
+        :return: 写入是否成功（覆盖层已满时失败）
+        """
+        with self._lock:
+            volume_name = self.volume_by_drive(drive)
+            if volume_name is None: raise ValueError(f'Unknown volume {drive}')
+            result = self._write(volume_name, path, size)
+            self._update_consumption()
+            return result
+
+    def grow(self, megabytes: float, drive: Optional[str] = None, file_size: int = 256 * 1024) -> int:
+        """
+        向覆盖层写入随机文件，模拟占用增长
+        :return: 成功写入的文件数量
+        """
+        with self._lock:
+            drives = [drive] if drive else [
+                sessions[True].values['DriveLetter'] for sessions in self.volumes.values()
+                if sessions[True].values['Protected'] and sessions[True].values['DriveLetter']
+            ]
+            if not drives: return 0
+            written = 0
+            for _ in range(int(megabytes * MB // file_size)):
+                target = self.random.choice(drives)
+                path = rf'\ProgramData\App\Temp{self.random.randrange(100):02d}\{self.random.getrandbits(48):012x}.tmp'
+                if not self._write(self.volume_by_drive(target), path, file_size): break
+                written += 1
+            self._update_consumption()
+            return written
+
+    def reboot(self):
+        """模拟重启：下一会话的设置成为当前设置，覆盖层被清空"""
+        with self._lock:
+            self.filter.values['CurrentEnabled'] = self.filter.values['NextEnabled']
+            for volume_name, sessions in self.volumes.items():
+                for prop in ('Protected', 'BindByDriveLetter'):
+                    sessions[True].values[prop] = sessions[False].values[prop]
+                sessions[True].values['CommitPending'] = False
+                self.exclusions[(volume_name, True)] = dict(self.exclusions[(volume_name, False)])
+                self.overlay_files[volume_name].clear()
+            self._overlay_bytes = 0
+            for prop in ('Type', 'MaximumSize'):
+                self.overlay_configs[True].values[prop] = self.overlay_configs[False].values[prop]
+            self._update_consumption()
+
+    # ---- WMI 方法实现 ----
+
+    def _bind_methods(self):
+        handlers = {
+            'UWF_Filter': {
+                'Enable': lambda b, i, **p: self._set_filter(True),
+                'Disable': lambda b, i, **p: self._set_filter(False),
+                'ResetSettings': self._reset_settings,
+                'RestartSystem': lambda b, i, **p: self._restart(),
+                'ShutdownSystem': lambda b, i, **p: self._restart(),
+            },
+            'UWF_Volume': {
+                'AddExclusion': self._add_exclusion,
+                'RemoveExclusion': self._remove_exclusion,
+                'RemoveAllExclusions': self._remove_all_exclusions,
+                'FindExclusion': self._find_exclusion,
+                'GetExclusions': self._get_exclusions,
+                'CommitFile': self._commit_file,
+                'CommitFileDeletion': self._commit_file_deletion,
+                'Protect': lambda b, i, **p: self._set_protected(i, True),
+                'Unprotect': lambda b, i, **p: self._set_protected(i, False),
+                'SetBindByDriveLetter': self._set_bind_by_drive_letter,
+            },
+            'UWF_Overlay': {
+                'GetOverlayFiles': self._get_overlay_files,
+                'SetWarningThreshold': self._set_warning_threshold,
+                'SetCriticalThreshold': self._set_critical_threshold,
+            },
+            'UWF_OverlayConfig': {
+                'SetType': self._set_type,
+                'SetMaximumSize': self._set_maximum_size,
+            },
+        }
+        for class_name, methods in handlers.items():
+            for method_name, handler in methods.items():
+                self.backend.classes[class_name].methods[method_name].handler = self._locked(handler)
+
+    def _locked(self, handler):
+        def wrapper(backend, instance, **params):
+            with self._lock:
+                return handler(backend, instance, **params)
+        return wrapper
+
+    @staticmethod
+    def _require_next_session(instance: FakeObject):
+        if instance.values['CurrentSession']:
+            raise make_com_error(HRESULT.WBEM_E_INVALID_OPERATION, 'Settings can only be changed for the next session')
+
+    def _require_filter_disabled(self):
+        if self.filter.values['CurrentEnabled']:
+            raise make_com_error(HRESULT.WBEM_E_INVALID_OPERATION, 'Overlay settings cannot be changed while UWF is enabled')
+
+    @staticmethod
+    def _require_path(params: dict) -> str:
+        path = params.get('FileName')
+        if not isinstance(path, str) or not path.startswith('\\'):
+            raise make_com_error(HRESULT.WBEM_E_INVALID_PARAMETER, f'Invalid file name {path!r}')
+        return _normalize(path)
+
+    def _set_filter(self, enabled: bool) -> dict:
+        self.filter.values['NextEnabled'] = enabled
+        return {'ReturnValue': 0}
+
+    def _reset_settings(self, backend, instance, **params) -> dict:
+        self.filter.values['NextEnabled'] = False
+        for volume_name, sessions in self.volumes.items():
+            sessions[False].values.update(Protected=False, BindByDriveLetter=False)
+            self.exclusions[(volume_name, False)].clear()
+        self.overlay_configs[False].values.update(Type=0, MaximumSize=1024)
+        return {'ReturnValue': 0}
+
+    def _restart(self) -> dict:
+        self.reboot()
+        return {'ReturnValue': 0}
+
+    def _add_exclusion(self, backend, instance, **params) -> dict:
+        self._require_next_session(instance)
+        path = self._require_path(params)
+        if path == '\\': raise make_com_error(HRESULT.WBEM_E_INVALID_PARAMETER, 'Cannot exclude the volume root')
+        excluded = self.exclusions[(self._volume_name(instance), False)]
+        if path.lower() in excluded: raise make_com_error(HRESULT.WBEM_E_ALREADY_EXISTS, f'{path} is already excluded')
+        excluded[path.lower()] = path
+        return {'ReturnValue': 0}
+
+    def _remove_exclusion(self, backend, instance, **params) -> dict:
+        self._require_next_session(instance)
+        path = self._require_path(params)
+        excluded = self.exclusions[(self._volume_name(instance), False)]
+        if excluded.pop(path.lower(), None) is None: raise make_com_error(HRESULT.WBEM_E_NOT_FOUND, f'{path} is not excluded')
+        return {'ReturnValue': 0}
+
+    def _remove_all_exclusions(self, backend, instance, **params) -> dict:
+        self._require_next_session(instance)
+        self.exclusions[(self._volume_name(instance), False)].clear()
+        return {'ReturnValue': 0}
+
+    def _find_exclusion(self, backend, instance, **params) -> dict:
+        path = self._require_path(params)
+        excluded = self.exclusions[(self._volume_name(instance), instance.values['CurrentSession'])]
+        return {'ReturnValue': 0, 'bFound': path.lower() in excluded}
+
+    def _get_exclusions(self, backend, instance, **params) -> dict:
+        excluded = self.exclusions[(self._volume_name(instance), instance.values['CurrentSession'])]
+        files = [backend.new_object('UWF_ExcludedFile', FileName=path) for path in excluded.values()]
+        return {'ReturnValue': 0, 'ExcludedFiles': files or None}
+
+    def _commit(self, instance: FakeObject, params: dict) -> str:
+        path = self._require_path(params)
+        volume_name = self._volume_name(instance)
+        if not self.filter.values['CurrentEnabled'] or not self._current(volume_name).values['Protected']:
+            raise make_com_error(HRESULT.WBEM_E_INVALID_OPERATION, 'Volume is not protected in the current session')
+        if path.lower() not in self.overlay_files[volume_name]:
+            raise make_com_error(HRESULT.WBEM_E_NOT_FOUND, f'{path} is not in the overlay')
+        _, size = self.overlay_files[volume_name].pop(path.lower())
+        self._overlay_bytes -= size
+        self._update_consumption()
+        return volume_name
+
+    def _commit_file(self, backend, instance, **params) -> dict:
+        self._commit(instance, params)
+        return {'ReturnValue': 0}
+
+    def _commit_file_deletion(self, backend, instance, **params) -> dict:
+        self._commit(instance, params)
+        return {'ReturnValue': 0}
+
+    def _set_protected(self, instance: FakeObject, protected: bool) -> dict:
+        self._require_next_session(instance)
+        instance.values['Protected'] = protected
+        return {'ReturnValue': 0}
+
+    def _set_bind_by_drive_letter(self, backend, instance, **params) -> dict:
+        self._require_next_session(instance)
+        instance.values['BindByDriveLetter'] = bool(params.get('bBindByDriveLetter'))
+        return {'ReturnValue': 0}
+
+    def _get_overlay_files(self, backend, instance, **params) -> dict:
+        volume_name = self.volume_by_drive(params.get('Volume') or '') or params.get('Volume')
+        if volume_name not in self.overlay_files: raise make_com_error(HRESULT.WBEM_E_NOT_FOUND, f'Unknown volume {params.get("Volume")}')
+        files = [
+            backend.new_object('UWF_OverlayFile', FileName=path, FileSize=size)
+            for path, size in self.overlay_files[volume_name].values()
+        ]
+        return {'ReturnValue': 0, 'OverlayFiles': files or None}
+
+    def _set_warning_threshold(self, backend, instance, **params) -> dict:
+        size = params.get('size')
+        if not isinstance(size, int) or size <= 0 or size >= self.overlay.values['CriticalOverlayThreshold']:
+            raise make_com_error(HRESULT.WBEM_E_INVALID_PARAMETER, 'Warning threshold must be below the critical threshold')
+        self.overlay.values['WarningOverlayThreshold'] = size
+        return {'ReturnValue': 0}
+
+    def _set_critical_threshold(self, backend, instance, **params) -> dict:
+        size = params.get('size')
+        if not isinstance(size, int) or size <= self.overlay.values['WarningOverlayThreshold']:
+            raise make_com_error(HRESULT.WBEM_E_INVALID_PARAMETER, 'Critical threshold must be above the warning threshold')
+        self.overlay.values['CriticalOverlayThreshold'] = size
+        return {'ReturnValue': 0}
+
+    def _set_type(self, backend, instance, **params) -> dict:
+        self._require_next_session(instance)
+        self._require_filter_disabled()
+        if params.get('type') not in OVERLAY_TYPES: raise make_com_error(HRESULT.WBEM_E_INVALID_PARAMETER, 'Invalid overlay type')
+        instance.values['Type'] = params['type']
+        return {'ReturnValue': 0}
+
+    def _set_maximum_size(self, backend, instance, **params) -> dict:
+        self._require_next_session(instance)
+        self._require_filter_disabled()
+        size = params.get('size')
+        if not isinstance(size, int) or size < 1024:
+            raise make_com_error(HRESULT.WBEM_E_INVALID_PARAMETER, 'Maximum size must be at least 1024 MB')
+        instance.values['MaximumSize'] = size
+        return {'ReturnValue': 0}
@@ -0,0 +1,206 @@
+"""
+冷启动基准
+
+在 Qt offscreen 平台上反复以全新进程启动 FreezeLock（使用模拟的 WMI 后端），记录各阶段耗时：
+导入、QApplication 创建、WMI 客户端与类发现、MainWindow 构造、StatusPage 首次刷新和首次显示，
+同时通过 -X importtime 统计各顶层模块的导入耗时，并可与上一次的结果比较生成回归报告。
+
+用法：
+    python -m benchmarks.coldstart --runs 10 --output coldstart.json
+    python -m benchmarks.coldstart --runs 10 --compare coldstart.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_MARKER = '@@coldstart@@'
+# 由基准本身引入的模块，不计入导入回归
+HARNESS_PACKAGES = {'benchmarks', 'argparse', 'runpy', 'subprocess', 'statistics', 'json', 'site', 'encodings'}
+PHASES = ['interpreter', 'stub_setup', 'imports', 'qapplication', 'wmi_client', 'main_window', 'status_page_refresh', 'first_show', 'total']
+
+
+def child(latency: float, use_stub: bool):
+    """在子进程中启动应用并输出各阶段耗时"""
+    timings = {}
+    mark = time.perf_counter()
+
+    def phase(name: str):
+        nonlocal mark
+        now = time.perf_counter()
+        timings[name] = timings.get(name, 0.0) + (now - mark) * 1000
+        mark = now
+
+    if use_stub:
+        from .backend import build_backend, install
+        install(build_backend(latency=latency))
+    phase('stub_setup')
+
+    from PySide6.QtWidgets import QApplication
+    from app.ui import MainWindow
+    from app.ui.pages import StatusPage
+    from app.core.services import get_wmi_client
+    phase('imports')
+
+    app = QApplication([sys.argv[0], '-platform', 'offscreen'])
+    phase('qapplication')
+
+    get_wmi_client()
+    phase('wmi_client')
+
+    # StatusPage 的首次刷新发生在 MainWindow 构造过程中，单独计时后从构造耗时中扣除
+    refresh = StatusPage.refresh
+    refresh_ms = []
+
+    def timed_refresh(self):
+        start = time.perf_counter()
+        try:
+            return refresh(self)
+        finally:
+            refresh_ms.append((time.perf_counter() - start) * 1000)
+
+    StatusPage.refresh = timed_refresh
+    window = MainWindow()
+    phase('main_window')
+    StatusPage.refresh = refresh
+    first_refresh = refresh_ms[0] if refresh_ms else 0.0
+    timings['main_window'] -= first_refresh
+    timings['status_page_refresh'] = first_refresh
+
+    window.show()
+    app.processEvents()
+    phase('first_show')
+
+    print(RESULT_MARKER + json.dumps(timings))
+    window.close()  # 停止后台线程（包括页面加载）后再退出
+
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """
+    解析 -X importtime 输出，按顶层包汇总累计导入耗时（毫秒）
+    """
+    packages = defaultdict(float)
+    for line in stderr.splitlines():
+        # 格式：import time:       123 |        456 |   package.module
+        if not line.startswith('import time:') or 'cumulative' in line: continue
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        name = name[1:]
+        if name.startswith('  '): continue  # 只统计顶层导入，子模块已包含在累计耗时中
+        packages[name.split('.')[0]] += int(cumulative_us) / 1000
+    return dict(packages)
+
+
+def run_once(latency: float, use_stub: bool) -> tuple[dict[str, float], dict[str, float]]:
+    # 每次使用空的数据目录，没有状态缓存，首个页面同步刷新
+    data_dir = tempfile.TemporaryDirectory(prefix='freezelock-coldstart-')
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', PYTHONDONTWRITEBYTECODE='0', FREEZELOCK_DATA_DIR=data_dir.name)
+    cmd = [sys.executable, '-X', 'importtime', '-m', 'benchmarks.coldstart', '--child', '--latency', str(latency)]
+    if not use_stub: cmd.append('--no-stub')
+    start = time.perf_counter()
+    with data_dir:
+        result = subprocess.run(cmd, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    total = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'[!] 子进程启动失败:\n{result.stderr[-2000:]}')
+    line = next(line for line in result.stdout.splitlines() if line.startswith(RESULT_MARKER))
+    timings = json.loads(line[len(RESULT_MARKER):])
+    timings['total'] = total
+    timings['interpreter'] = total - sum(timings[name] for name in PHASES if name in timings and name != 'total')
+    return timings, parse_importtime(result.stderr)
+
+
+def summarize(samples: list[dict[str, float]]) -> dict[str, dict[str, float]]:
+    summary = {}
+    for name in PHASES:
+        values = sorted(sample.get(name, 0.0) for sample in samples)
+        summary[name] = {
+            'median': round(statistics.median(values), 3),
+            'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            'min': round(values[0], 3),
+        }
+    return summary
+
+
+def report_regressions(current: dict, previous: dict, tolerance: float) -> list[str]:
+    """比较各阶段中位数，超出 tolerance 的阶段视为回归"""
+    lines = []
+    print(f'\n{"phase":<22}{"previous":>12}{"current":>12}{"delta":>10}')
+    for name in PHASES:
+        before = previous['phases'].get(name, {}).get('median')
+        after = current['phases'][name]['median']
+        if before is None: continue
+        delta = (after - before) / before if before else 0.0
+        flag = ' !' if delta > tolerance and after - before > 1.0 else ''
+        print(f'{name:<22}{before:>12.2f}{after:>12.2f}{delta:>+9.1%}{flag}')
+        if flag: lines.append(f'{name}: {before:.2f} ms -> {after:.2f} ms ({delta:+.1%})')
+    for package, after in sorted(current['imports'].items(), key=lambda item: -item[1])[:15]:
+        before = previous.get('imports', {}).get(package)
+        if package in HARNESS_PACKAGES or not before: continue
+        if after - before > max(2.0, before * tolerance):
+            lines.append(f'import {package}: {before:.2f} ms -> {after:.2f} ms')
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.coldstart', description='FreezeLock 冷启动基准')
+    parser.add_argument('--runs', type=int, default=5, help='启动次数')
+    parser.add_argument('--latency', type=float, default=1.0, help='每次 WMI 往返注入的延迟（毫秒）')
+    parser.add_argument('--no-stub', action='store_true', help='不使用模拟后端（在 Windows 上测量真实 WMI）')
+    parser.add_argument('--top', type=int, default=15, help='显示导入耗时最多的顶层包数量')
+    parser.add_argument('--output', help='把本次结果写入 JSON 文件')
+    parser.add_argument('--compare', help='与之前保存的结果比较')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='允许的相对浮动，默认 0.15')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(latency=args.latency / 1000, use_stub=not args.no_stub)
+        return 0
+
+    samples, imports = [], defaultdict(list)
+    for i in range(args.runs):
+        timings, packages = run_once(latency=args.latency, use_stub=not args.no_stub)
+        samples.append(timings)
+        for package, elapsed in packages.items():
+            imports[package].append(elapsed)
+        print(f'[*] 第 {i + 1}/{args.runs} 次启动: {timings["total"]:.1f} ms', flush=True)
+
+    current = {
+        'settings': {'runs': args.runs, 'latency_ms': args.latency, 'stub': not args.no_stub},
+        'phases': summarize(samples),
+        'imports': {package: round(statistics.median(values), 3) for package, values in imports.items()},
+    }
+
+    print(f'\n{"phase":<22}{"median_ms":>12}{"p95_ms":>12}{"min_ms":>12}')
+    for name, values in current['phases'].items():
+        print(f'{name:<22}{values["median"]:>12.2f}{values["p95"]:>12.2f}{values["min"]:>12.2f}')
+    print(f'\n{"package":<30}{"import_ms":>12}')
+    for package, elapsed in sorted(current['imports'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f'{package:<30}{elapsed:>12.2f}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+        print(f'[✓] 结果已保存: {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = report_regressions(current, previous, args.tolerance)
+        if regressions:
+            print('[!] 检测到启动回归:')
+            for line in regressions:
+                print(f'    {line}')
+            return 1
+        print('[✓] 未检测到启动回归')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+模拟的 DISM 命令
+
+按真实 DISM 的格式输出进度条（用 \\r 刷新同一行），用于在没有 DISM 的环境中测试 UWF 功能安装流程：
+    FREEZELOCK_DISM="python -m benchmarks.fake_dism" python main.py
+
+通过环境变量控制行为：
+    FAKE_DISM_STEPS  进度条更新次数，默认 20
+    FAKE_DISM_DELAY  每次更新的间隔秒数，默认 0.1
+    FAKE_DISM_EXIT   退出码，默认 0；3010（需要重启）只在 Windows 上能原样返回
+    FAKE_DISM_HANG   进度到达该百分比后不再输出也不退出，用于测试超时和取消
+"""
+import os
+import sys
+import time
+
+WIDTH = 58
+
+
+def progress_bar(percent: float) -> str:
+    text = f'{percent:.1f}%'
+    filled = int(WIDTH * percent / 100)
+    bar = ('=' * filled).ljust(WIDTH)
+    start = (WIDTH - len(text)) // 2
+    return f'[{bar[:start]}{text}{bar[start + len(text):]}]'
+
+
+def main() -> int:
+    steps = int(os.environ.get('FAKE_DISM_STEPS', 20))
+    delay = float(os.environ.get('FAKE_DISM_DELAY', 0.1))
+    exit_code = int(os.environ.get('FAKE_DISM_EXIT', 0))
+    hang = os.environ.get('FAKE_DISM_HANG')
+
+    print('\nDeployment Image Servicing and Management tool\nVersion: 10.0.19041.3636\n')
+    print('Image Version: 10.0.19045.4291\n')
+    print(f'Enabling feature(s) {" ".join(sys.argv[1:])}', flush=True)
+    for step in range(steps + 1):
+        percent = 100 * step / steps
+        sys.stdout.write('\r' + progress_bar(percent))
+        sys.stdout.flush()
+        if hang is not None and percent >= float(hang):
+            while True: time.sleep(1)
+        time.sleep(delay)
+    print()
+    if exit_code in (0, 3010):
+        print('The operation completed successfully.')
+        if exit_code == 3010: print('Restart Windows to complete this operation.')
+    else:
+        print(f'Error: {exit_code}\n\nThe operation failed.')
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
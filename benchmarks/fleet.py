@@ -0,0 +1,102 @@
+"""
+在本机模拟一组主机，端到端运行批量发布
+
+每台模拟主机是一个独立进程，运行基于 UWF 模拟器的 FreezeLock 代理。--broken 指定的主机缺少 D: 卷，
+对其应用的变更会失败，用于观察健康检查、错误率阈值与续跑。
+用法：python -m benchmarks.fleet --hosts 20 --broken 7 --wave-size 5 --report rollout.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_CHANGES = {
+    'atomic': True,
+    'operations': [
+        {'op': 'set_maximum_size', 'size': 2048},
+        {'op': 'protect', 'drive': 'D:'},
+        {'op': 'add_exclusion', 'drive': 'D:', 'path': '\\Kiosk\\Data'},
+        {'op': 'enable'},
+    ],
+}
+
+
+def serve(volumes: list[str], latency: float):
+    """模拟主机进程：启动代理并在标准输出打印端口"""
+    from .backend import install, use_backend
+    from .backend.simulator import UWFSimulator
+
+    install()
+    from app.agent import Agent, AgentServer
+
+    simulator = UWFSimulator(volumes=tuple(volumes), filter_enabled=False, protected=(), latency=latency)
+    use_backend(simulator.backend)
+    agent = Agent()
+    server = AgentServer(agent, address=('127.0.0.1', 0))
+    print(f'PORT {server.server_address[1]}', flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        agent.close()
+
+
+def start_hosts(count: int, broken: set[int], latency: float) -> tuple[list[subprocess.Popen], list[dict]]:
+    """启动 count 个模拟主机，返回进程与主机清单"""
+    processes, inventory = [], []
+    for i in range(count):
+        volumes = ['C:'] if i in broken else ['C:', 'D:']
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.fleet', '--serve', '--volumes', *volumes, '--latency', str(latency)],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        processes.append(process)
+    for i, process in enumerate(processes):
+        line = ''
+        while not line.startswith('PORT '):
+            line = process.stdout.readline()
+            if not line: raise RuntimeError(f'模拟主机 {i} 启动失败')
+        inventory.append({'name': f'kiosk-{i:03d}', 'url': f'http://127.0.0.1:{line.split()[1]}'})
+    return processes, inventory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='在本机模拟主机上端到端运行批量发布')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--volumes', nargs='+', default=['C:', 'D:'], help=argparse.SUPPRESS)
+    parser.add_argument('--hosts', type=int, default=10, help='模拟主机数量')
+    parser.add_argument('--broken', type=int, nargs='*', default=[], help='会失败的主机序号')
+    parser.add_argument('--latency', type=float, default=0.005, help='模拟的 WMI 往返延迟（秒）')
+    parser.add_argument('--canary', type=int, default=1)
+    parser.add_argument('--wave-size', type=int, default=4)
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--max-error-rate', type=float, default=0.25)
+    parser.add_argument('--report', default=None, help='进度报告文件，默认写入临时目录')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.volumes, args.latency)
+        return
+
+    from app.fleet import ChangeSet, FleetOrchestrator, Host
+
+    processes, inventory = start_hosts(args.hosts, set(args.broken), args.latency)
+    report_path = args.report or os.path.join(tempfile.mkdtemp(prefix='freezelock-fleet-'), 'rollout.json')
+    try:
+        orchestrator = FleetOrchestrator(
+            hosts=[Host(**entry) for entry in inventory], change_set=ChangeSet(**DEFAULT_CHANGES), report_path=report_path,
+            canary=args.canary, wave_size=args.wave_size, max_workers=args.max_workers, max_error_rate=args.max_error_rate,
+        )
+        report = orchestrator.run()
+        print(f'[*] 报告: {report_path}')
+        print(json.dumps(report.counts(), ensure_ascii=False))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
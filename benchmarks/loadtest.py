@@ -0,0 +1,99 @@
+"""
+基于 UWF 模拟器的负载测试
+
+按卷数量、排除项数量和覆盖文件数量逐级放大，找出服务层工作流开始无法扩展的位置。
+用法：python -m benchmarks.loadtest --volumes 2 8 24 --exclusions 100 1000 10000 100000
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import sys
+import time
+
+from .backend import install, use_backend
+from .backend.simulator import UWFSimulator
+
+install()  # 必须在导入 app 之前注册替身模块
+
+from app.core.services import refresh_wmi_client  # noqa: E402
+from app.core.services.utils import get_service_instance  # noqa: E402
+from app.core.services.volume import UWFVolume  # noqa: E402
+from .workflows import WORKFLOWS  # noqa: E402
+
+
+def overlay_files_scan():
+    """读取所有卷的覆盖文件列表"""
+    overlay = get_service_instance(instance_name='UWF_Overlay')[0]
+    for volume in get_service_instance(instance_name='UWF_Volume'):
+        if not volume.CurrentSession or not volume.DriveLetter: continue
+        result = overlay.execute_method('GetOverlayFiles', Volume=volume.DriveLetter)
+        for file in result.OverlayFiles or []:
+            _ = file.FileName, file.FileSize
+
+
+def volume_protect_many():
+    """并发保护再取消保护所有卷"""
+    drives = [
+        volume.DriveLetter for volume in get_service_instance(instance_name='UWF_Volume')
+        if volume.CurrentSession and volume.DriveLetter
+    ]
+    UWFVolume.protect_many(drives=drives, max_workers=8)
+    UWFVolume.unprotect_many(drives=drives, max_workers=8)
+
+
+def overlay_commit_tree():
+    """并发提交所有卷的覆盖文件（会清空覆盖层，放在最后运行）"""
+    for volume in get_service_instance(instance_name='UWF_Volume'):
+        if not volume.CurrentSession or not volume.DriveLetter: continue
+        UWFVolume.commit_tree(drive=volume.DriveLetter, max_workers=8)
+
+
+LOAD_WORKFLOWS = {
+    'status_page.refresh': WORKFLOWS['status_page.refresh'],
+    'freeze_page.refresh': WORKFLOWS['freeze_page.refresh'],
+    'overlay.files_scan': overlay_files_scan,
+    'volume.protect_many': volume_protect_many,
+    'overlay.commit_tree': overlay_commit_tree,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description='基于 UWF 模拟器的负载测试')
+    parser.add_argument('--volumes', type=int, nargs='+', default=[2, 8, 24], help='卷数量')
+    parser.add_argument('--exclusions', type=int, nargs='+', default=[100, 1000, 10000], help='每个卷的排除项数量')
+    parser.add_argument('--overlay-files', type=int, nargs='+', default=[0], help='每个卷的覆盖文件数量')
+    parser.add_argument('--latency', type=float, default=1.0, help='每次 WMI 往返注入的延迟（毫秒）')
+    parser.add_argument('--budget', type=float, default=1000.0, help='单个工作流的耗时预算（毫秒），超出时标记')
+    parser.add_argument('--only', action='append', choices=sorted(LOAD_WORKFLOWS), help='只运行指定工作流，可重复')
+    args = parser.parse_args()
+
+    print(f'{"workflow":<24}{"volumes":>8}{"exclusions":>12}{"overlay":>10}{"wall_ms":>12}{"round_trips":>13}{"dispatch":>11}')
+    over_budget = []
+    for volumes, exclusions, overlay_files in itertools.product(args.volumes, args.exclusions, args.overlay_files):
+        simulator = UWFSimulator(
+            volumes=volumes, exclusions=exclusions, overlay_files=overlay_files,
+            maximum_size=max(1024, overlay_files * volumes // 32), latency=args.latency / 1000,
+        )
+        use_backend(simulator.backend)
+        for name in args.only or LOAD_WORKFLOWS:
+            with contextlib.redirect_stdout(io.StringIO()):
+                refresh_wmi_client()
+                simulator.backend.reset_stats()
+                start = time.perf_counter()
+                LOAD_WORKFLOWS[name]()
+                elapsed = (time.perf_counter() - start) * 1000
+            stats = simulator.backend.stats()
+            flag = ' !' if elapsed > args.budget else ''
+            print(f'{name:<24}{volumes:>8}{exclusions:>12}{overlay_files:>10}{elapsed:>12.2f}{stats["round_trips"]:>13}{stats["dispatch_calls"]:>11}{flag}', flush=True)
+            if flag: over_budget.append((name, volumes, exclusions, overlay_files, elapsed))
+
+    if over_budget:
+        print(f'[!] {len(over_budget)} 个组合超出 {args.budget:.0f} ms 预算:')
+        for name, volumes, exclusions, overlay_files, elapsed in over_budget:
+            print(f'    {name}: volumes={volumes} exclusions={exclusions} overlay_files={overlay_files} -> {elapsed:.0f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+回放现场录制的 WMI 会话
+
+录制：在目标机器上设置环境变量 FREEZELOCK_WMI_RECORD=session.jsonl.gz 后启动 FreezeLock。
+回放：python -m benchmarks.replay session.jsonl.gz --summary --workflow status_page.refresh --profile
+"""
+import argparse
+import contextlib
+import cProfile
+import io
+import pstats
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+from .backend import install, use_backend, ReplayBackend
+from .backend.replay import load_events
+
+install()  # 必须在导入 app 之前注册替身模块
+
+from app.core.services import refresh_wmi_client  # noqa: E402
+from .workflows import WORKFLOWS  # noqa: E402
+
+
+def summarize(path: str):
+    """按调用统计录制中的延迟分布"""
+    events = load_events(path)
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for event in events:
+        name = f'{event["op"]}:{event["n"]}' if event.get('n') else event['op']
+        durations[name].append(event.get('t', 0) * 1000)
+        if 'e' in event: errors[name] += 1
+    session = max((event['s'] + event.get('t', 0) for event in events), default=0)
+    print(f'[*] {len(events)} 个事件，会话时长 {session:.2f}s，COM 调用总耗时 {sum(map(sum, durations.values())) / 1000:.2f}s')
+    print(f'{"call":<40}{"count":>8}{"total_ms":>12}{"mean_ms":>10}{"p95_ms":>10}{"errors":>8}')
+    for name, samples in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f'{name:<40}{len(samples):>8}{sum(samples):>12.2f}{statistics.mean(samples):>10.3f}{p95:>10.3f}{errors[name]:>8}')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.replay', description='回放录制的 WMI 会话')
+    parser.add_argument('recording', help='录制文件路径（.jsonl 或 .jsonl.gz）')
+    parser.add_argument('--speed', type=float, default=1.0, help='回放速度倍数，0 表示不注入延迟')
+    parser.add_argument('--summary', action='store_true', help='输出录制中各调用的延迟分布')
+    parser.add_argument('--workflow', action='append', choices=sorted(WORKFLOWS), help='在回放后端上运行的工作流，可重复')
+    parser.add_argument('--profile', action='store_true', help='使用 cProfile 分析工作流')
+    args = parser.parse_args()
+
+    if args.summary:
+        summarize(args.recording)
+
+    for name in args.workflow or []:
+        backend = ReplayBackend(args.recording, speed=args.speed)
+        use_backend(backend)
+        profiler = cProfile.Profile() if args.profile else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            refresh_wmi_client()
+            backend.reset_stats()
+            start = time.perf_counter()
+            if profiler: profiler.enable()
+            WORKFLOWS[name]()
+            if profiler: profiler.disable()
+            elapsed = (time.perf_counter() - start) * 1000
+        stats = backend.stats()
+        print(f'[+] {name}: {elapsed:.2f} ms, {stats["round_trips"]} 次调用')
+        if profiler:
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
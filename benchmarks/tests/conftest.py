@@ -0,0 +1,19 @@
+"""
+基于替身后端的测试
+
+替身模块必须在导入 app 包之前注册，每个测试使用独立的数据目录。
+"""
+import pytest
+
+from benchmarks.backend import install
+
+install()
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    from app.core.storage import DATA_DIR_ENV
+
+    path = tmp_path / 'data'
+    monkeypatch.setenv(DATA_DIR_ENV, str(path))
+    return path
@@ -0,0 +1,138 @@
+"""代理核心与本地 JSON API，使用 UWF 模拟器作为后端"""
+import http.client
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from app.agent import Agent, AgentError, AgentServer
+from app.agent.server import AGENT_TOKEN_ENV, AGENT_TOKEN_FILE, load_token
+from benchmarks.backend import use_backend
+from benchmarks.backend.simulator import UWFSimulator
+
+TOKEN = 'test-token'
+
+
+@pytest.fixture
+def simulator():
+    from app.core.services import refresh_wmi_client
+
+    simulator = UWFSimulator(volumes=('C:', 'D:'), filter_enabled=False, protected=())
+    use_backend(simulator.backend)
+    refresh_wmi_client()
+    return simulator
+
+
+@pytest.fixture
+def agent(simulator):
+    agent = Agent(cache_ttl=60)
+    yield agent
+    agent.close()
+
+
+@pytest.fixture
+def server(agent):
+    server = AgentServer(agent, address=('127.0.0.1', 0), token=TOKEN)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method: str, path: str, body=None, headers=None) -> tuple[int, dict]:
+    headers = {'Authorization': f'Bearer {TOKEN}', 'Content-Type': 'application/json', **(headers or {})}
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    try:
+        if 'Host' in headers: connection.putrequest(method, path, skip_host=True)
+        else: connection.putrequest(method, path)
+        data = body if isinstance(body, bytes) else json.dumps(body).encode() if body is not None else b''
+        headers.setdefault('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            if value is not None: connection.putheader(name, value)
+        connection.endheaders(data)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_reads_are_cached_until_a_write(agent):
+    assert agent.read('status')['filter'] == {'current': False, 'next': False}
+    agent.read('status')
+    assert agent.stats['queries'] == 1 and agent.stats['cached'] == 1
+
+    result = agent.batch([{'op': 'enable'}, {'op': 'protect', 'drive': 'D:'}])
+    assert result['success']
+    assert agent.read('status')['filter']['next'] is True
+    assert agent.stats['queries'] == 2
+
+
+def test_atomic_batch_rolls_back_on_failure(agent):
+    result = agent.batch([
+        {'op': 'protect', 'drive': 'D:'},
+        {'op': 'add_exclusion', 'drive': 'E:', 'path': '\\Data'},  # 不存在的卷
+    ], atomic=True)
+    assert not result['success'] and result['rolled_back']
+    volumes = {(volume['drive'], volume['session']): volume['protected'] for volume in agent.read('volumes')}
+    assert volumes[('D:', 'next')] is False
+
+
+def test_invalid_batches_are_rejected(agent):
+    with pytest.raises(AgentError): agent.batch([{'op': 'protect'}])
+    with pytest.raises(AgentError): agent.batch([{'op': 'format', 'drive': 'D:'}])
+    with pytest.raises(AgentError): agent.batch([{'op': 'disable'}], atomic=True)
+    with pytest.raises(AgentError): agent.batch([{'op': 'protect', 'drive': 'D:'}] * 2, atomic=True)
+
+
+def test_server_requires_the_token(server):
+    assert request(server, 'GET', '/status')[0] == 200
+    assert request(server, 'GET', '/status', headers={'Authorization': None})[0] == 401
+    assert request(server, 'GET', '/status', headers={'Authorization': 'Bearer wrong'})[0] == 401
+
+
+def test_batch_requires_json_content_type(server):
+    body = {'operations': [{'op': 'enable'}]}
+    # 浏览器无需预检即可跨站发送 text/plain 请求
+    assert request(server, 'POST', '/batch', body, headers={'Content-Type': 'text/plain'})[0] == 415
+    assert request(server, 'POST', '/batch', body, headers={'Content-Type': None})[0] == 415
+    status, result = request(server, 'POST', '/batch', body, headers={'Content-Type': 'application/json; charset=utf-8'})
+    assert status == 200 and result['success']
+
+
+def test_foreign_origin_and_host_are_rejected(server):
+    body = {'operations': [{'op': 'enable'}]}
+    assert request(server, 'POST', '/batch', body, headers={'Origin': 'https://example.com'})[0] == 403
+    assert request(server, 'POST', '/batch', body, headers={'Origin': 'null'})[0] == 403
+    # DNS 重绑定：请求到达回环地址，但 Host 是攻击者的域名
+    assert request(server, 'GET', '/status', headers={'Host': 'attacker.example:9478'})[0] == 403
+    assert request(server, 'GET', '/status', headers={'Host': 'localhost:9478', 'Origin': 'http://127.0.0.1:8080'})[0] == 200
+    assert request(server, 'GET', '/status', headers={'Host': '[::1]:9478'})[0] == 200
+    assert server.agent.stats['batches'] == 0
+
+
+def test_server_reports_bad_requests(server):
+    assert request(server, 'POST', '/batch', b'{')[0] == 400
+    assert request(server, 'POST', '/batch', [1])[0] == 400
+    assert request(server, 'POST', '/batch', {'operations': [{'op': 'protect'}]})[0] == 400
+    assert request(server, 'GET', '/unknown')[0] == 400
+    assert request(server, 'POST', '/status', {})[0] == 404
+    assert request(server, 'POST', '/batch', b'{}', headers={'Content-Length': 'abc'})[0] == 400
+
+
+def test_server_only_binds_to_loopback(agent):
+    with pytest.raises(ValueError): AgentServer(agent, address=('0.0.0.0', 0))
+
+
+def test_token_is_generated_when_not_configured(monkeypatch, data_dir):
+    monkeypatch.delenv(AGENT_TOKEN_ENV, raising=False)
+    token = load_token()
+    assert len(token) >= 32
+    assert json.loads((data_dir / AGENT_TOKEN_FILE).read_text(encoding='utf-8')) == {'token': token}
+    if sys.platform != 'win32': assert os.stat(data_dir / AGENT_TOKEN_FILE).st_mode & 0o077 == 0
+    assert load_token() != token
+
+    monkeypatch.setenv(AGENT_TOKEN_ENV, 'configured')
+    assert load_token() == 'configured'
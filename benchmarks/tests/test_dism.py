@@ -0,0 +1,120 @@
+"""stream_command 与 UWF 功能安装流程，使用 benchmarks.fake_dism 模拟 DISM"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from app.core.utils import CommandResult, stream_command
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FAKE_DISM = [sys.executable, '-m', 'benchmarks.fake_dism']
+
+
+@pytest.fixture(autouse=True)
+def fake_dism_env(monkeypatch):
+    monkeypatch.setenv('PYTHONPATH', ROOT)
+    monkeypatch.setenv('FAKE_DISM_STEPS', '10')
+    monkeypatch.setenv('FAKE_DISM_DELAY', '0')
+    for name in ('FAKE_DISM_EXIT', 'FAKE_DISM_HANG'):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_progress_is_parsed_from_carriage_return_updates():
+    progress, lines = [], []
+    result = stream_command(FAKE_DISM + ['/Online'], on_line=lines.append, on_progress=progress.append)
+    assert result.success
+    assert progress == [float(percent) for percent in range(0, 101, 10)]
+    # 进度条用 \r 刷新同一行，每次刷新都应作为单独的一行
+    assert sum('%' in line for line in lines) == 11
+    assert lines[-1] == 'The operation completed successfully.'
+
+
+def test_failing_exit_code_is_reported(monkeypatch):
+    monkeypatch.setenv('FAKE_DISM_EXIT', '5')
+    result = stream_command(FAKE_DISM)
+    assert result.returncode == 5
+    assert not result.success
+    assert 'The operation failed.' in result.output
+
+
+def test_cancellation_terminates_the_process(monkeypatch):
+    monkeypatch.setenv('FAKE_DISM_HANG', '50')
+    cancel_event = threading.Event()
+
+    def on_progress(percent: float):
+        if percent >= 50: cancel_event.set()
+
+    start = time.monotonic()
+    result = stream_command(FAKE_DISM, on_progress=on_progress, cancel_event=cancel_event)
+    assert result.cancelled and not result.timed_out
+    assert not result.success
+    assert result.returncode != 0
+    assert time.monotonic() - start < 10
+
+
+def test_timeout_terminates_a_hung_process(monkeypatch):
+    monkeypatch.setenv('FAKE_DISM_HANG', '30')
+    start = time.monotonic()
+    result = stream_command(FAKE_DISM, timeout=1)
+    assert result.timed_out and not result.cancelled
+    assert not result.success
+    assert 1 <= time.monotonic() - start < 10
+    assert '30.0%' in result.output
+
+
+def test_missing_command_is_not_successful():
+    result = stream_command(['freezelock-no-such-command'])
+    assert result.returncode is None
+    assert not result.success
+
+
+@pytest.fixture
+def available(monkeypatch):
+    """UWF 功能可安装，记录 mark_installed 的调用"""
+    from app.core.services import install_state
+
+    marked = []
+    monkeypatch.setattr(install_state, 'get_install_state', lambda *args, **kwargs: install_state.AVAILABLE)
+    monkeypatch.setattr(install_state, 'mark_installed', lambda *args, **kwargs: marked.append(True))
+    monkeypatch.setenv('FREEZELOCK_DISM', ' '.join(FAKE_DISM))
+    return marked
+
+
+def test_install_counts_reboot_required_as_success(available, monkeypatch):
+    from app.core import utils
+    from app.core.services.utils import install_uwf_service
+
+    # POSIX 的退出码只有 8 位，无法由子进程原样返回 3010
+    monkeypatch.setattr(utils, 'stream_command', lambda **kwargs: CommandResult(returncode=3010, output=''))
+    assert install_uwf_service()
+    assert available == [True]
+
+
+@pytest.mark.skipif(sys.platform != 'win32', reason='只有 Windows 能原样返回退出码 3010')
+def test_install_with_fake_dism_reboot_required(available, monkeypatch):
+    from app.core.services.utils import install_uwf_service
+
+    monkeypatch.setenv('FAKE_DISM_EXIT', '3010')
+    assert install_uwf_service()
+    assert available == [True]
+
+
+def test_install_reports_progress_and_failure(available, monkeypatch):
+    from app.core.services.utils import install_uwf_service
+
+    progress = []
+    assert install_uwf_service(on_progress=progress.append)
+    assert progress[-1] == 100.0
+    monkeypatch.setenv('FAKE_DISM_EXIT', '1')
+    assert not install_uwf_service()
+    assert available == [True]
+
+
+def test_install_is_not_marked_after_timeout(available, monkeypatch):
+    from app.core.services.utils import install_uwf_service
+
+    monkeypatch.setenv('FAKE_DISM_HANG', '20')
+    assert not install_uwf_service(timeout=1)
+    assert available == []
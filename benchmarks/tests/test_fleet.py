@@ -0,0 +1,90 @@
+"""批量发布编排器，使用进程内的模拟代理"""
+import json
+import time
+
+import pytest
+
+from app.fleet import AgentRequestError, ChangeSet, FleetOrchestrator, Host
+from app.fleet.orchestrator import HOST_FAILED, HOST_PENDING, HOST_SUCCEEDED, ROLLOUT_HALTED
+
+
+@pytest.mark.parametrize('operations, atomic', [
+    ([], True),
+    (['protect'], True),
+    ([{'op': 'format', 'drive': 'D:'}], False),
+    ([{'op': 'protect'}], True),
+    ([{'op': 'add_exclusion', 'drive': 'D:'}], True),
+    ([{'op': 'set_maximum_size', 'size': '2048'}], True),
+    ([{'op': 'set_thresholds', 'warning': True, 'critical': 900}], False),
+    ([{'op': 'disable'}], True),
+])
+def test_invalid_change_sets_are_rejected(operations, atomic):
+    with pytest.raises(ValueError):
+        ChangeSet(operations=operations, atomic=atomic)
+
+
+def test_change_set_file_is_validated_on_load(tmp_path):
+    path = tmp_path / 'change.json'
+    path.write_text(json.dumps({'operations': [{'op': 'protect'}]}), encoding='utf-8')
+    with pytest.raises(ValueError): ChangeSet.load(str(path))
+
+    path.write_text(json.dumps({'atomic': False, 'operations': [{'op': 'disable'}, {'op': 'set_maximum_size', 'size': 2048}]}), encoding='utf-8')
+    change_set = ChangeSet.load(str(path))
+    assert not change_set.atomic and len(change_set.operations) == 2
+
+
+def test_unexpected_errors_are_recorded_as_host_failures(monkeypatch, tmp_path):
+    def batch(self, operations, atomic=False):
+        if self.url.endswith('broken'): return {'success': False, 'results': [{'success': False}]}  # 缺少 op 字段
+        return {'success': True}
+
+    monkeypatch.setattr('app.fleet.client.AgentClient.batch', batch)
+    hosts = [Host(name=f'kiosk-{i}', url=f'http://127.0.0.1:{19400 + i}') for i in range(3)]
+    hosts.append(Host(name='kiosk-broken', url='http://127.0.0.1:19409/broken'))
+    orchestrator = FleetOrchestrator(
+        hosts=hosts, change_set=ChangeSet(operations=[{'op': 'enable'}]), report_path=str(tmp_path / 'rollout.json'),
+        canary=1, wave_size=3, max_error_rate=1, verify=False, on_event=lambda line: None,
+    )
+    report = orchestrator.run()
+    assert report.hosts['kiosk-broken']['status'] == HOST_FAILED
+    assert 'KeyError' in report.hosts['kiosk-broken']['error']
+    assert [report.hosts[f'kiosk-{i}']['status'] for i in range(3)] == [HOST_SUCCEEDED] * 3
+
+
+def failing_hosts(monkeypatch, healthy: set[str]):
+    def batch(self, operations, atomic=False):
+        if self.url in healthy: return {'success': True}
+        time.sleep(0.05)
+        raise AgentRequestError(f'{self.url}: 连接被拒绝')
+
+    monkeypatch.setattr('app.fleet.client.AgentClient.batch', batch)
+
+
+def test_wave_over_error_budget_halts_and_leaves_unstarted_hosts_pending(monkeypatch, tmp_path):
+    hosts = [Host(name=f'kiosk-{i:02d}', url=f'http://127.0.0.1:{19400 + i}') for i in range(12)]
+    failing_hosts(monkeypatch, healthy={hosts[0].url})
+    orchestrator = FleetOrchestrator(
+        hosts=hosts, change_set=ChangeSet(operations=[{'op': 'enable'}]), report_path=str(tmp_path / 'rollout.json'),
+        canary=1, wave_size=10, max_workers=1, max_error_rate=0.1, verify=False, on_event=lambda line: None,
+    )
+    report = orchestrator.run()
+    assert report.state == ROLLOUT_HALTED
+    counts = report.counts()
+    assert counts[HOST_SUCCEEDED] == 1
+    # 允许失败 1 台，第 2 台失败后取消尚未开始的主机（此时最多已有 1 台正在执行）
+    assert 2 <= counts[HOST_FAILED] <= 3
+    assert counts[HOST_PENDING] == 11 - counts[HOST_FAILED]
+    saved = json.loads((tmp_path / 'rollout.json').read_text(encoding='utf-8'))
+    assert saved['state'] == ROLLOUT_HALTED and saved['summary'] == counts
+
+
+def test_failed_canary_halts_before_the_first_wave(monkeypatch, tmp_path):
+    hosts = [Host(name=f'kiosk-{i}', url=f'http://127.0.0.1:{19400 + i}') for i in range(5)]
+    failing_hosts(monkeypatch, healthy=set())
+    orchestrator = FleetOrchestrator(
+        hosts=hosts, change_set=ChangeSet(operations=[{'op': 'enable'}]), report_path=None,
+        canary=1, wave_size=2, max_error_rate=0.5, verify=False, on_event=lambda line: None,
+    )
+    report = orchestrator.run()
+    assert report.state == ROLLOUT_HALTED
+    assert report.counts() == {HOST_PENDING: 4, HOST_SUCCEEDED: 0, HOST_FAILED: 1}
@@ -0,0 +1,28 @@
+"""UWF 变更审计日志"""
+import json
+
+from app.core.journal import Journal
+
+
+def test_records_are_written(tmp_path):
+    journal = Journal(directory=str(tmp_path / 'journal'), flush_interval=0.05)
+    journal.record({'op': 'UWFFilter.enable', 'result': True})
+    assert journal.flush(timeout=5)
+    journal.close()
+    with open(journal.path, encoding='utf-8') as f:
+        assert [json.loads(line)['op'] for line in f] == ['UWFFilter.enable']
+
+
+def test_unwritable_directory_does_not_block_flush(tmp_path):
+    blocker = tmp_path / 'journal'
+    blocker.write_text('')  # 日志目录的位置被文件占用，无法创建目录
+    journal = Journal(directory=str(blocker), flush_interval=0.05)
+    journal.record({'op': 'UWFFilter.enable'})
+    assert journal.flush(timeout=5)
+
+    blocker.unlink()  # 恢复后继续写入
+    journal.record({'op': 'UWFFilter.disable'})
+    assert journal.flush(timeout=5)
+    journal.close()
+    with open(journal.path, encoding='utf-8') as f:
+        assert [json.loads(line)['op'] for line in f] == ['UWFFilter.disable']
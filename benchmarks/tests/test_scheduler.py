@@ -0,0 +1,82 @@
+"""维护计划任务，使用 ManualClock 推进时间"""
+import random
+from datetime import datetime, timedelta
+
+from app.core.scheduler import ACTION_COMMIT, ACTION_RESTART, MISSED_SKIP, Job, ManualClock, Scheduler
+
+START = datetime(2000, 1, 1, 10, 0)
+
+
+class MaxRandom(random.Random):
+    """抖动总是取上限"""
+
+    def uniform(self, a, b):
+        return b
+
+
+def make_scheduler(clock, calls, records_persist=True, rng=None) -> Scheduler:
+    def action(name):
+        return lambda params, stop_event: calls.append(name) or True
+
+    return Scheduler(
+        clock=clock, actions={ACTION_COMMIT: action(ACTION_COMMIT), ACTION_RESTART: action(ACTION_RESTART)},
+        rng=rng, records_persist=lambda: records_persist,
+    )
+
+
+def test_missed_skip_keeps_the_original_cadence():
+    clock, calls = ManualClock(START), []
+    scheduler = make_scheduler(clock, calls)
+    job = scheduler.add_job(Job(action=ACTION_COMMIT, interval=3600, missed=MISSED_SKIP))
+
+    clock.advance(3 * 3600 + 600)
+    assert scheduler.run_pending() == []
+    assert calls == [] and job.last_run is None
+    assert job.next_run == (START + timedelta(hours=4)).isoformat(timespec='seconds')
+
+
+def test_run_outside_the_window_is_deferred():
+    clock, calls = ManualClock(START), []
+    scheduler = make_scheduler(clock, calls)
+    job = scheduler.add_job(Job(action=ACTION_COMMIT, interval=86400, window='02:00-05:00'))
+    assert job.next_run == '2000-01-02T02:00:00'
+
+    clock.advance(20 * 3600)  # 次日 06:00，已离开时间窗
+    assert scheduler.run_pending() == []
+    assert job.next_run == '2000-01-03T02:00:00'
+
+    clock.advance(20 * 3600)
+    assert [result for _, result in scheduler.run_pending()] == [True]
+    assert calls == [ACTION_COMMIT]
+
+
+def test_jitter_is_clamped_to_the_window():
+    clock, calls = ManualClock(datetime(2000, 1, 1, 2, 30)), []
+    scheduler = make_scheduler(clock, calls, rng=MaxRandom())
+    job = scheduler.add_job(Job(action=ACTION_COMMIT, interval=86400, window='02:00-03:00', jitter=7200))
+    assert job.next_run == '2000-01-01T02:59:59'
+
+
+def test_restart_is_not_repeated_after_reboot():
+    clock, calls = ManualClock(START), []
+    scheduler = make_scheduler(clock, calls)
+    scheduler.add_job(Job(action=ACTION_RESTART, interval=86400))
+    assert [result for _, result in scheduler.run_pending()] == [True]
+
+    clock.advance(120)  # 重启后重新加载任务
+    restarted = make_scheduler(clock, calls)
+    assert restarted.run_pending() == []
+    assert calls == [ACTION_RESTART]
+    assert restarted.jobs()[0].last_run == START.isoformat(timespec='seconds')
+
+
+def test_restart_waits_for_the_exclusion_to_take_effect():
+    clock, calls = ManualClock(START), []
+    scheduler = make_scheduler(clock, calls, records_persist=False)
+    restart = scheduler.add_job(Job(action=ACTION_RESTART, interval=3600))
+    scheduler.add_job(Job(action=ACTION_COMMIT, interval=3600))
+
+    assert [job.action for job, _ in scheduler.run_pending()] == [ACTION_COMMIT]
+    assert calls == [ACTION_COMMIT]
+    assert restart.last_run is None
+    assert restart.next_run == (START + timedelta(hours=1)).isoformat(timespec='seconds')
@@ -0,0 +1,44 @@
+"""数据目录权限与配置文件加载"""
+import os
+import sys
+
+import pytest
+
+from app.core import storage
+from app.core.overlay_analysis import REPORT_FILE, OverlayBreakdown, write_report
+from app.core.overlay_policy import POLICY_FILE, OverlayPolicy, run_hook
+
+POLICY = {'critical': [{'type': 'hook', 'command': [sys.executable, '-c', 'pass']}]}
+
+
+def test_data_dir_is_private(data_dir):
+    assert storage.get_data_dir() == str(data_dir)
+    if sys.platform != 'win32': assert os.stat(data_dir).st_mode & 0o077 == 0
+
+
+def test_policy_owned_by_admin_is_loaded(data_dir):
+    storage.write_json(POLICY_FILE, POLICY)
+    assert OverlayPolicy.load() is not None
+
+
+@pytest.mark.skipif(not hasattr(os, 'chown') or os.getuid() != 0, reason='需要以 root 运行以修改文件所有者')
+def test_policy_planted_by_another_user_is_refused(data_dir):
+    storage.write_json(POLICY_FILE, POLICY)
+    os.chown(storage.data_path(POLICY_FILE), 12345, 12345)
+    assert OverlayPolicy.load() is None
+
+
+def test_hook_requires_an_argument_list():
+    assert run_hook({'command': [sys.executable, '-c', 'import sys; sys.exit(0)']}, level='critical', status={})
+    assert not run_hook({'command': f'"{sys.executable}" -c pass'}, level='critical', status={})
+    assert not run_hook({'command': [sys.executable, 1]}, level='critical', status={})
+
+
+def test_report_is_only_written_when_data_dir_is_persistent(data_dir, monkeypatch):
+    monkeypatch.setattr(storage, '_persistent', False)
+    assert not write_report(OverlayBreakdown())
+    assert not (data_dir / REPORT_FILE).exists()
+
+    monkeypatch.setattr(storage, '_persistent', True)
+    assert write_report(OverlayBreakdown())
+    assert (data_dir / REPORT_FILE).exists()
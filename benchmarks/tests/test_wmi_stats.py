@@ -0,0 +1,21 @@
+"""WMI 调用统计"""
+from app.core.services.utils import get_filter_instance
+from app.core.wmi_stats import call_stats
+from benchmarks.backend import use_backend
+from benchmarks.backend.simulator import UWFSimulator
+
+
+def test_nonzero_return_value_counts_as_error():
+    from app.core.services import refresh_wmi_client
+
+    simulator = UWFSimulator(volumes=('C:',), filter_enabled=False, protected=())
+    use_backend(simulator.backend)
+    refresh_wmi_client()
+    simulator.backend.classes['UWF_Filter'].methods['Disable'].handler = lambda backend, instance, **params: {'ReturnValue': 1}
+
+    before = call_stats().get('ExecMethod:Disable', (0, 0.0, 0))
+    assert get_filter_instance().execute_method('Disable').ReturnValue == 1
+    assert get_filter_instance().execute_method('Enable').ReturnValue == 0
+    calls, _, errors = call_stats()['ExecMethod:Disable']
+    assert (calls - before[0], errors - before[2]) == (1, 1)
+    assert call_stats()['ExecMethod:Enable'][2] == 0
@@ -0,0 +1,113 @@
+"""
+基准工作流
+
+每个工作流按对应页面方法的调用顺序访问服务层，不依赖 Qt，页面逻辑变化时需要同步更新。
+"""
+from typing import Callable
+
+from app.core.exclusion_impact import ExclusionSimulator
+from app.core.services import is_uwf_installed
+from app.core.services.filter import current_enabled, next_enabled
+from app.core.services.overlay_config import get_type, maximum_size
+from app.core.services.transaction import Transaction
+from app.core.services.utils import get_service_instance, get_service_class, stream_service_instances
+from app.core.services.volume import UWFVolume
+
+
+def status_page_refresh():
+    """对应 StatusPage.refresh（占用分析按独立间隔在后台进行，不计入刷新）"""
+    if not is_uwf_installed(): return
+    current_enabled()
+    next_enabled()
+    get_type()
+    get_service_instance(instance_name='UWF_Overlay')[0].as_dict()
+
+
+def _get_volumes_info() -> dict[str, dict[str, dict]]:
+    """对应 FreezePage._get_volumes_info"""
+    volumes_info = {}
+    for volume in stream_service_instances(instance_name='UWF_Volume'):
+        if not volume.DriveLetter: continue
+        drive_letter = volume.DriveLetter[:-1]
+        if drive_letter not in volumes_info:
+            volumes_info[drive_letter] = {'CurrentSession': {}, 'NextSession': {}}
+        volumes_info[drive_letter]['CurrentSession' if volume.CurrentSession else 'NextSession'] = {
+            'DriveLetter': volume.DriveLetter,
+            'VolumeName': volume.VolumeName,
+            'Protected': volume.Protected,
+            'CommitPending': volume.CommitPending,
+            'CurrentSession': volume.CurrentSession,
+            'BindByDriveLetter': volume.BindByDriveLetter,
+        }
+    for drive_letter, volume_info in volumes_info.items():
+        if not volume_info['NextSession']:
+            cls = get_service_class(class_name='UWF_Volume')
+            inst = cls.SpawnInstance_()
+            for prop in inst.Properties_:
+                inst.Properties_.Item(prop.Name).Value = volume_info['CurrentSession'][prop.Name]
+            inst.Properties_.Item('CurrentSession').Value = False
+            inst.Put_(0x2)
+    return dict(sorted(volumes_info.items()))
+
+
+def freeze_page_refresh() -> dict:
+    """对应 FreezePage.refresh，返回页面数据（卷信息与排除项）"""
+    if not is_uwf_installed(): return {'volumes': {}, 'exclusions': []}
+    get_service_instance(instance_name='UWF_Filter')[0].as_dict()
+    volumes_info = _get_volumes_info()
+    exclusions = []
+    for drive in volumes_info.values():
+        drive_letter = drive['CurrentSession']['DriveLetter']
+        success, results = UWFVolume.get_exclusions(drive=drive_letter)
+        if not success: continue
+        for path in results:
+            exclusions.append(f'{drive_letter}{path.FileName}')
+    return {'volumes': volumes_info, 'exclusions': exclusions}
+
+
+def bulk_add_exclusions(count: int = 50):
+    """
+    对应 FreezePage._add_exclusion 连续添加多个排除项：打开对话框时用上次加载的数据建立索引并预估效果，
+    每次添加后强制刷新页面，索引作废，下次打开对话框时重建
+    """
+    data = freeze_page_refresh()
+    for i in range(count):
+        drives = [volume['CurrentSession']['DriveLetter'] for volume in data['volumes'].values() if volume['CurrentSession'].get('Protected')]
+        ExclusionSimulator.from_exclusions(data['exclusions'], drives).simulate([rf'D:\Kiosk\Data\Item{i:04d}'])
+        UWFVolume.add_exclusion(drive='D:', file_name=rf'\Kiosk\Data\Item{i:04d}')
+        data = freeze_page_refresh()
+
+
+def bulk_remove_exclusions(count: int = 50):
+    """对应 FreezePage._remove_exclusion 一次删除多个选中的排除项"""
+    for i in range(count):
+        UWFVolume.remove_exclusion(drive='D:', file_name=rf'\Kiosk\Data\Item{i:04d}')
+    freeze_page_refresh()
+
+
+def settings_apply_settings():
+    """对应 SettingsPage._apply_settings（模式与大小均发生变化）"""
+    transaction = Transaction('应用设置')
+    transaction.set_overlay_type('Disk')
+    transaction.set_maximum_size(2048)
+    transaction.apply()
+    # SettingsPage.refresh
+    current_enabled()
+    get_type()
+    maximum_size()
+
+
+# 工作流使用的数据集参数（build_backend 的关键字参数），未列出的工作流使用默认数据集
+DATASETS: dict[str, dict] = {
+    # D: 受保护且覆盖层中有文件，覆盖文件的读取会计入往返次数
+    'freeze_page.refresh': {'protected': ('D:',), 'overlay_files': 500},
+    'freeze_page.bulk_add_exclusions': {'protected': ('D:',), 'overlay_files': 500},
+}
+
+WORKFLOWS: dict[str, Callable[[], None]] = {
+    'status_page.refresh': status_page_refresh,
+    'freeze_page.refresh': freeze_page_refresh,
+    'freeze_page.bulk_add_exclusions': bulk_add_exclusions,
+    'freeze_page.bulk_remove_exclusions': bulk_remove_exclusions,
+    'settings_page.apply_settings': settings_apply_settings,
+}
@@ -1,11 +1,16 @@
 import sys
 
-from PySide6.QtWidgets import QApplication
 
-from app.ui import MainWindow
+if __name__ == '__main__':
+    if '--agent' in sys.argv[1:]:
+        from app.agent import run_agent  # 无界面代理模式，不加载 Qt
 
+        sys.exit(run_agent(sys.argv[1:]))
+
+    from PySide6.QtWidgets import QApplication
+
+    from app.ui import MainWindow
 
-if __name__ == '__main__':
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()